@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import json
+import pathlib
+import platform
+import subprocess
+import sys
+import typing
+
+from benchmarks import mime_detection, scan_engine, scan_request_payload, storage, validation
+
+
+SUITES: typing.Final = {
+    "validation": validation.run_benchmarks,
+    "mime_detection": mime_detection.run_benchmarks,
+    "scan_engine": scan_engine.run_benchmarks,
+    "scan_request_payload": scan_request_payload.run_benchmarks,
+    "storage": storage.run_benchmarks,
+}
+# metrics compared across reports, a higher value is a regression for all of them
+COMPARED_METRICS: typing.Final = ("seconds", "peak_memory_bytes")
+
+
+def _read_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _iterate_measurements(
+    results: typing.Any,  # noqa: ANN401
+    path: tuple[str, ...] = (),
+) -> typing.Iterator[tuple[tuple[str, ...], dict[str, float]]]:
+    # measurements are the dicts holding COMPARED_METRICS, everything around them identifies the case
+    if isinstance(results, dict) and all(one_metric in results for one_metric in COMPARED_METRICS):
+        yield path, results
+    elif isinstance(results, dict):
+        case_labels: typing.Final = tuple(
+            f"{key}={value}" for key, value in results.items() if not isinstance(value, dict | list)
+        )
+        for key, value in results.items():
+            if isinstance(value, dict | list):
+                yield from _iterate_measurements(value, (*path, *case_labels, key))
+    elif isinstance(results, list):
+        for one_result in results:
+            yield from _iterate_measurements(one_result, path)
+
+
+def compare_reports(
+    baseline_report: dict[str, typing.Any], report: dict[str, typing.Any], *, tolerance: float
+) -> list[str]:
+    baseline_measurements: typing.Final = dict(_iterate_measurements(baseline_report["results"]))
+    regressions: typing.Final[list[str]] = []
+    for path, measurement in _iterate_measurements(report["results"]):
+        if (baseline_measurement := baseline_measurements.get(path)) is None:
+            continue
+        for one_metric in COMPARED_METRICS:
+            if measurement[one_metric] > baseline_measurement[one_metric] * (1 + tolerance):
+                regressions.append(
+                    f"{' '.join(path)} {one_metric}: "
+                    f"{baseline_measurement[one_metric]:g} -> {measurement[one_metric]:g}"
+                )
+    return regressions
+
+
+async def run_suites(suite_names: list[str]) -> dict[str, typing.Any]:
+    return {one_suite_name: await SUITES[one_suite_name]() for one_suite_name in suite_names}
+
+
+def main() -> None:
+    argument_parser: typing.Final = argparse.ArgumentParser(description="Benchmark safe-s3-storage hot paths")
+    argument_parser.add_argument("--suite", action="append", choices=list(SUITES), dest="suites")
+    argument_parser.add_argument("--output", type=pathlib.Path, help="write the JSON report here instead of stdout")
+    argument_parser.add_argument("--compare", type=pathlib.Path, help="JSON report of a previous run to compare with")
+    argument_parser.add_argument("--tolerance", type=float, default=0.1, help="allowed slowdown, 0.1 is 10%%")
+    arguments: typing.Final = argument_parser.parse_args()
+
+    report: typing.Final = {
+        "commit": _read_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": asyncio.run(run_suites(arguments.suites or list(SUITES))),
+    }
+    report_json: typing.Final = json.dumps(report, indent=2) + "\n"
+    if arguments.output is None:
+        sys.stdout.write(report_json)
+    else:
+        arguments.output.write_text(report_json)
+
+    if arguments.compare is not None:
+        regressions: typing.Final = compare_reports(
+            json.loads(arguments.compare.read_text()), report, tolerance=arguments.tolerance
+        )
+        for one_regression in regressions:
+            sys.stderr.write(f"regression: {one_regression}\n")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import time
+import tracemalloc
+import typing
+
+
+ROUNDS: typing.Final = 3
+
+
+async def measure(
+    run_once: typing.Callable[[], typing.Awaitable[object]], *, processed_bytes: int, rounds: int = ROUNDS
+) -> dict[str, float]:
+    # fastest round for throughput, peak over all rounds for memory, tracemalloc sees Python allocations only
+    elapsed_seconds: typing.Final[list[float]] = []
+    peak_memory_bytes = 0
+    for _ in range(rounds):
+        tracemalloc.start()
+        started_at = time.perf_counter()
+        await run_once()
+        elapsed_seconds.append(time.perf_counter() - started_at)
+        peak_memory_bytes = max(peak_memory_bytes, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    fastest_seconds: typing.Final = min(elapsed_seconds)
+    return {
+        "seconds": fastest_seconds,
+        "throughput_mb_per_second": processed_bytes / max(fastest_seconds, 1e-9) / 1024 / 1024,
+        "peak_memory_bytes": peak_memory_bytes,
+        "peak_memory_to_processed_bytes": peak_memory_bytes / max(processed_bytes, 1),
+    }
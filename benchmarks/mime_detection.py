@@ -0,0 +1,59 @@
+import asyncio
+import functools
+import json
+import os
+import sys
+import typing
+
+import magic
+
+from benchmarks.measurement import measure
+from safe_s3_storage.mime_detection import MimeTypeDetector
+
+
+FILE_SIZE_BYTES: typing.Final = 10 * 1024 * 1024
+# a single detection is too fast to time, each round detects the same file this many times
+DETECTIONS_PER_ROUND: typing.Final = 200
+FILE_HEADERS: typing.Final = {
+    "jpeg": b"\xff\xd8\xff\xe0\x00\x10JFIF\x00",
+    "png": b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR",
+    "pdf": b"%PDF-1.7\n",
+    "zip": b"PK\x03\x04\x14\x00\x00\x00",
+    "unknown": b"\x00\x01\x02\x03",
+}
+
+
+def detect_with_libmagic(file_content: bytes) -> str:
+    return typing.cast("str", magic.from_buffer(file_content, mime=True))
+
+
+async def _detect_repeatedly(detect_mime_type: typing.Callable[[bytes], str], file_content: bytes) -> None:
+    for _ in range(DETECTIONS_PER_ROUND):
+        detect_mime_type(file_content)
+
+
+async def run_benchmarks() -> dict[str, typing.Any]:
+    mime_type_detector: typing.Final = MimeTypeDetector()
+    results: typing.Final = []
+    for file_type, file_header in FILE_HEADERS.items():
+        file_content = file_header + os.urandom(FILE_SIZE_BYTES - len(file_header))
+        results.append(
+            {
+                "file_type": file_type,
+                "file_size_bytes": FILE_SIZE_BYTES,
+                "detections_per_round": DETECTIONS_PER_ROUND,
+                "libmagic": await measure(
+                    functools.partial(_detect_repeatedly, detect_with_libmagic, file_content),
+                    processed_bytes=FILE_SIZE_BYTES * DETECTIONS_PER_ROUND,
+                ),
+                "detector": await measure(
+                    functools.partial(_detect_repeatedly, mime_type_detector.detect_mime_type, file_content),
+                    processed_bytes=FILE_SIZE_BYTES * DETECTIONS_PER_ROUND,
+                ),
+            }
+        )
+    return {"mime_detection": results}
+
+
+if __name__ == "__main__":
+    sys.stdout.write(json.dumps(asyncio.run(run_benchmarks()), indent=2) + "\n")
@@ -0,0 +1,68 @@
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import sys
+import typing
+
+import httpx
+from aiohttp import web
+
+from benchmarks.measurement import measure
+from safe_s3_storage.kaspersky_scan_engine import (
+    KasperskyScanEngineClient,
+    KasperskyScanEngineResponse,
+    KasperskyScanEngineScanResult,
+)
+
+
+FILE_SIZES_BYTES: typing.Final = (100 * 1024, 10 * 1024 * 1024, 50 * 1024 * 1024)
+STUB_READ_CHUNK_SIZE: typing.Final = 64 * 1024
+_CLEAN_RESPONSE: typing.Final = KasperskyScanEngineResponse(scanResult=KasperskyScanEngineScanResult.CLEAN)
+
+
+async def _handle_scan_request(request: web.Request) -> web.Response:
+    # drains the request body from the socket chunk by chunk, so the stub adds at most one chunk to the peak memory
+    async for _ in request.content.iter_chunked(STUB_READ_CHUNK_SIZE):
+        pass
+    return web.json_response(_CLEAN_RESPONSE.model_dump(mode="json"))
+
+
+@contextlib.asynccontextmanager
+async def run_stub_scan_engine() -> typing.AsyncIterator[str]:
+    # a real HTTP server on localhost, so the client sends the scan request over a socket like in production
+    application: typing.Final = web.Application()
+    application.router.add_post("/scanmemory", _handle_scan_request)
+    application_runner: typing.Final = web.AppRunner(application, access_log=None)
+    await application_runner.setup()
+    await web.TCPSite(application_runner, "127.0.0.1", 0).start()
+    try:
+        host, port = application_runner.addresses[0][:2]
+        yield f"http://{host}:{port}/scanmemory"
+    finally:
+        await application_runner.cleanup()
+
+
+async def run_benchmarks() -> dict[str, typing.Any]:
+    results: typing.Final = []
+    async with run_stub_scan_engine() as service_url, httpx.AsyncClient() as httpx_client:
+        scan_engine: typing.Final = KasperskyScanEngineClient(
+            httpx_client=httpx_client, client_name="benchmark", service_url=service_url
+        )
+        for file_size in FILE_SIZES_BYTES:
+            file_content = os.urandom(file_size)
+            results.append(
+                {
+                    "file_size_bytes": file_size,
+                    "scan_memory": await measure(
+                        functools.partial(scan_engine.scan_memory, file_name="benchmark", file_content=file_content),
+                        processed_bytes=file_size,
+                    ),
+                }
+            )
+    return {"scan_memory": results}
+
+
+if __name__ == "__main__":
+    sys.stdout.write(json.dumps(asyncio.run(run_benchmarks()), indent=2) + "\n")
@@ -0,0 +1,58 @@
+import asyncio
+import base64
+import functools
+import json
+import os
+import sys
+import typing
+
+import httpx
+
+from benchmarks.measurement import measure
+from safe_s3_storage.kaspersky_scan_engine import KasperskyScanEngineRequest, KasperskyScanEngineStreamedRequest
+
+
+FILE_SIZES_BYTES: typing.Final = (100 * 1024, 10 * 1024 * 1024, 50 * 1024 * 1024)
+
+
+async def build_buffered_request(file_content: bytes) -> int:
+    payload: typing.Final = KasperskyScanEngineRequest(
+        timeout="10000", object=base64.b64encode(file_content).decode(), name="benchmark"
+    ).model_dump(mode="json")
+    request: typing.Final = httpx.Request("POST", "http://scan-engine", json=payload)
+    return len(await request.aread())
+
+
+async def build_streamed_request(file_content: bytes) -> int:
+    scan_request: typing.Final = KasperskyScanEngineStreamedRequest(
+        timeout="10000", name="benchmark", file_content=file_content
+    )
+    request: typing.Final = httpx.Request(
+        "POST", "http://scan-engine", content=scan_request, headers={"Content-Length": str(scan_request.content_length)}
+    )
+    sent_bytes = 0
+    async for one_chunk in request.stream:  # type: ignore[union-attr]
+        sent_bytes += len(one_chunk)
+    return sent_bytes
+
+
+async def run_benchmarks() -> dict[str, typing.Any]:
+    results: typing.Final = []
+    for file_size in FILE_SIZES_BYTES:
+        file_content = os.urandom(file_size)
+        results.append(
+            {
+                "file_size_bytes": file_size,
+                "buffered": await measure(
+                    functools.partial(build_buffered_request, file_content), processed_bytes=file_size
+                ),
+                "streamed": await measure(
+                    functools.partial(build_streamed_request, file_content), processed_bytes=file_size
+                ),
+            }
+        )
+    return {"scan_request_payload": results}
+
+
+if __name__ == "__main__":
+    sys.stdout.write(json.dumps(asyncio.run(run_benchmarks()), indent=2) + "\n")
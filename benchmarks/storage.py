@@ -0,0 +1,98 @@
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import sys
+import typing
+
+import aioboto3
+
+from benchmarks.measurement import measure
+from safe_s3_storage.file_validator import ValidatedFile
+from safe_s3_storage.s3_service import S3Service
+
+
+FILE_SIZES_BYTES: typing.Final = (100 * 1024, 10 * 1024 * 1024, 50 * 1024 * 1024)
+BUCKET_NAME: typing.Final = "benchmark"
+
+
+@contextlib.contextmanager
+def run_s3_endpoint() -> typing.Iterator[str]:
+    # S3_ENDPOINT_URL points at a running S3, e.g. MinIO, otherwise moto serves one in a thread
+    if endpoint_url := os.environ.get("S3_ENDPOINT_URL"):
+        yield endpoint_url
+        return
+
+    from moto.server import ThreadedMotoServer  # noqa: PLC0415
+
+    moto_server: typing.Final = ThreadedMotoServer(port=0, verbose=False)
+    moto_server.start()
+    try:
+        host, port = moto_server.get_host_and_port()
+        yield f"http://{host}:{port}"
+    finally:
+        moto_server.stop()
+
+
+async def _consume_stream(s3_service: S3Service, s3_path: str) -> int:
+    return sum([len(one_chunk) async for one_chunk in s3_service.stream_file(s3_path=s3_path)])
+
+
+async def run_benchmarks() -> dict[str, typing.Any]:
+    results: typing.Final = []
+    s3_session: typing.Final = aioboto3.Session(
+        aws_access_key_id=os.environ.get("S3_ACCESS_KEY_ID", "benchmark"),
+        aws_secret_access_key=os.environ.get("S3_SECRET_ACCESS_KEY", "benchmark"),
+        region_name="us-east-1",
+    )
+    with run_s3_endpoint() as endpoint_url:
+        async with s3_session.client("s3", endpoint_url=endpoint_url) as s3_client:
+            with contextlib.suppress(s3_client.exceptions.BucketAlreadyOwnedByYou):
+                await s3_client.create_bucket(Bucket=BUCKET_NAME)
+            for s3_service_name, s3_service in (
+                ("single_request", S3Service(s3_client=s3_client)),
+                (
+                    "multipart_and_ranged",
+                    S3Service(
+                        s3_client=s3_client,
+                        multipart_threshold_bytes=8 * 1024 * 1024,
+                        ranged_download_part_size_bytes=8 * 1024 * 1024,
+                    ),
+                ),
+            ):
+                for file_size in FILE_SIZES_BYTES:
+                    validated_file = ValidatedFile(
+                        file_name="benchmark.bin",
+                        file_content=os.urandom(file_size),
+                        file_size=file_size,
+                        mime_type="application/octet-stream",
+                    )
+                    object_key = f"{s3_service_name}/{file_size}"
+                    s3_path = f"{BUCKET_NAME}/{object_key}"
+                    results.append(
+                        {
+                            "s3_service": s3_service_name,
+                            "file_size_bytes": file_size,
+                            "upload_file": await measure(
+                                functools.partial(
+                                    s3_service.upload_file,
+                                    validated_file,
+                                    bucket_name=BUCKET_NAME,
+                                    object_key=object_key,
+                                ),
+                                processed_bytes=file_size,
+                            ),
+                            "read_file": await measure(
+                                functools.partial(s3_service.read_file, s3_path=s3_path), processed_bytes=file_size
+                            ),
+                            "stream_file": await measure(
+                                functools.partial(_consume_stream, s3_service, s3_path), processed_bytes=file_size
+                            ),
+                        }
+                    )
+    return {"storage": results}
+
+
+if __name__ == "__main__":
+    sys.stdout.write(json.dumps(asyncio.run(run_benchmarks()), indent=2) + "\n")
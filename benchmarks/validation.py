@@ -0,0 +1,75 @@
+import asyncio
+import functools
+import json
+import os
+import sys
+import typing
+
+from benchmarks.measurement import measure
+from safe_s3_storage.file_validator import FileValidator
+from safe_s3_storage.image_conversion import ImageConversionFormat
+
+
+FILE_SIZES_BYTES: typing.Final = (100 * 1024, 10 * 1024 * 1024)
+IMAGE_RESOLUTIONS: typing.Final = ((640, 480), (1920, 1080), (4000, 3000))
+
+
+def generate_image(*, width: int, height: int, extension: str) -> bytes:
+    import pyvips  # type: ignore[import-untyped] # noqa: PLC0415
+
+    # noise doesn't compress, so encoded sizes are close to real photos
+    return typing.cast("bytes", pyvips.Image.gaussnoise(width, height).cast("uchar").write_to_buffer(f".{extension}"))
+
+
+async def benchmark_validate_files() -> list[dict[str, typing.Any]]:
+    file_validator: typing.Final = FileValidator(max_file_size_bytes=100 * 1024 * 1024)
+    results: typing.Final = []
+    for file_size in FILE_SIZES_BYTES:
+        file_content = b"%PDF-1.7\n" + os.urandom(file_size)
+        results.append(
+            {
+                "file_type": "pdf",
+                "file_size_bytes": len(file_content),
+                "validate_file": await measure(
+                    functools.partial(
+                        file_validator.validate_file, file_name="benchmark.pdf", file_content=file_content
+                    ),
+                    processed_bytes=len(file_content),
+                ),
+            }
+        )
+    return results
+
+
+async def benchmark_convert_images() -> list[dict[str, typing.Any]]:
+    results: typing.Final = []
+    for width, height in IMAGE_RESOLUTIONS:
+        for source_extension in ("jpg", "png"):
+            file_content = generate_image(width=width, height=height, extension=source_extension)
+            for image_conversion_format in ImageConversionFormat:
+                file_validator = FileValidator(image_conversion_format=image_conversion_format)
+                results.append(
+                    {
+                        "source_extension": source_extension,
+                        "target_format": image_conversion_format.name,
+                        "resolution": f"{width}x{height}",
+                        "file_size_bytes": len(file_content),
+                        "validate_file": await measure(
+                            functools.partial(
+                                file_validator.validate_file,
+                                file_name=f"benchmark.{source_extension}",
+                                file_content=file_content,
+                            ),
+                            processed_bytes=len(file_content),
+                        ),
+                    }
+                )
+    return results
+
+
+async def run_benchmarks() -> dict[str, typing.Any]:
+    return {"validate_file": await benchmark_validate_files(), "convert_image": await benchmark_convert_images()}
+
+
+if __name__ == "__main__":
+    sys.stdout.write(json.dumps(asyncio.run(run_benchmarks()), indent=2) + "\n")
@@ -1,15 +1,88 @@
 from safe_s3_storage import exceptions
-from safe_s3_storage.file_validator import FileValidator, ImageConversionFormat, ValidatedFile
-from safe_s3_storage.kaspersky_scan_engine import KasperskyScanEngineClient
-from safe_s3_storage.s3_service import S3Service, UploadedFile
+from safe_s3_storage.circuit_breaker import CircuitBreaker
+from safe_s3_storage.existing_object_cache import ExistingObjectCache
+from safe_s3_storage.file_content import FileContent, map_file_content
+from safe_s3_storage.file_read_cache import FileReadCache
+from safe_s3_storage.file_validator import (
+    FileValidationResult,
+    FileValidator,
+    ImageConversionFormat,
+    ValidatedFile,
+    ValidatedFileStream,
+    ValidatedImageRendition,
+    VerifiedFile,
+)
+from safe_s3_storage.image_conversion import (
+    ImageConversionPolicy,
+    ImageConversionPool,
+    ImageConversionStatistics,
+    ImageRendition,
+)
+from safe_s3_storage.instrumentation import OpenTelemetryStageRecorder, StageMeasurement, StageRecorder
+from safe_s3_storage.kaspersky_scan_engine import KasperskyScanEngineClient, ScanEngineFallbackPolicy
+from safe_s3_storage.mime_detection import MimeTypeDetector
+from safe_s3_storage.presigned_urls import PresignedUrlCache
+from safe_s3_storage.s3_service import (
+    CopiedFile,
+    FileCopyResult,
+    FileDeletionResult,
+    FileHeadResult,
+    S3Service,
+    UploadedFile,
+    UploadedStreamedFile,
+)
+from safe_s3_storage.scan_admission import ScanAdmissionController
+from safe_s3_storage.scan_engine_pool import LoadBalancingStrategy, ScanEngineEndpointPool
+from safe_s3_storage.scan_hedging import ScanHedgingPolicy
+from safe_s3_storage.scan_verdict_cache import InMemoryScanVerdictCache, ScanVerdictCache
+from safe_s3_storage.stored_file_verification import (
+    FileRescanProgressStore,
+    FileRescanResult,
+    RescanProgressStore,
+    StoredFileVerifier,
+)
 
 
 __all__ = [
+    "CircuitBreaker",
+    "CopiedFile",
+    "ExistingObjectCache",
+    "FileContent",
+    "FileCopyResult",
+    "FileDeletionResult",
+    "FileHeadResult",
+    "FileReadCache",
+    "FileRescanProgressStore",
+    "FileRescanResult",
+    "FileValidationResult",
     "FileValidator",
     "ImageConversionFormat",
+    "ImageConversionPolicy",
+    "ImageConversionPool",
+    "ImageConversionStatistics",
+    "ImageRendition",
+    "InMemoryScanVerdictCache",
     "KasperskyScanEngineClient",
+    "LoadBalancingStrategy",
+    "MimeTypeDetector",
+    "OpenTelemetryStageRecorder",
+    "PresignedUrlCache",
+    "RescanProgressStore",
     "S3Service",
+    "ScanAdmissionController",
+    "ScanEngineEndpointPool",
+    "ScanEngineFallbackPolicy",
+    "ScanHedgingPolicy",
+    "ScanVerdictCache",
+    "StageMeasurement",
+    "StageRecorder",
+    "StoredFileVerifier",
     "UploadedFile",
+    "UploadedStreamedFile",
     "ValidatedFile",
+    "ValidatedFileStream",
+    "ValidatedImageRendition",
+    "VerifiedFile",
     "exceptions",
+    "map_file_content",
 ]
@@ -0,0 +1,52 @@
+import dataclasses
+import enum
+import time
+import typing
+
+
+class CircuitBreakerState(str, enum.Enum):
+    closed = enum.auto()
+    open = enum.auto()
+    half_open = enum.auto()
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class CircuitBreaker:
+    failure_threshold: int = 5
+    recovery_timeout_seconds: float = 30
+    clock: typing.Callable[[], float] = time.monotonic
+    _consecutive_failures: int = dataclasses.field(default=0, init=False)
+    _opened_at: float | None = dataclasses.field(default=None, init=False)
+    _probe_in_flight: bool = dataclasses.field(default=False, init=False)
+
+    @property
+    def state(self) -> CircuitBreakerState:
+        if self._opened_at is None:
+            return CircuitBreakerState.closed
+        if self.clock() - self._opened_at < self.recovery_timeout_seconds:
+            return CircuitBreakerState.open
+        return CircuitBreakerState.half_open
+
+    def allows_request(self) -> bool:
+        current_state: typing.Final = self.state
+        if current_state == CircuitBreakerState.closed:
+            return True
+        if current_state == CircuitBreakerState.open or self._probe_in_flight:
+            return False
+        # half-open: let a single probe through, its outcome closes or reopens the circuit
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        if self._probe_in_flight or self._consecutive_failures >= self.failure_threshold:
+            self._opened_at = self.clock()
+        self._probe_in_flight = False
+
+    def record_cancellation(self) -> None:
+        self._probe_in_flight = False
@@ -17,6 +17,29 @@ class KasperskyScanEngineThreatDetectedError(BaseError):
 class KasperskyScanEngineConnectionStatusError(BaseError): ...
 
 
+@dataclasses.dataclass
+class KasperskyScanEngineUnavailableError(BaseError):
+    service_urls: list[str]
+
+
+@dataclasses.dataclass
+class KasperskyScanEngineNotScannedError(BaseError):
+    response: bytes
+    file_name: str
+
+
+@dataclasses.dataclass
+class TooManyQueuedScansError(BaseError):
+    queued_scans: int
+    max_queued_scans: int
+
+
+@dataclasses.dataclass
+class ScanQueueWaitTimeoutError(BaseError):
+    queue_wait_seconds: float
+    max_queue_wait_seconds: float
+
+
 @dataclasses.dataclass
 class NotAllowedMimeTypeError(BaseError):
     file_name: str
@@ -32,17 +55,50 @@ class TooLargeFileError(BaseError):
     max_size: int
 
 
+@dataclasses.dataclass
+class FileSizeMismatchError(BaseError):
+    file_name: str
+    expected_file_size: int
+    file_size: int
+
+
+@dataclasses.dataclass
+class TooLargeImageDimensionsError(BaseError):
+    file_name: str
+    image_width: int
+    image_height: int
+    max_pixels: int
+
+
+@dataclasses.dataclass
+class NotAnImageError(BaseError):
+    file_name: str
+    mime_type: str
+
+
 @dataclasses.dataclass
 class FailedToConvertImageError(BaseError):
     file_name: str
     mime_type: str
 
 
+@dataclasses.dataclass
+class TooManyPendingImageConversionsError(BaseError):
+    pending_conversions: int
+    max_pending_conversions: int
+
+
 @dataclasses.dataclass
 class InvalidS3PathError(BaseError):
     s3_path: str
 
 
+@dataclasses.dataclass
+class InvalidByteRangeError(BaseError):
+    offset: int
+    length: int | None
+
+
 @dataclasses.dataclass
 class FailedToReplaceS3BaseUrlWithProxyBaseUrlError(BaseError):
     s3_file_presigned_url: str
@@ -0,0 +1,40 @@
+import collections
+import dataclasses
+import time
+import typing
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class ExistingObjectCache:
+    # S3 paths of content-addressed objects known to exist, so repeated uploads of the same content skip the HEAD
+    max_entries: int = 100_000
+    # keep it below the lifetime of objects, e.g. the bucket expiration rules,
+    # stale entries skip uploads of deleted ones
+    ttl_seconds: float = 60 * 60  # 1 hour
+    clock: typing.Callable[[], float] = time.monotonic
+    _entries: collections.OrderedDict[str, float] = dataclasses.field(
+        default_factory=collections.OrderedDict, init=False
+    )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, s3_path: str) -> bool:
+        expires_at: typing.Final = self._entries.get(s3_path)
+        if expires_at is None:
+            return False
+        if expires_at <= self.clock():
+            del self._entries[s3_path]
+            return False
+
+        self._entries.move_to_end(s3_path)
+        return True
+
+    def add(self, s3_path: str) -> None:
+        self._entries[s3_path] = self.clock() + self.ttl_seconds
+        self._entries.move_to_end(s3_path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, s3_path: str) -> None:
+        self._entries.pop(s3_path, None)
@@ -0,0 +1,92 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import typing
+
+
+# anything exposing its bytes through the buffer protocol, passed along as memoryview slices without copying
+FileContent: typing.TypeAlias = bytes | bytearray | memoryview | mmap.mmap
+
+
+def view_content(file_content: FileContent) -> memoryview:
+    return memoryview(file_content).cast("B")
+
+
+def get_content_size(file_content: FileContent) -> int:
+    return len(file_content) if isinstance(file_content, bytes) else memoryview(file_content).nbytes
+
+
+def read_content_header(file_content: FileContent, size: int) -> bytes:
+    # bounded copy for libraries that accept bytes only
+    if isinstance(file_content, bytes):
+        return file_content[:size]
+    return bytes(view_content(file_content)[:size])
+
+
+class ContentReader(io.RawIOBase):
+    # seekable file object over a buffer, so botocore can send and checksum it without a bytes copy
+    def __init__(self, file_content: FileContent) -> None:
+        super().__init__()
+        self._content_view = view_content(file_content)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: typing.Any) -> int:  # noqa: ANN401
+        target_view: typing.Final = memoryview(buffer).cast("B")
+        chunk: typing.Final = self._content_view[self._position : self._position + target_view.nbytes]
+        target_view[: chunk.nbytes] = chunk
+        self._position += chunk.nbytes
+        return chunk.nbytes
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        elif whence == io.SEEK_END:
+            self._position = self._content_view.nbytes + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+def compute_content_sha256(file_content: FileContent) -> str:
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def make_request_body(file_content: FileContent) -> bytes | typing.IO[bytes]:
+    if isinstance(file_content, bytes):
+        return file_content
+    # RawIOBase isn't typed as IO[bytes], botocore only needs read, seek and tell
+    return typing.cast("typing.IO[bytes]", ContentReader(file_content))
+
+
+def map_file_content(file_object: typing.BinaryIO | tempfile.SpooledTemporaryFile[bytes]) -> FileContent:
+    # a read-only mmap of real files; in-memory files are at most the spool size, so they're copied into bytes:
+    # a buffer export would pin the caller's file, its close() and write() would raise BufferError
+    if isinstance(file_object, io.BytesIO):
+        return file_object.getvalue()
+    # fileno() of a spooled file rolls it over to disk, an in-memory one has no name
+    if isinstance(file_object, tempfile.SpooledTemporaryFile) and file_object.name is None:
+        file_object.seek(0)
+        return file_object.read()
+
+    try:
+        file_descriptor: typing.Final = file_object.fileno()
+    except (AttributeError, OSError):
+        file_object.seek(0)
+        return file_object.read()
+    # mmap can't map empty files
+    if os.fstat(file_descriptor).st_size == 0:
+        return b""
+    return mmap.mmap(file_descriptor, 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,133 @@
+import asyncio
+import collections
+import dataclasses
+import hashlib
+import pathlib
+import time
+import typing
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class CachedFile:
+    etag: str
+    file_content: bytes
+    validated_at: float
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class FileReadCache:
+    max_size_bytes: int = 64 * 1024 * 1024  # 64 MB
+    # larger files are read from S3 every time
+    max_file_size_bytes: int = 4 * 1024 * 1024  # 4 MB
+    # cached files are served without asking S3 for this long, then revalidated with If-None-Match,
+    # 0 revalidates every read, writes through S3Service invalidate them right away
+    max_age_seconds: float = 0
+    # None keeps files in memory only, otherwise files evicted from memory move to this directory
+    disk_directory: pathlib.Path | None = None
+    max_disk_size_bytes: int = 1024 * 1024 * 1024  # 1 GB
+    clock: typing.Callable[[], float] = time.monotonic
+    # bumped on every invalidation, reads started before it don't fill the cache
+    generation: int = dataclasses.field(default=0, init=False)
+    size_bytes: int = dataclasses.field(default=0, init=False)
+    disk_size_bytes: int = dataclasses.field(default=0, init=False)
+    _entries: collections.OrderedDict[str, CachedFile] = dataclasses.field(
+        default_factory=collections.OrderedDict, init=False
+    )
+    # etag, validated_at and size of files on disk, the index lives in memory so files of earlier runs are ignored
+    _disk_entries: collections.OrderedDict[str, tuple[str, float, int]] = dataclasses.field(
+        default_factory=collections.OrderedDict, init=False
+    )
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._disk_entries)
+
+    def is_fresh(self, cached_file: CachedFile) -> bool:
+        return self.clock() - cached_file.validated_at < self.max_age_seconds
+
+    def _build_disk_path(self, s3_path: str) -> pathlib.Path:
+        if self.disk_directory is None:
+            raise RuntimeError("FileReadCache has no disk_directory")
+        return self.disk_directory / hashlib.sha256(s3_path.encode()).hexdigest()
+
+    async def _remove_from_disk(self, s3_path: str) -> None:
+        disk_entry: typing.Final = self._disk_entries.pop(s3_path, None)
+        if disk_entry is None:
+            return
+        self.disk_size_bytes -= disk_entry[2]
+        await asyncio.to_thread(self._build_disk_path(s3_path).unlink, missing_ok=True)
+
+    async def _move_to_disk(self, s3_path: str, cached_file: CachedFile) -> None:
+        file_size: typing.Final = len(cached_file.file_content)
+        if self.disk_directory is None or file_size > self.max_disk_size_bytes:
+            return
+
+        generation: typing.Final = self.generation
+        disk_path: typing.Final = self._build_disk_path(s3_path)
+        await asyncio.to_thread(self.disk_directory.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(disk_path.write_bytes, cached_file.file_content)
+        # invalidated while the file was written
+        if generation != self.generation:
+            await asyncio.to_thread(disk_path.unlink, missing_ok=True)
+            return
+
+        self._disk_entries[s3_path] = (cached_file.etag, cached_file.validated_at, file_size)
+        self.disk_size_bytes += file_size
+        while self.disk_size_bytes > self.max_disk_size_bytes:
+            await self._remove_from_disk(next(iter(self._disk_entries)))
+
+    async def _load_from_disk(self, s3_path: str) -> CachedFile | None:
+        disk_entry: typing.Final = self._disk_entries.get(s3_path)
+        if disk_entry is None:
+            return None
+
+        etag, validated_at, _file_size = disk_entry
+        try:
+            file_content: typing.Final = await asyncio.to_thread(self._build_disk_path(s3_path).read_bytes)
+        except FileNotFoundError:
+            return None
+        # invalidated or replaced while the file was read
+        if self._disk_entries.get(s3_path) != disk_entry:
+            return None
+
+        await self._remove_from_disk(s3_path)
+        cached_file: typing.Final = CachedFile(etag=etag, file_content=file_content, validated_at=validated_at)
+        await self._store(s3_path, cached_file)
+        return cached_file
+
+    async def _store(self, s3_path: str, cached_file: CachedFile) -> None:
+        self._discard_from_memory(s3_path)
+        self._entries[s3_path] = cached_file
+        self.size_bytes += len(cached_file.file_content)
+        while self.size_bytes > self.max_size_bytes:
+            evicted_s3_path, evicted_file = self._entries.popitem(last=False)
+            self.size_bytes -= len(evicted_file.file_content)
+            await self._move_to_disk(evicted_s3_path, evicted_file)
+
+    def _discard_from_memory(self, s3_path: str) -> None:
+        if (cached_file := self._entries.pop(s3_path, None)) is not None:
+            self.size_bytes -= len(cached_file.file_content)
+
+    async def get(self, s3_path: str) -> CachedFile | None:
+        if (cached_file := self._entries.get(s3_path)) is not None:
+            self._entries.move_to_end(s3_path)
+            return cached_file
+        return await self._load_from_disk(s3_path)
+
+    async def set(self, s3_path: str, *, etag: str, file_content: bytes, generation: int) -> None:
+        # generation is the one read before the GET was sent
+        if generation != self.generation or len(file_content) > min(self.max_file_size_bytes, self.max_size_bytes):
+            return
+        await self._remove_from_disk(s3_path)
+        await self._store(s3_path, CachedFile(etag=etag, file_content=file_content, validated_at=self.clock()))
+
+    def mark_validated(self, s3_path: str) -> None:
+        if (cached_file := self._entries.get(s3_path)) is not None:
+            self._entries[s3_path] = dataclasses.replace(cached_file, validated_at=self.clock())
+
+    async def discard(self, s3_path: str) -> None:
+        self._discard_from_memory(s3_path)
+        await self._remove_from_disk(s3_path)
+
+    async def invalidate(self, s3_path: str) -> None:
+        self.generation += 1
+        await self.discard(s3_path)
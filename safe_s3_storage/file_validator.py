@@ -1,34 +1,179 @@
+import asyncio
+import contextlib
 import dataclasses
-import enum
+import hashlib
+import mmap
+import pathlib
+import tempfile
+import time
 import typing
 
-import magic
-
 from safe_s3_storage import exceptions
+from safe_s3_storage.file_content import (
+    FileContent,
+    compute_content_sha256,
+    get_content_size,
+    map_file_content,
+    view_content,
+)
+from safe_s3_storage.image_conversion import (
+    IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP,
+    ImageConversionFormat,
+    ImageConversionPolicy,
+    ImageConversionPool,
+    ImageConversionStatistics,
+    ImageRendition,
+    convert_image_content,
+    convert_image_renditions,
+)
+from safe_s3_storage.image_dimensions import read_image_dimensions
+from safe_s3_storage.instrumentation import StageRecorder, measure_stage
 from safe_s3_storage.kaspersky_scan_engine import KasperskyScanEngineClient
+from safe_s3_storage.mime_detection import MimeTypeDetector
 
 
 @dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
 class ValidatedFile:
     file_name: str
-    file_content: bytes
+    file_content: FileContent
     file_size: int
     mime_type: str
+    # hex SHA-256 of file_content as stored, set when FileValidator.compute_content_digest is on
+    content_sha256: str | None = None
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class ValidatedImageRendition(ValidatedFile):
+    rendition_name: str
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class ValidatedFileStream:
+    file_name: str
+    mime_type: str
+    file_stream: typing.AsyncIterator[bytes]
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class VerifiedFile:
+    file_name: str
+    file_size: int
+    mime_type: str
+    # hex SHA-256 of the streamed content
+    content_sha256: str
+
+
+_MIME_TYPE_SNIFF_SIZE_BYTES: typing.Final = 8 * 1024
+_CONTENT_STREAM_CHUNK_SIZE_BYTES: typing.Final = 1024 * 1024
+# chunks read ahead of a streamed scan, bounds memory while the caller and the scan engine read at different speeds
+_STREAM_SCAN_QUEUE_SIZE: typing.Final = 4
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class FileValidationResult:
+    index: int
+    file_name: str
+    validated_file: ValidatedFile | None = None
+    error: Exception | None = None
+
+
+_T = typing.TypeVar("_T")
+
+
+async def _iterate_async(items: typing.Iterable[_T] | typing.AsyncIterable[_T]) -> typing.AsyncIterator[_T]:
+    if isinstance(items, typing.AsyncIterable):
+        async for one_item in items:
+            yield one_item
+    else:
+        for one_item in items:
+            yield one_item
 
 
 def _is_image(mime_type: str) -> bool:
     return mime_type.startswith("image/")
 
 
-class ImageConversionFormat(str, enum.Enum):
-    jpeg = enum.auto()
-    webp = enum.auto()
+async def _iterate_over_content(file_content: FileContent) -> typing.AsyncIterator[bytes]:
+    if isinstance(file_content, bytes):
+        yield file_content
+        return
 
+    try:
+        with view_content(file_content) as file_content_view:
+            for chunk_start in range(0, len(file_content_view), _CONTENT_STREAM_CHUNK_SIZE_BYTES):
+                yield bytes(file_content_view[chunk_start : chunk_start + _CONTENT_STREAM_CHUNK_SIZE_BYTES])
+    finally:
+        if isinstance(file_content, mmap.mmap):
+            # still exported elsewhere, garbage collection closes it then
+            with contextlib.suppress(BufferError):
+                file_content.close()
 
-_IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP: typing.Final = {
-    ImageConversionFormat.jpeg: ("image/jpeg", "jpg"),
-    ImageConversionFormat.webp: ("image/webp", "webp"),
-}
+
+@contextlib.asynccontextmanager
+async def _spool_stream(
+    file_stream: typing.AsyncIterator[bytes], *, spool_max_size: int
+) -> typing.AsyncIterator[tuple[FileContent, pathlib.Path | None]]:
+    # small files stay in memory, larger ones spill to a temp file that exists until the context exits,
+    # the scan reads it through mmap and pyvips opens it by path, 0 spills every non-empty file
+    memory_buffer: typing.Final = bytearray()
+    async for one_chunk in file_stream:
+        memory_buffer.extend(one_chunk)
+        if len(memory_buffer) > spool_max_size:
+            break
+    else:
+        yield bytes(memory_buffer), None
+        return
+
+    # disk writes go to a thread, so a slow disk doesn't stall the event loop
+    spill_file: typing.Final = await asyncio.to_thread(tempfile.NamedTemporaryFile)
+    try:
+        await asyncio.to_thread(spill_file.write, memory_buffer)
+        memory_buffer.clear()
+        async for one_chunk in file_stream:
+            await asyncio.to_thread(spill_file.write, one_chunk)
+        await asyncio.to_thread(spill_file.flush)
+        # the mmap keeps its own file descriptor, so it outlives the temp file
+        yield mmap.mmap(spill_file.fileno(), 0, access=mmap.ACCESS_READ), pathlib.Path(spill_file.name)
+    finally:
+        await asyncio.to_thread(spill_file.close)
+
+
+class _HashedFileStream:
+    # hashes chunks as they pass and insists on exactly file_size bytes,
+    # a plain iterator rather than a generator, so a consumer closing it early doesn't stop the hashing
+    def __init__(
+        self, *, file_name: str, file_header: bytes, file_iterator: typing.AsyncIterator[bytes], file_size: int
+    ) -> None:
+        self.content_digest = hashlib.sha256()
+        self.consumed_size = 0
+        self._file_name = file_name
+        self._pending_header = file_header
+        self._file_iterator = file_iterator
+        self._file_size = file_size
+
+    def __aiter__(self) -> "_HashedFileStream":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._pending_header:
+            chunk, self._pending_header = self._pending_header, b""
+        else:
+            try:
+                chunk = await anext(self._file_iterator)
+            except StopAsyncIteration:
+                if self.consumed_size != self._file_size:
+                    raise exceptions.FileSizeMismatchError(
+                        file_name=self._file_name, expected_file_size=self._file_size, file_size=self.consumed_size
+                    ) from None
+                raise
+
+        self.consumed_size += len(chunk)
+        if self.consumed_size > self._file_size:
+            raise exceptions.FileSizeMismatchError(
+                file_name=self._file_name, expected_file_size=self._file_size, file_size=self.consumed_size
+            )
+        self.content_digest.update(chunk)
+        return chunk
 
 
 def _split_file_base_name_and_extensions(file_name: str) -> tuple[str, str | None]:
@@ -43,12 +188,29 @@ class FileValidator:
     scan_images_with_antivirus: bool = True
     max_file_size_bytes: int = 10 * 1024 * 1024  # 10 MB
     max_image_size_bytes: int = 50 * 1024 * 1024  # 50 MB
+    # width * height read from the image header, guards pyvips against decompression bombs
+    max_image_pixels: int | None = None
     image_conversion_format: ImageConversionFormat = ImageConversionFormat.webp
     image_quality: int = 85
     excluded_conversion_formats: list[str] | None = None
+    image_conversion_pool: ImageConversionPool = dataclasses.field(default_factory=ImageConversionPool)
+    image_conversion_policy: ImageConversionPolicy = dataclasses.field(default_factory=ImageConversionPolicy)
+    # updated by validate_file, validate_stream and validate_many, use it to tune image_conversion_policy
+    image_conversion_statistics: ImageConversionStatistics = dataclasses.field(
+        default_factory=ImageConversionStatistics
+    )
+    mime_type_detector: MimeTypeDetector = dataclasses.field(default_factory=MimeTypeDetector)
+    # None disables instrumentation
+    stage_recorder: StageRecorder | None = None
+    # validate_stream keeps files up to this size in memory for conversion and scanning, larger ones go to disk
+    stream_spool_max_size_bytes: int = 1024 * 1024  # 1 MB
+    # digest of the stored content for content-addressed uploads, see S3Service.upload_file_by_content
+    compute_content_digest: bool = False
 
-    def _validate_mime_type(self, *, file_name: str, file_content: bytes) -> str:
-        mime_type: typing.Final = magic.from_buffer(file_content, mime=True)
+    def _validate_mime_type(self, *, file_name: str, file_content: FileContent) -> str:
+        with measure_stage(self.stage_recorder, "detect_mime_type") as stage_timer:
+            mime_type: typing.Final = self.mime_type_detector.detect_mime_type(file_content)
+            stage_timer.set_attributes(mime_type=mime_type)
         if self.allowed_mime_types is None or mime_type in self.allowed_mime_types:
             return mime_type
 
@@ -56,14 +218,38 @@ class FileValidator:
             file_name=file_name, mime_type=mime_type, allowed_mime_types=self.allowed_mime_types
         )
 
-    def _validate_file_size(self, *, file_name: str, file_content: bytes, mime_type: str) -> int:
-        content_size: typing.Final = len(file_content)
-        max_size: typing.Final = self.max_image_size_bytes if _is_image(mime_type) else self.max_file_size_bytes
-        if content_size > max_size:
+    def _get_max_file_size(self, mime_type: str) -> int:
+        return self.max_image_size_bytes if _is_image(mime_type) else self.max_file_size_bytes
+
+    def _validate_file_size(self, *, file_name: str, file_size: int, mime_type: str) -> None:
+        max_size: typing.Final = self._get_max_file_size(mime_type)
+        if file_size > max_size:
             raise exceptions.TooLargeFileError(
-                file_name=file_name, file_size=content_size, mime_type=mime_type, max_size=max_size
+                file_name=file_name, file_size=file_size, mime_type=mime_type, max_size=max_size
+            )
+
+    def _validate_image_dimensions(self, *, file_name: str, file_header: FileContent, mime_type: str) -> None:
+        if self.max_image_pixels is None or not _is_image(mime_type):
+            return
+
+        image_dimensions: typing.Final = read_image_dimensions(file_header)
+        if image_dimensions is None:
+            return
+
+        image_width, image_height = image_dimensions
+        if image_width * image_height > self.max_image_pixels:
+            raise exceptions.TooLargeImageDimensionsError(
+                file_name=file_name,
+                image_width=image_width,
+                image_height=image_height,
+                max_pixels=self.max_image_pixels,
             )
-        return content_size
+
+    def prevalidate(self, *, file_name: str, file_header: FileContent, file_size: int) -> str:
+        mime_type: typing.Final = self._validate_mime_type(file_name=file_name, file_content=file_header)
+        self._validate_file_size(file_name=file_name, file_size=file_size, mime_type=mime_type)
+        self._validate_image_dimensions(file_name=file_name, file_header=file_header, mime_type=mime_type)
+        return mime_type
 
     def _should_convert_file(self, file_name: str) -> bool:
         if not self.excluded_conversion_formats:
@@ -72,32 +258,76 @@ class FileValidator:
         _, extension = _split_file_base_name_and_extensions(file_name=file_name)
         return extension not in self.excluded_conversion_formats
 
-    def _convert_image(self, validated_file: ValidatedFile) -> ValidatedFile:
-        import pyvips  # type: ignore[import-untyped] # noqa: PLC0415
+    def _should_scan_file(self, mime_type: str) -> bool:
+        if not self.kaspersky_scan_engine:
+            return False
+        return self.scan_images_with_antivirus or not _is_image(mime_type)
+
+    def _prepare_conversion_input(self, file_content: FileContent | pathlib.Path) -> FileContent | pathlib.Path:
+        if self.image_conversion_pool.runs_in_processes and not isinstance(file_content, bytes | pathlib.Path):
+            return bytes(file_content)
+        return file_content
 
+    async def _convert_image(
+        self, validated_file: ValidatedFile, spilled_file_path: pathlib.Path | None = None
+    ) -> ValidatedFile:
         if not _is_image(validated_file.mime_type):
             return validated_file
 
         if not self._should_convert_file(validated_file.file_name):
             return validated_file
 
-        target_mime_type, target_extension = _IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP[
+        with measure_stage(self.stage_recorder, "convert_image") as stage_timer:
+            stage_timer.set_attributes(mime_type=validated_file.mime_type, original_size_bytes=validated_file.file_size)
+            converted_file: typing.Final = await self._convert_image_with_policy(validated_file, spilled_file_path)
+            stage_timer.set_attributes(
+                converted=converted_file is not validated_file, stored_size_bytes=converted_file.file_size
+            )
+            return converted_file
+
+    async def _convert_image_with_policy(
+        self, validated_file: ValidatedFile, spilled_file_path: pathlib.Path | None
+    ) -> ValidatedFile:
+        import pyvips  # type: ignore[import-untyped] # noqa: PLC0415
+
+        target_mime_type, target_extension = IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP[
             self.image_conversion_format
         ]
+        statistics: typing.Final = self.image_conversion_statistics
+        if validated_file.mime_type == target_mime_type and self.image_conversion_policy.should_keep_target_format(
+            validated_file.file_size
+        ):
+            statistics.skipped_images += 1
+            statistics.original_bytes += validated_file.file_size
+            statistics.stored_bytes += validated_file.file_size
+            return validated_file
 
+        started_at: typing.Final = time.perf_counter()
         try:
-            pyvips_image: typing.Final[pyvips.Image] = pyvips.Image.new_from_buffer(
-                validated_file.file_content, options=""
-            )
-            new_file_content: typing.Final = typing.cast(
-                "bytes",
-                pyvips_image.write_to_buffer(f".{target_extension}", Q=self.image_quality),
+            new_file_content: typing.Final = await self.image_conversion_pool.run(
+                convert_image_content,
+                # the spilled file of validate_stream is decoded from disk instead of through its mmap
+                self._prepare_conversion_input(spilled_file_path or validated_file.file_content),
+                target_extension=target_extension,
+                quality=self.image_quality,
             )
         except pyvips.Error as pyvips_error:
             raise exceptions.FailedToConvertImageError(
                 file_name=validated_file.file_name, mime_type=validated_file.mime_type
             ) from pyvips_error
+        finally:
+            statistics.conversion_seconds += time.perf_counter() - started_at
 
+        statistics.converted_images += 1
+        statistics.original_bytes += validated_file.file_size
+        if self.image_conversion_policy.should_keep_original(
+            original_size=validated_file.file_size, converted_size=len(new_file_content)
+        ):
+            statistics.kept_originals += 1
+            statistics.stored_bytes += validated_file.file_size
+            return validated_file
+
+        statistics.stored_bytes += len(new_file_content)
         file_base_name, _file_extension = _split_file_base_name_and_extensions(validated_file.file_name)
         return ValidatedFile(
             file_name=f"{file_base_name}.{target_extension}",
@@ -106,18 +336,301 @@ class FileValidator:
             mime_type=target_mime_type,
         )
 
-    async def validate_file(self, *, file_name: str, file_content: bytes) -> ValidatedFile:
-        mime_type: typing.Final = self._validate_mime_type(file_name=file_name, file_content=file_content)
-        file_size: typing.Final = self._validate_file_size(
-            file_name=file_name, file_content=file_content, mime_type=mime_type
+    def _validate_mime_type_and_size(self, *, file_name: str, file_content: FileContent) -> ValidatedFile:
+        file_size: typing.Final = get_content_size(file_content)
+        mime_type: typing.Final = self.prevalidate(file_name=file_name, file_header=file_content, file_size=file_size)
+        return ValidatedFile(file_name=file_name, file_content=file_content, mime_type=mime_type, file_size=file_size)
+
+    def _add_content_digest(self, validated_file: ValidatedFile) -> ValidatedFile:
+        if not self.compute_content_digest:
+            return validated_file
+        return dataclasses.replace(validated_file, content_sha256=compute_content_sha256(validated_file.file_content))
+
+    async def _scan_file(self, validated_file: ValidatedFile, admission_key: str | None = None) -> None:
+        if self.kaspersky_scan_engine and self._should_scan_file(validated_file.mime_type):
+            await self.kaspersky_scan_engine.scan_memory(
+                file_name=validated_file.file_name,
+                file_content=validated_file.file_content,
+                admission_key=admission_key,
+            )
+
+    async def _validate_file(
+        self,
+        *,
+        file_name: str,
+        file_content: FileContent,
+        admission_key: str | None,
+        spilled_file_path: pathlib.Path | None = None,
+    ) -> ValidatedFile:
+        with measure_stage(self.stage_recorder, "validate_file") as stage_timer:
+            stage_timer.set_attributes(original_size_bytes=get_content_size(file_content))
+            validated_file: typing.Final = await self._convert_image(
+                self._validate_mime_type_and_size(file_name=file_name, file_content=file_content), spilled_file_path
+            )
+            await self._scan_file(validated_file, admission_key)
+            stage_timer.set_attributes(mime_type=validated_file.mime_type, stored_size_bytes=validated_file.file_size)
+            return self._add_content_digest(validated_file)
+
+    async def validate_file(
+        self, *, file_name: str, file_content: FileContent, admission_key: str | None = None
+    ) -> ValidatedFile:
+        return await self._validate_file(file_name=file_name, file_content=file_content, admission_key=admission_key)
+
+    async def validate_file_object(
+        self,
+        *,
+        file_name: str,
+        file_object: typing.BinaryIO | tempfile.SpooledTemporaryFile[bytes],
+        admission_key: str | None = None,
+    ) -> ValidatedFile:
+        # spooled and temp files are mapped instead of read, see map_file_content
+        return await self.validate_file(
+            file_name=file_name, file_content=map_file_content(file_object), admission_key=admission_key
         )
-        validated_file: typing.Final = self._convert_image(
-            ValidatedFile(file_name=file_name, file_content=file_content, mime_type=mime_type, file_size=file_size)
+
+    async def validate_image_renditions(
+        self, *, file_name: str, file_content: FileContent, renditions: typing.Sequence[ImageRendition]
+    ) -> list[ValidatedImageRendition]:
+        import pyvips  # type: ignore[import-untyped] # noqa: PLC0415
+
+        validated_file: typing.Final = self._validate_mime_type_and_size(file_name=file_name, file_content=file_content)
+        if not _is_image(validated_file.mime_type):
+            raise exceptions.NotAnImageError(file_name=file_name, mime_type=validated_file.mime_type)
+
+        try:
+            rendition_contents: typing.Final = await self.image_conversion_pool.run(
+                convert_image_renditions, self._prepare_conversion_input(file_content), renditions=renditions
+            )
+        except pyvips.Error as pyvips_error:
+            raise exceptions.FailedToConvertImageError(
+                file_name=file_name, mime_type=validated_file.mime_type
+            ) from pyvips_error
+
+        file_base_name, _file_extension = _split_file_base_name_and_extensions(file_name)
+        validated_renditions: typing.Final[list[ValidatedImageRendition]] = []
+        for one_rendition, rendition_content in zip(renditions, rendition_contents, strict=True):
+            target_mime_type, target_extension = IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP[
+                one_rendition.image_conversion_format
+            ]
+            validated_renditions.append(
+                ValidatedImageRendition(
+                    file_name=f"{file_base_name}_{one_rendition.name}.{target_extension}",
+                    file_content=rendition_content,
+                    file_size=len(rendition_content),
+                    mime_type=target_mime_type,
+                    content_sha256=compute_content_sha256(rendition_content) if self.compute_content_digest else None,
+                    rendition_name=one_rendition.name,
+                )
+            )
+        await asyncio.gather(*(self._scan_file(one_rendition) for one_rendition in validated_renditions))
+        return validated_renditions
+
+    async def _validate_one_of_many(
+        self, *, index: int, file_name: str, file_content: FileContent, scan_semaphore: asyncio.Semaphore
+    ) -> FileValidationResult:
+        try:
+            validated_file: typing.Final = await self._convert_image(
+                self._validate_mime_type_and_size(file_name=file_name, file_content=file_content)
+            )
+            async with scan_semaphore:
+                await self._scan_file(validated_file)
+        except Exception as exc:  # noqa: BLE001
+            return FileValidationResult(index=index, file_name=file_name, error=exc)
+        return FileValidationResult(
+            index=index, file_name=file_name, validated_file=self._add_content_digest(validated_file)
         )
-        if self.kaspersky_scan_engine:
-            is_image: typing.Final = _is_image(validated_file.mime_type)
-            if (is_image and self.scan_images_with_antivirus) or not is_image:
-                await self.kaspersky_scan_engine.scan_memory(
-                    file_name=validated_file.file_name, file_content=validated_file.file_content
+
+    async def validate_many(
+        self,
+        files: typing.Iterable[tuple[str, FileContent]] | typing.AsyncIterable[tuple[str, FileContent]],
+        *,
+        max_concurrent_files: int = 32,
+        max_concurrent_scans: int = 8,
+    ) -> typing.AsyncIterator[FileValidationResult]:
+        scan_semaphore: typing.Final = asyncio.Semaphore(max_concurrent_scans)
+        pending_validations: set[asyncio.Task[FileValidationResult]] = set()
+        try:
+            index = 0
+            async for file_name, file_content in _iterate_async(files):
+                if len(pending_validations) >= max_concurrent_files:
+                    done_validations, pending_validations = await asyncio.wait(
+                        pending_validations, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for one_validation in done_validations:
+                        yield one_validation.result()
+                pending_validations.add(
+                    asyncio.create_task(
+                        self._validate_one_of_many(
+                            index=index, file_name=file_name, file_content=file_content, scan_semaphore=scan_semaphore
+                        )
+                    )
                 )
-        return validated_file
+                index += 1
+            for one_completed_validation in asyncio.as_completed(pending_validations):
+                yield await one_completed_validation
+        finally:
+            for one_validation in pending_validations:
+                one_validation.cancel()
+
+    async def _iterate_with_size_limit(
+        self, *, file_name: str, mime_type: str, file_header: bytes, file_iterator: typing.AsyncIterator[bytes]
+    ) -> typing.AsyncIterator[bytes]:
+        max_size: typing.Final = self._get_max_file_size(mime_type)
+        if file_header:
+            yield file_header
+        file_size = len(file_header)
+        async for one_chunk in file_iterator:
+            file_size += len(one_chunk)
+            if file_size > max_size:
+                raise exceptions.TooLargeFileError(
+                    file_name=file_name, file_size=file_size, mime_type=mime_type, max_size=max_size
+                )
+            yield one_chunk
+
+    async def _iterate_with_stream_scan(
+        self,
+        kaspersky_scan_engine: KasperskyScanEngineClient,
+        *,
+        file_name: str,
+        file_stream: typing.AsyncIterable[bytes],
+        file_size: int,
+        admission_key: str | None,
+    ) -> typing.AsyncIterator[bytes]:
+        # chunks go to the caller and the scan engine at once, the verdict comes with the end of the stream:
+        # it raises instead of ending, so S3Service.upload_file_stream never completes an infected upload
+        scan_queue: typing.Final[asyncio.Queue[bytes | None]] = asyncio.Queue(maxsize=_STREAM_SCAN_QUEUE_SIZE)
+
+        async def iterate_scan_queue() -> typing.AsyncIterator[bytes]:
+            while (one_chunk := await scan_queue.get()) is not None:
+                yield one_chunk
+
+        async def feed_scan(one_chunk: bytes | None) -> None:
+            # a scan that ended early, e.g. skipped by ScanEngineFallbackPolicy, doesn't read the queue anymore
+            if scan_task.done():
+                return
+            queue_put: typing.Final = asyncio.ensure_future(scan_queue.put(one_chunk))
+            await asyncio.wait({queue_put, scan_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not queue_put.done():
+                queue_put.cancel()
+            if scan_task.done():
+                scan_task.result()
+
+        scan_task: typing.Final = asyncio.create_task(
+            kaspersky_scan_engine.scan_stream(
+                file_name=file_name, file_stream=iterate_scan_queue(), file_size=file_size, admission_key=admission_key
+            )
+        )
+        try:
+            async for one_chunk in file_stream:
+                await feed_scan(one_chunk)
+                yield one_chunk
+            await feed_scan(None)
+            await scan_task
+        finally:
+            if not scan_task.done():
+                scan_task.cancel()
+            await asyncio.gather(scan_task, return_exceptions=True)
+
+    async def validate_stream(
+        self,
+        *,
+        file_name: str,
+        file_stream: typing.AsyncIterable[bytes],
+        file_size: int | None = None,
+        admission_key: str | None = None,
+    ) -> ValidatedFileStream:
+        file_iterator: typing.Final = aiter(file_stream)
+        file_header_buffer: typing.Final = bytearray()
+        async for one_chunk in file_iterator:
+            file_header_buffer.extend(one_chunk)
+            if len(file_header_buffer) >= _MIME_TYPE_SNIFF_SIZE_BYTES:
+                break
+
+        file_header: typing.Final = bytes(file_header_buffer)
+        # a declared size, e.g. Content-Length, rejects oversized files before the rest of the stream is read
+        mime_type: typing.Final = self.prevalidate(
+            file_name=file_name, file_header=file_header, file_size=max(file_size or 0, len(file_header))
+        )
+        limited_file_stream: typing.Final = self._iterate_with_size_limit(
+            file_name=file_name, mime_type=mime_type, file_header=file_header, file_iterator=file_iterator
+        )
+        needs_conversion: typing.Final = _is_image(mime_type) and self._should_convert_file(file_name)
+        if not needs_conversion and not self._should_scan_file(mime_type):
+            return ValidatedFileStream(file_name=file_name, mime_type=mime_type, file_stream=limited_file_stream)
+        if not needs_conversion and file_size is not None and self.kaspersky_scan_engine:
+            return ValidatedFileStream(
+                file_name=file_name,
+                mime_type=mime_type,
+                file_stream=self._iterate_with_stream_scan(
+                    self.kaspersky_scan_engine,
+                    file_name=file_name,
+                    file_stream=_HashedFileStream(
+                        file_name=file_name, file_header=b"", file_iterator=limited_file_stream, file_size=file_size
+                    ),
+                    file_size=file_size,
+                    admission_key=admission_key,
+                ),
+            )
+
+        # Conversion needs the whole file, and so does a scan without a declared size,
+        # the size limit still aborts the read early
+        async with _spool_stream(limited_file_stream, spool_max_size=self.stream_spool_max_size_bytes) as (
+            file_content,
+            spilled_file_path,
+        ):
+            validated_file: typing.Final = await self._validate_file(
+                file_name=file_name,
+                file_content=file_content,
+                admission_key=admission_key,
+                spilled_file_path=spilled_file_path,
+            )
+        return ValidatedFileStream(
+            file_name=validated_file.file_name,
+            mime_type=validated_file.mime_type,
+            file_stream=_iterate_over_content(validated_file.file_content),
+        )
+
+    async def verify_stream(
+        self,
+        *,
+        file_name: str,
+        file_stream: typing.AsyncIterable[bytes],
+        file_size: int,
+        admission_key: str | None = None,
+    ) -> VerifiedFile:
+        # re-checks a stored file in one pass: MIME type and size from the header, then hashing and scanning
+        # while the rest streams through, nothing is converted and the file is never held in memory
+        with measure_stage(self.stage_recorder, "verify_stream") as stage_timer:
+            stage_timer.set_attributes(file_size_bytes=file_size)
+            file_iterator: typing.Final = aiter(file_stream)
+            file_header_buffer: typing.Final = bytearray()
+            async for one_chunk in file_iterator:
+                file_header_buffer.extend(one_chunk)
+                if len(file_header_buffer) >= _MIME_TYPE_SNIFF_SIZE_BYTES:
+                    break
+
+            file_header: typing.Final = bytes(file_header_buffer)
+            mime_type: typing.Final = self.prevalidate(
+                file_name=file_name, file_header=file_header, file_size=file_size
+            )
+            hashed_file_stream: typing.Final = _HashedFileStream(
+                file_name=file_name, file_header=file_header, file_iterator=file_iterator, file_size=file_size
+            )
+            if self.kaspersky_scan_engine and self._should_scan_file(mime_type):
+                await self.kaspersky_scan_engine.scan_stream(
+                    file_name=file_name,
+                    file_stream=hashed_file_stream,
+                    file_size=file_size,
+                    admission_key=admission_key,
+                )
+            # whatever the scan didn't read, e.g. when it was skipped, still has to be hashed
+            async for _ in hashed_file_stream:
+                pass
+
+            stage_timer.set_attributes(mime_type=mime_type)
+            return VerifiedFile(
+                file_name=file_name,
+                file_size=file_size,
+                mime_type=mime_type,
+                content_sha256=hashed_file_stream.content_digest.hexdigest(),
+            )
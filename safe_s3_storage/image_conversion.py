@@ -0,0 +1,168 @@
+import asyncio
+import concurrent.futures
+import dataclasses
+import enum
+import functools
+import os
+import pathlib
+import typing
+
+from safe_s3_storage.exceptions import TooManyPendingImageConversionsError
+from safe_s3_storage.file_content import FileContent
+
+
+class ImageConversionFormat(str, enum.Enum):
+    jpeg = enum.auto()
+    webp = enum.auto()
+
+
+IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP: typing.Final = {
+    ImageConversionFormat.jpeg: ("image/jpeg", "jpg"),
+    ImageConversionFormat.webp: ("image/webp", "webp"),
+}
+# pyvips thumbnails need both bounds, this one never limits anything
+_UNBOUNDED_IMAGE_SIZE: typing.Final = 10_000_000
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class ImageRendition:
+    name: str
+    # None keeps the original width or height, the aspect ratio is kept and images are never upscaled
+    max_width: int | None = None
+    max_height: int | None = None
+    image_conversion_format: ImageConversionFormat = ImageConversionFormat.webp
+    quality: int = 85
+
+    @property
+    def is_resized(self) -> bool:
+        return self.max_width is not None or self.max_height is not None
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class ImageConversionPolicy:
+    # images already in the target format are stored as they are up to this size, None converts them anyway
+    keep_target_format_max_size_bytes: int | None = None
+    # the original is kept unless conversion shrinks it by this share, e.g. 0.1 for 10%, None keeps any conversion
+    min_size_reduction_ratio: float | None = None
+
+    def should_keep_target_format(self, file_size: int) -> bool:
+        if self.keep_target_format_max_size_bytes is None:
+            return False
+        return file_size <= self.keep_target_format_max_size_bytes
+
+    def should_keep_original(self, *, original_size: int, converted_size: int) -> bool:
+        if self.min_size_reduction_ratio is None:
+            return False
+        return converted_size > original_size * (1 - self.min_size_reduction_ratio)
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class ImageConversionStatistics:
+    converted_images: int = 0
+    # skipped because the image already was in the target format
+    skipped_images: int = 0
+    # converted, but the original was kept because conversion didn't shrink it enough
+    kept_originals: int = 0
+    original_bytes: int = 0
+    stored_bytes: int = 0
+    # includes waiting for a free slot in the conversion pool
+    conversion_seconds: float = 0.0
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.stored_bytes
+
+
+def _open_content_source(file_content: FileContent) -> typing.Any:  # noqa: ANN401
+    import pyvips  # type: ignore[import-untyped] # noqa: PLC0415
+
+    # new_from_buffer and thumbnail_buffer take bytes only, a memory source reads any buffer without copying it
+    return pyvips.Source.new_from_memory(file_content)
+
+
+def convert_image_content(file_content: FileContent | pathlib.Path, *, target_extension: str, quality: int) -> bytes:
+    import pyvips  # type: ignore[import-untyped] # noqa: PLC0415
+
+    # the image is written once, so sequential access lets libvips stream it instead of decoding it whole
+    pyvips_image: typing.Final[pyvips.Image] = (
+        pyvips.Image.new_from_file(str(file_content), access="sequential")
+        if isinstance(file_content, pathlib.Path)
+        else pyvips.Image.new_from_source(_open_content_source(file_content), "", access="sequential")
+    )
+    return typing.cast("bytes", pyvips_image.write_to_buffer(f".{target_extension}", Q=quality))
+
+
+def convert_image_renditions(file_content: FileContent, *, renditions: typing.Sequence[ImageRendition]) -> list[bytes]:
+    import pyvips  # type: ignore[import-untyped] # noqa: PLC0415
+
+    # decode once, at the size of the largest rendition, so shrink-on-load does the heavy lifting for thumbnails
+    if all(one_rendition.is_resized for one_rendition in renditions):
+        decoded_image = pyvips.Image.thumbnail_source(
+            _open_content_source(file_content),
+            max(one_rendition.max_width or _UNBOUNDED_IMAGE_SIZE for one_rendition in renditions),
+            height=max(one_rendition.max_height or _UNBOUNDED_IMAGE_SIZE for one_rendition in renditions),
+            size="down",
+        )
+    else:
+        decoded_image = pyvips.Image.new_from_source(_open_content_source(file_content), "")
+    # without copying to memory every write would decode the source again
+    shared_image: typing.Final[pyvips.Image] = decoded_image.copy_memory()
+
+    rendition_contents: typing.Final[list[bytes]] = []
+    for one_rendition in renditions:
+        rendition_image = (
+            shared_image.thumbnail_image(
+                one_rendition.max_width or _UNBOUNDED_IMAGE_SIZE,
+                height=one_rendition.max_height or _UNBOUNDED_IMAGE_SIZE,
+                size="down",
+            )
+            if one_rendition.is_resized
+            else shared_image
+        )
+        _, target_extension = IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP[
+            one_rendition.image_conversion_format
+        ]
+        rendition_contents.append(rendition_image.write_to_buffer(f".{target_extension}", Q=one_rendition.quality))
+    return rendition_contents
+
+
+_T = typing.TypeVar("_T")
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class ImageConversionPool:
+    # None runs conversions in the default thread pool of the event loop, pass ProcessPoolExecutor to use all cores
+    executor: concurrent.futures.Executor | None = None
+    max_concurrent_conversions: int = dataclasses.field(default_factory=lambda: os.cpu_count() or 1)
+    max_pending_conversions: int | None = None
+    # queued and running conversions, use them as backpressure signal
+    pending_conversions: int = dataclasses.field(default=0, init=False)
+    running_conversions: int = dataclasses.field(default=0, init=False)
+    _semaphore: asyncio.Semaphore = dataclasses.field(init=False)
+
+    def __post_init__(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_conversions)
+
+    @property
+    def runs_in_processes(self) -> bool:
+        # arguments are pickled then, memoryview and mmap contents have to become bytes
+        return isinstance(self.executor, concurrent.futures.ProcessPoolExecutor)
+
+    async def run(self, function: typing.Callable[..., _T], /, *args: typing.Any, **kwargs: typing.Any) -> _T:  # noqa: ANN401
+        if self.max_pending_conversions is not None and self.pending_conversions >= self.max_pending_conversions:
+            raise TooManyPendingImageConversionsError(
+                pending_conversions=self.pending_conversions, max_pending_conversions=self.max_pending_conversions
+            )
+
+        self.pending_conversions += 1
+        try:
+            async with self._semaphore:
+                self.running_conversions += 1
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(
+                        self.executor, functools.partial(function, *args, **kwargs)
+                    )
+                finally:
+                    self.running_conversions -= 1
+        finally:
+            self.pending_conversions -= 1
@@ -0,0 +1,89 @@
+import struct
+import typing
+
+from safe_s3_storage.file_content import FileContent, view_content
+
+
+# SOF markers carry the frame size, DHT (0xC4), JPG (0xC8) and DAC (0xCC) share the range but don't
+_JPEG_START_OF_FRAME_MARKERS: typing.Final = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# markers without a length field
+_JPEG_STANDALONE_MARKERS: typing.Final = frozenset(range(0xD0, 0xD9)) | {0x01}
+
+
+def _read_png_dimensions(file_header: memoryview) -> tuple[int, int] | None:
+    if len(file_header) < 24 or file_header[12:16] != b"IHDR":  # noqa: PLR2004
+        return None
+    return typing.cast("tuple[int, int]", struct.unpack(">II", file_header[16:24]))
+
+
+def _read_gif_dimensions(file_header: memoryview) -> tuple[int, int] | None:
+    if len(file_header) < 10:  # noqa: PLR2004
+        return None
+    return typing.cast("tuple[int, int]", struct.unpack("<HH", file_header[6:10]))
+
+
+def _read_webp_dimensions(file_header: memoryview) -> tuple[int, int] | None:
+    chunk_type: typing.Final = file_header[12:16]
+    if chunk_type == b"VP8 " and len(file_header) >= 30:  # noqa: PLR2004
+        width, height = struct.unpack("<HH", file_header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk_type == b"VP8L" and len(file_header) >= 25:  # noqa: PLR2004
+        packed_size: typing.Final = int.from_bytes(file_header[21:25], "little")
+        return (packed_size & 0x3FFF) + 1, ((packed_size >> 14) & 0x3FFF) + 1
+    if chunk_type == b"VP8X" and len(file_header) >= 30:  # noqa: PLR2004
+        return int.from_bytes(file_header[24:27], "little") + 1, int.from_bytes(file_header[27:30], "little") + 1
+    return None
+
+
+def _read_jpeg_dimensions(file_header: memoryview) -> tuple[int, int] | None:
+    # jump from segment to segment by their lengths instead of decoding anything
+    position = 2
+    while position + 4 <= len(file_header):
+        if file_header[position] != 0xFF:  # noqa: PLR2004
+            return None
+        marker = file_header[position + 1]
+        if marker == 0xFF:  # noqa: PLR2004
+            position += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            position += 2
+            continue
+        if marker in _JPEG_START_OF_FRAME_MARKERS:
+            if position + 9 > len(file_header):
+                return None
+            height, width = struct.unpack(">HH", file_header[position + 5 : position + 9])
+            return width, height
+        position += 2 + int.from_bytes(file_header[position + 2 : position + 4], "big")
+    return None
+
+
+def _read_dimensions_with_pyvips(file_header: memoryview) -> tuple[int, int] | None:
+    import pyvips  # type: ignore[import-untyped] # noqa: PLC0415
+
+    if not file_header:
+        return None
+    try:
+        # loaders parse the header only, pixels would be decoded on first access, which never comes
+        pyvips_image: typing.Final[pyvips.Image] = pyvips.Image.new_from_source(
+            pyvips.Source.new_from_memory(file_header), "", access="sequential"
+        )
+    except pyvips.Error:
+        return None
+    return pyvips_image.width, pyvips_image.height
+
+
+# returns (width, height), None for unknown formats and truncated headers
+def read_image_dimensions(file_content: FileContent) -> tuple[int, int] | None:
+    file_header: typing.Final = view_content(file_content)
+    # libvips knows every format it decodes, the parsers below read headers it can't load, e.g. cut at a stream chunk
+    if (image_dimensions := _read_dimensions_with_pyvips(file_header)) is not None:
+        return image_dimensions
+    if file_header[:8] == b"\x89PNG\r\n\x1a\n":
+        return _read_png_dimensions(file_header)
+    if file_header[:6] in (b"GIF87a", b"GIF89a"):
+        return _read_gif_dimensions(file_header)
+    if file_header[:4] == b"RIFF" and file_header[8:12] == b"WEBP":
+        return _read_webp_dimensions(file_header)
+    if file_header[:2] == b"\xff\xd8":
+        return _read_jpeg_dimensions(file_header)
+    return None
@@ -0,0 +1,109 @@
+import dataclasses
+import time
+import types
+import typing
+
+
+StageAttributeValue: typing.TypeAlias = str | int | float | bool
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class StageMeasurement:
+    stage: str
+    # wall clock start for tracing backends, duration_seconds comes from the monotonic clock
+    started_at_ns: int
+    duration_seconds: float
+    attributes: dict[str, StageAttributeValue]
+    error: BaseException | None = None
+
+
+class StageRecorder(typing.Protocol):
+    def record_stage(self, stage_measurement: StageMeasurement) -> None: ...
+
+
+class StageTimer:
+    __slots__ = ("_attributes", "_stage", "_stage_recorder", "_started_at", "_started_at_ns")
+
+    def __init__(self, stage_recorder: StageRecorder, stage: str) -> None:
+        self._stage_recorder = stage_recorder
+        self._stage = stage
+        self._attributes: dict[str, StageAttributeValue] = {}
+        self._started_at = 0.0
+        self._started_at_ns = 0
+
+    def set_attributes(self, **attributes: StageAttributeValue) -> None:
+        self._attributes.update(attributes)
+
+    def __enter__(self) -> "StageTimer":  # noqa: PYI034
+        self._started_at_ns = time.time_ns()
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: types.TracebackType | None,
+    ) -> None:
+        self._stage_recorder.record_stage(
+            StageMeasurement(
+                stage=self._stage,
+                started_at_ns=self._started_at_ns,
+                duration_seconds=time.perf_counter() - self._started_at,
+                attributes=self._attributes,
+                error=exc_value,
+            )
+        )
+
+
+class _DisabledStageTimer(StageTimer):
+    __slots__ = ()
+
+    def __init__(self) -> None: ...
+
+    def set_attributes(self, **attributes: StageAttributeValue) -> None: ...
+
+    def __enter__(self) -> "StageTimer":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: types.TracebackType | None,
+    ) -> None: ...
+
+
+# shared by all stages while instrumentation is off, so disabled stages allocate nothing
+_DISABLED_STAGE_TIMER: typing.Final = _DisabledStageTimer()
+
+
+def measure_stage(stage_recorder: StageRecorder | None, stage: str) -> StageTimer:
+    return _DISABLED_STAGE_TIMER if stage_recorder is None else StageTimer(stage_recorder, stage)
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class OpenTelemetryStageRecorder:
+    # None uses the tracer of the global tracer provider, needs the opentelemetry extra
+    tracer: typing.Any = None
+    span_name_prefix: str = "safe_s3_storage."
+
+    def __post_init__(self) -> None:
+        if self.tracer is None:
+            from opentelemetry import trace  # noqa: PLC0415
+
+            self.tracer = trace.get_tracer("safe_s3_storage")
+
+    def record_stage(self, stage_measurement: StageMeasurement) -> None:
+        # spans are created once the stage is over, so nested stages are siblings under the current span
+        span: typing.Final = self.tracer.start_span(
+            self.span_name_prefix + stage_measurement.stage,
+            start_time=stage_measurement.started_at_ns,
+            attributes=stage_measurement.attributes,
+        )
+        if stage_measurement.error is not None:
+            from opentelemetry.trace import Status, StatusCode  # noqa: PLC0415
+
+            span.record_exception(stage_measurement.error)
+            span.set_status(Status(StatusCode.ERROR))
+        span.end(end_time=stage_measurement.started_at_ns + round(stage_measurement.duration_seconds * 1e9))
@@ -1,12 +1,35 @@
+import asyncio
 import base64
 import dataclasses
 import enum
+import functools
+import hashlib
+import json
+import logging
+import math
+import random
+import time
 import typing
 
 import httpx
 import pydantic
 
-from safe_s3_storage.exceptions import KasperskyScanEngineConnectionStatusError, KasperskyScanEngineThreatDetectedError
+from safe_s3_storage.circuit_breaker import CircuitBreaker
+from safe_s3_storage.exceptions import (
+    KasperskyScanEngineConnectionStatusError,
+    KasperskyScanEngineNotScannedError,
+    KasperskyScanEngineThreatDetectedError,
+    KasperskyScanEngineUnavailableError,
+)
+from safe_s3_storage.file_content import FileContent, get_content_size, view_content
+from safe_s3_storage.instrumentation import StageRecorder, StageTimer, measure_stage
+from safe_s3_storage.scan_admission import ScanAdmissionController
+from safe_s3_storage.scan_engine_pool import ScanEngineEndpoint, ScanEngineEndpointPool
+from safe_s3_storage.scan_hedging import ScanHedgingPolicy
+from safe_s3_storage.scan_verdict_cache import ScanVerdictCache
+
+
+logger: typing.Final = logging.getLogger(__name__)
 
 
 class KasperskyScanEngineRequest(pydantic.BaseModel):
@@ -15,6 +38,69 @@ class KasperskyScanEngineRequest(pydantic.BaseModel):
     name: str
 
 
+_BASE64_ENCODING_CHUNK_SIZE_BYTES: typing.Final = 3 * 64 * 1024  # multiple of 3, so chunks are encoded without padding
+
+
+def _build_json_prefix(timeout: str) -> bytes:
+    return f'{{"timeout":{json.dumps(timeout)},"object":"'.encode()
+
+
+def _build_json_suffix(name: str) -> bytes:
+    return f'","name":{json.dumps(name)}}}'.encode()
+
+
+def _compute_request_content_length(*, timeout: str, name: str, file_size: int) -> int:
+    return len(_build_json_prefix(timeout)) + 4 * math.ceil(file_size / 3) + len(_build_json_suffix(name))
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class KasperskyScanEngineStreamedRequest:
+    # Same JSON document as KasperskyScanEngineRequest, but "object" is base64-encoded chunk by chunk while it is sent
+    timeout: str
+    name: str
+    file_content: FileContent
+
+    @property
+    def content_length(self) -> int:
+        return _compute_request_content_length(
+            timeout=self.timeout, name=self.name, file_size=get_content_size(self.file_content)
+        )
+
+    async def __aiter__(self) -> typing.AsyncIterator[bytes]:
+        yield _build_json_prefix(self.timeout)
+        file_content_view: typing.Final = view_content(self.file_content)
+        for chunk_start in range(0, len(file_content_view), _BASE64_ENCODING_CHUNK_SIZE_BYTES):
+            yield base64.b64encode(file_content_view[chunk_start : chunk_start + _BASE64_ENCODING_CHUNK_SIZE_BYTES])
+        yield _build_json_suffix(self.name)
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class KasperskyScanEngineChunkedRequest:
+    # Same JSON document, "object" is encoded from a stream of file_size bytes, so the file is never held in memory
+    timeout: str
+    name: str
+    file_stream: typing.AsyncIterable[bytes]
+    file_size: int
+
+    @property
+    def content_length(self) -> int:
+        return _compute_request_content_length(timeout=self.timeout, name=self.name, file_size=self.file_size)
+
+    async def __aiter__(self) -> typing.AsyncIterator[bytes]:
+        yield _build_json_prefix(self.timeout)
+        # base64 needs multiples of 3 bytes to encode without padding, the rest waits for the next chunk
+        remainder = b""
+        async for one_chunk in self.file_stream:
+            chunk_view = memoryview(remainder + one_chunk if remainder else one_chunk)
+            encodable_size = len(chunk_view) - len(chunk_view) % 3
+            if encodable_size:
+                yield base64.b64encode(chunk_view[:encodable_size])
+            remainder = bytes(chunk_view[encodable_size:])
+        if remainder:
+            yield base64.b64encode(remainder)
+        yield _build_json_suffix(self.name)
+
+
 # https://support.kaspersky.ru/scan-engine/2.1/193001
 class KasperskyScanEngineScanResult(str, enum.Enum):
     CLEAN = "CLEAN"
@@ -29,27 +115,319 @@ class KasperskyScanEngineResponse(pydantic.BaseModel):
     scanResult: KasperskyScanEngineScanResult  # noqa: N815
 
 
+_CACHEABLE_SCAN_RESULTS: typing.Final = frozenset(
+    {KasperskyScanEngineScanResult.CLEAN, KasperskyScanEngineScanResult.DETECT}
+)
+_NOT_SCANNED_SCAN_RESULTS: typing.Final = frozenset(
+    {KasperskyScanEngineScanResult.NON_SCANNED, KasperskyScanEngineScanResult.SERVER_ERROR}
+)
+
+
+class ScanEngineFallbackPolicy(str, enum.Enum):
+    raise_error = enum.auto()
+    skip_scan = enum.auto()
+
+
+def _is_server_error(response: bytes) -> bool:
+    return (
+        KasperskyScanEngineResponse.model_validate_json(response).scanResult
+        == KasperskyScanEngineScanResult.SERVER_ERROR
+    )
+
+
+def _is_retryable_status_code(status_code: int) -> bool:
+    return status_code == httpx.codes.TOO_MANY_REQUESTS or status_code >= httpx.codes.INTERNAL_SERVER_ERROR
+
+
 @dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
 class KasperskyScanEngineClient:
     httpx_client: httpx.AsyncClient
-    service_url: str
     client_name: str
+    # pass either a single service_url or an endpoint_pool balancing scans across several engine instances
+    service_url: str | None = None
+    endpoint_pool: ScanEngineEndpointPool | None = None
     timeout_ms: int = 10000
     max_retries: int = 3
+    retry_backoff_base_seconds: float = 0.1
+    retry_backoff_max_seconds: float = 2.0
+    # used with service_url, endpoint pools create a circuit breaker per endpoint
+    circuit_breaker: CircuitBreaker = dataclasses.field(default_factory=CircuitBreaker)
+    # applied when all circuits are open or the engine is still failing after all retries
+    unavailable_policy: ScanEngineFallbackPolicy = ScanEngineFallbackPolicy.raise_error
+    # applied to NON_SCANNED and SERVER_ERROR scan results
+    not_scanned_policy: ScanEngineFallbackPolicy = ScanEngineFallbackPolicy.raise_error
+    # reuses CLEAN and DETECT verdicts for identical content and coalesces concurrent scans of it
+    verdict_cache: ScanVerdictCache | None = None
+    # None disables instrumentation
+    stage_recorder: StageRecorder | None = None
+    # None sends every scan right away, verdict cache hits and coalesced scans don't take admission slots
+    admission_controller: ScanAdmissionController | None = None
+    # None waits for every scan request however slow it is
+    hedging_policy: ScanHedgingPolicy | None = None
+    _endpoint_pool: ScanEngineEndpointPool = dataclasses.field(init=False)
+    _in_flight_scans: dict[str, asyncio.Future[bytes | None]] = dataclasses.field(default_factory=dict, init=False)
+
+    def __post_init__(self) -> None:
+        if self.endpoint_pool is not None and self.service_url is None:
+            object.__setattr__(self, "_endpoint_pool", self.endpoint_pool)
+        elif self.service_url is not None and self.endpoint_pool is None:
+            circuit_breaker: typing.Final = self.circuit_breaker
+            object.__setattr__(
+                self,
+                "_endpoint_pool",
+                ScanEngineEndpointPool(
+                    service_urls=[self.service_url], circuit_breaker_factory=lambda: circuit_breaker
+                ),
+            )
+        else:
+            raise ValueError("Pass either service_url or endpoint_pool to KasperskyScanEngineClient")
 
-    async def _send_scan_memory_request(self, payload: dict[str, typing.Any]) -> bytes:
-        response: typing.Final = await self.httpx_client.post(url=self.service_url, json=payload)
+    async def _send_scan_memory_request(
+        self,
+        service_url: str,
+        scan_request: KasperskyScanEngineStreamedRequest | KasperskyScanEngineChunkedRequest,
+    ) -> bytes:
+        response: typing.Final = await self.httpx_client.post(
+            url=service_url,
+            content=scan_request,
+            headers={"Content-Type": "application/json", "Content-Length": str(scan_request.content_length)},
+        )
         response.raise_for_status()
         return response.content
 
-    async def scan_memory(self, *, file_name: str, file_content: bytes) -> None:
-        payload: typing.Final = KasperskyScanEngineRequest(
-            timeout=str(self.timeout_ms), object=base64.b64encode(file_content).decode(), name=self.client_name
-        ).model_dump(mode="json")
+    def _compute_retry_delay(self, attempt: int) -> float:
+        return random.uniform(  # noqa: S311
+            0, min(self.retry_backoff_max_seconds, self.retry_backoff_base_seconds * 2**attempt)
+        )
+
+    def _handle_unavailable_scan_engine(self, error: Exception, *, cause: Exception | None = None) -> None:
+        if self.unavailable_policy == ScanEngineFallbackPolicy.raise_error:
+            raise error from cause
+        logger.warning(f"Skipping antivirus scan, Kaspersky Scan Engine is unavailable: {error!r}")
+
+    async def _attempt_scan(
+        self,
+        endpoint: ScanEngineEndpoint,
+        scan_request: KasperskyScanEngineStreamedRequest | KasperskyScanEngineChunkedRequest,
+    ) -> tuple[bytes | None, Exception | None]:
+        # returns the response or the error worth retrying, SERVER_ERROR responses are retried as well
+        started_at: typing.Final = time.perf_counter()
+        succeeded: bool | None = None
         try:
-            response: typing.Final = await self._send_scan_memory_request(payload)
+            response: typing.Final = await self._send_scan_memory_request(endpoint.service_url, scan_request)
         except httpx.HTTPStatusError as exc:
-            raise KasperskyScanEngineConnectionStatusError from exc
+            succeeded = not _is_retryable_status_code(exc.response.status_code)
+            if succeeded:
+                raise KasperskyScanEngineConnectionStatusError from exc
+            return None, exc
+        except httpx.TransportError as exc:
+            succeeded = False
+            return None, exc
+        else:
+            succeeded = not _is_server_error(response)
+            return response, None
+        finally:
+            await self._endpoint_pool.release_endpoint(
+                endpoint, succeeded=succeeded, latency_seconds=time.perf_counter() - started_at
+            )
+
+    async def _attempt_hedge_scan(
+        self, scan_request: KasperskyScanEngineStreamedRequest
+    ) -> tuple[bytes | None, Exception | None]:
+        # endpoint pools give the hedge the least busy endpoint, a single service_url gets another connection
+        endpoint: typing.Final = await self._endpoint_pool.acquire_endpoint()
+        if endpoint is None:
+            return None, None
+        return await self._attempt_scan(endpoint, scan_request)
+
+    async def _attempt_hedged_scan(
+        self,
+        hedging_policy: ScanHedgingPolicy,
+        endpoint: ScanEngineEndpoint,
+        scan_request: KasperskyScanEngineStreamedRequest,
+        stage_timer: StageTimer,
+    ) -> tuple[bytes | None, Exception | None]:
+        # the first response wins and the other request is cancelled
+        started_at: typing.Final = time.perf_counter()
+        hedge_delay_seconds: typing.Final = hedging_policy.start_scan()
+        first_attempt: typing.Final = asyncio.create_task(self._attempt_scan(endpoint, scan_request))
+        pending_attempts: set[asyncio.Task[tuple[bytes | None, Exception | None]]] = {first_attempt}
+        retryable_error: Exception | None = None
+        try:
+            if hedge_delay_seconds is not None:
+                done_attempts, pending_attempts = await asyncio.wait(pending_attempts, timeout=hedge_delay_seconds)
+                if not done_attempts and hedging_policy.allows_hedge():
+                    stage_timer.set_attributes(hedged=True)
+                    pending_attempts.add(asyncio.create_task(self._attempt_hedge_scan(scan_request)))
+                pending_attempts |= done_attempts
+
+            while pending_attempts:
+                done_attempts, pending_attempts = await asyncio.wait(
+                    pending_attempts, return_when=asyncio.FIRST_COMPLETED
+                )
+                for one_attempt in done_attempts:
+                    response, attempt_error = one_attempt.result()
+                    if response is not None:
+                        hedging_policy.record_latency(time.perf_counter() - started_at)
+                        if one_attempt is not first_attempt:
+                            stage_timer.set_attributes(hedge_won=True)
+                        return response, None
+                    retryable_error = retryable_error or attempt_error
+            return None, retryable_error
+        finally:
+            for one_attempt in pending_attempts:
+                one_attempt.cancel()
+            await asyncio.gather(*pending_attempts, return_exceptions=True)
+
+    async def _scan_memory_with_retries(self, file_content: FileContent, stage_timer: StageTimer) -> bytes | None:
+        scan_request: typing.Final = KasperskyScanEngineStreamedRequest(
+            timeout=str(self.timeout_ms), name=self.client_name, file_content=file_content
+        )
+        attempt = 0
+        while True:
+            endpoint = await self._endpoint_pool.acquire_endpoint()
+            if endpoint is None:
+                self._handle_unavailable_scan_engine(
+                    KasperskyScanEngineUnavailableError(service_urls=self._endpoint_pool.service_urls)
+                )
+                return None
+
+            response, retryable_error = (
+                await self._attempt_scan(endpoint, scan_request)
+                if self.hedging_policy is None
+                else await self._attempt_hedged_scan(self.hedging_policy, endpoint, scan_request, stage_timer)
+            )
+            stage_timer.set_attributes(retries=attempt)
+            if response is not None and (not _is_server_error(response) or attempt >= self.max_retries):
+                return response
+            if attempt >= self.max_retries:
+                self._handle_unavailable_scan_engine(KasperskyScanEngineConnectionStatusError(), cause=retryable_error)
+                return None
+
+            await asyncio.sleep(self._compute_retry_delay(attempt))
+            attempt += 1
+
+    async def _scan_with_admission(
+        self,
+        send_scan: typing.Callable[[], typing.Awaitable[bytes | None]],
+        *,
+        size_bytes: int,
+        stage_timer: StageTimer,
+        admission_key: str | None,
+    ) -> bytes | None:
+        if self.admission_controller is None:
+            return await send_scan()
+
+        # rejections are raised whatever unavailable_policy says, skipping them would store files nobody scanned
+        async with self.admission_controller.admit(
+            admission_key=admission_key, size_bytes=size_bytes
+        ) as queue_wait_seconds:
+            stage_timer.set_attributes(queue_wait_seconds=queue_wait_seconds)
+            return await send_scan()
+
+    async def _scan_memory(
+        self, file_content: FileContent, stage_timer: StageTimer, admission_key: str | None
+    ) -> bytes | None:
+        return await self._scan_with_admission(
+            functools.partial(self._scan_memory_with_retries, file_content, stage_timer),
+            size_bytes=get_content_size(file_content),
+            stage_timer=stage_timer,
+            admission_key=admission_key,
+        )
+
+    async def _scan_memory_with_cache(
+        self,
+        verdict_cache: ScanVerdictCache,
+        file_content: FileContent,
+        stage_timer: StageTimer,
+        admission_key: str | None,
+    ) -> bytes | None:
+        content_digest: typing.Final = hashlib.sha256(file_content).hexdigest()
+        if (cached_response := await verdict_cache.get(content_digest)) is not None:
+            stage_timer.set_attributes(cached=True)
+            return cached_response
+        if (in_flight_scan := self._in_flight_scans.get(content_digest)) is not None:
+            stage_timer.set_attributes(coalesced=True)
+            return await asyncio.shield(in_flight_scan)
+
+        scan_future: typing.Final[asyncio.Future[bytes | None]] = asyncio.get_running_loop().create_future()
+        self._in_flight_scans[content_digest] = scan_future
+        try:
+            response: typing.Final = await self._scan_memory(file_content, stage_timer, admission_key)
+            if (
+                response is not None
+                and KasperskyScanEngineResponse.model_validate_json(response).scanResult in _CACHEABLE_SCAN_RESULTS
+            ):
+                await verdict_cache.set(content_digest, response)
+        except BaseException as exc:
+            if isinstance(exc, Exception):
+                scan_future.set_exception(exc)
+                scan_future.exception()  # coalesced scans re-raise it, don't warn when nobody waits
+            else:
+                scan_future.cancel()
+            raise
+        else:
+            scan_future.set_result(response)
+            return response
+        finally:
+            del self._in_flight_scans[content_digest]
+
+    async def scan_memory(self, *, file_name: str, file_content: FileContent, admission_key: str | None = None) -> None:
+        # admission_key, e.g. tenant ID, is limited by ScanAdmissionController.max_in_flight_scans_per_key
+        with measure_stage(self.stage_recorder, "scan_memory") as stage_timer:
+            stage_timer.set_attributes(file_size_bytes=get_content_size(file_content))
+            response: typing.Final = (
+                await self._scan_memory_with_cache(self.verdict_cache, file_content, stage_timer, admission_key)
+                if self.verdict_cache is not None
+                else await self._scan_memory(file_content, stage_timer, admission_key)
+            )
+            self._check_scan_response(response, file_name=file_name, stage_timer=stage_timer)
+
+    def _check_scan_response(self, response: bytes | None, *, file_name: str, stage_timer: StageTimer) -> None:
+        if response is None:
+            stage_timer.set_attributes(skipped=True)
+            return
+
         validated_response: typing.Final = KasperskyScanEngineResponse.model_validate_json(response)
+        stage_timer.set_attributes(verdict=validated_response.scanResult.value)
         if validated_response.scanResult == KasperskyScanEngineScanResult.DETECT:
             raise KasperskyScanEngineThreatDetectedError(response=response, file_name=file_name)
+        if validated_response.scanResult in _NOT_SCANNED_SCAN_RESULTS:
+            if self.not_scanned_policy == ScanEngineFallbackPolicy.raise_error:
+                raise KasperskyScanEngineNotScannedError(response=response, file_name=file_name)
+            logger.warning(f"Kaspersky Scan Engine did not scan {file_name}: {validated_response.scanResult.value}")
+
+    async def _scan_stream_once(self, scan_request: KasperskyScanEngineChunkedRequest) -> bytes | None:
+        endpoint: typing.Final = await self._endpoint_pool.acquire_endpoint()
+        if endpoint is None:
+            self._handle_unavailable_scan_engine(
+                KasperskyScanEngineUnavailableError(service_urls=self._endpoint_pool.service_urls)
+            )
+            return None
+
+        response, retryable_error = await self._attempt_scan(endpoint, scan_request)
+        if response is None:
+            self._handle_unavailable_scan_engine(KasperskyScanEngineConnectionStatusError(), cause=retryable_error)
+        return response
+
+    async def scan_stream(
+        self,
+        *,
+        file_name: str,
+        file_stream: typing.AsyncIterable[bytes],
+        file_size: int,
+        admission_key: str | None = None,
+    ) -> None:
+        # the stream is sent as it's read, it can't be replayed, so there are no retries, hedges or verdict cache
+        with measure_stage(self.stage_recorder, "scan_stream") as stage_timer:
+            stage_timer.set_attributes(file_size_bytes=file_size)
+            scan_request: typing.Final = KasperskyScanEngineChunkedRequest(
+                timeout=str(self.timeout_ms), name=self.client_name, file_stream=file_stream, file_size=file_size
+            )
+            response: typing.Final = await self._scan_with_admission(
+                functools.partial(self._scan_stream_once, scan_request),
+                size_bytes=file_size,
+                stage_timer=stage_timer,
+                admission_key=admission_key,
+            )
+            self._check_scan_response(response, file_name=file_name, stage_timer=stage_timer)
@@ -0,0 +1,56 @@
+import dataclasses
+import re
+import threading
+import typing
+
+import magic
+
+from safe_s3_storage.file_content import FileContent, read_content_header
+
+
+# only signatures that libmagic maps to the same MIME type regardless of the following bytes,
+# ZIP is left to libmagic since it tells OOXML and other ZIP-based formats apart by their entries
+_MIME_TYPE_SIGNATURES: typing.Final = (
+    (rb"\xff\xd8\xff.", "image/jpeg"),
+    (rb"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR", "image/png"),
+    (rb"GIF8[79]a", "image/gif"),
+    (rb"RIFF.{4}WEBP", "image/webp"),
+    (rb"%PDF-", "application/pdf"),
+)
+_MIME_TYPE_SIGNATURES_PATTERN: typing.Final = re.compile(
+    b"|".join(b"(" + one_signature + b")" for one_signature, _ in _MIME_TYPE_SIGNATURES), re.DOTALL
+)
+
+
+_MIME_TYPE_SIGNATURE_SIZE_BYTES: typing.Final = 64
+
+
+def match_mime_type_signature(file_content: FileContent) -> str | None:
+    signature_match: typing.Final = _MIME_TYPE_SIGNATURES_PATTERN.match(
+        read_content_header(file_content, _MIME_TYPE_SIGNATURE_SIZE_BYTES)
+    )
+    if signature_match is None or signature_match.lastindex is None:
+        return None
+    return _MIME_TYPE_SIGNATURES[signature_match.lastindex - 1][1]
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class MimeTypeDetector:
+    # libmagic stops looking after its bytes_max parameter anyway, 1 MB is its default in most releases
+    libmagic_header_size_bytes: int = 1024 * 1024
+    _magic: magic.Magic | None = dataclasses.field(default=None, init=False)
+    _magic_lock: threading.Lock = dataclasses.field(default_factory=threading.Lock, init=False)
+
+    def _get_magic(self) -> magic.Magic:
+        if self._magic is None:
+            with self._magic_lock:
+                if self._magic is None:
+                    self._magic = magic.Magic(mime=True)
+        return self._magic
+
+    def detect_mime_type(self, file_content: FileContent) -> str:
+        if (mime_type := match_mime_type_signature(file_content)) is not None:
+            return mime_type
+        # magic.Magic serializes calls to its libmagic cookie with its own lock
+        libmagic_header: typing.Final = read_content_header(file_content, self.libmagic_header_size_bytes)
+        return typing.cast("str", self._get_magic().from_buffer(libmagic_header))
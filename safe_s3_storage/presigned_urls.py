@@ -0,0 +1,133 @@
+import collections
+import dataclasses
+import datetime
+import functools
+import hashlib
+import hmac
+import time
+import typing
+import urllib.parse
+
+from botocore.credentials import ReadOnlyCredentials
+
+
+_SIGV4_ALGORITHM: typing.Final = "AWS4-HMAC-SHA256"
+_SIGV4_TIMESTAMP_FORMAT: typing.Final = "%Y%m%dT%H%M%SZ"
+_DEFAULT_PORTS: typing.Final = {"http": 80, "https": 443}
+
+
+def _quote_query_component(value: str) -> str:
+    return urllib.parse.quote(value, safe="-_.~")
+
+
+def _hmac_sha256(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+@functools.lru_cache(maxsize=16)
+def _derive_signing_key(secret_key: str, date_stamp: str, region_name: str) -> bytes:
+    date_key: typing.Final = _hmac_sha256(f"AWS4{secret_key}".encode(), date_stamp)
+    return _hmac_sha256(_hmac_sha256(_hmac_sha256(date_key, region_name), "s3"), "aws4_request")
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class PresignedUrlSigner:
+    # Signs path-style GetObject URLs with SigV4 query authentication, the same way botocore's s3v4 presigner does
+    base_url: str
+    base_path: str
+    host: str
+    amz_date: str
+    credential: str
+    signing_key: bytes
+    security_token: str | None
+
+    @classmethod
+    def create(
+        cls,
+        *,
+        endpoint_url: str,
+        region_name: str,
+        credentials: ReadOnlyCredentials,
+        signed_at: datetime.datetime,
+    ) -> "PresignedUrlSigner":
+        parsed_endpoint_url: typing.Final = urllib.parse.urlsplit(endpoint_url)
+        host: typing.Final = (
+            parsed_endpoint_url.hostname
+            if parsed_endpoint_url.port in {None, _DEFAULT_PORTS.get(parsed_endpoint_url.scheme)}
+            else parsed_endpoint_url.netloc
+        )
+        date_stamp: typing.Final = signed_at.strftime("%Y%m%d")
+        return cls(
+            base_url=f"{parsed_endpoint_url.scheme}://{parsed_endpoint_url.netloc}",
+            base_path=parsed_endpoint_url.path.rstrip("/"),
+            host=host or parsed_endpoint_url.netloc,
+            amz_date=signed_at.strftime(_SIGV4_TIMESTAMP_FORMAT),
+            credential=f"{credentials.access_key}/{date_stamp}/{region_name}/s3/aws4_request",
+            signing_key=_derive_signing_key(credentials.secret_key, date_stamp, region_name),
+            security_token=credentials.token,
+        )
+
+    def sign_get_object_url(
+        self, *, bucket_name: str, object_key: str, expires_in_seconds: int, response_params: dict[str, str]
+    ) -> str:
+        canonical_uri: typing.Final = urllib.parse.quote(f"{self.base_path}/{bucket_name}/{object_key}", safe="/~")
+        query_params: typing.Final = [
+            *response_params.items(),
+            ("X-Amz-Algorithm", _SIGV4_ALGORITHM),
+            ("X-Amz-Credential", self.credential),
+            ("X-Amz-Date", self.amz_date),
+            ("X-Amz-Expires", str(expires_in_seconds)),
+            ("X-Amz-SignedHeaders", "host"),
+        ]
+        if self.security_token:
+            query_params.append(("X-Amz-Security-Token", self.security_token))
+        quoted_query_params: typing.Final = [
+            (_quote_query_component(one_key), _quote_query_component(one_value)) for one_key, one_value in query_params
+        ]
+
+        canonical_query_string: typing.Final = "&".join(
+            f"{one_key}={one_value}" for one_key, one_value in sorted(quoted_query_params)
+        )
+        canonical_request: typing.Final = (
+            f"GET\n{canonical_uri}\n{canonical_query_string}\nhost:{self.host}\n\nhost\nUNSIGNED-PAYLOAD"
+        )
+        string_to_sign: typing.Final = (
+            f"{_SIGV4_ALGORITHM}\n{self.amz_date}\n{self.credential.split('/', 1)[1]}\n"
+            f"{hashlib.sha256(canonical_request.encode()).hexdigest()}"
+        )
+        signature: typing.Final = hmac.new(self.signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        query_string: typing.Final = "&".join(f"{one_key}={one_value}" for one_key, one_value in quoted_query_params)
+        return f"{self.base_url}{canonical_uri}?{query_string}&X-Amz-Signature={signature}"
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class PresignedUrlCache:
+    max_entries: int = 10_000
+    # cached URLs are handed out until this long before they expire
+    refresh_before_expiry_seconds: float = 60
+    clock: typing.Callable[[], float] = time.time
+    _entries: collections.OrderedDict[typing.Hashable, tuple[float, str]] = dataclasses.field(
+        default_factory=collections.OrderedDict, init=False
+    )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, cache_key: typing.Hashable) -> str | None:
+        cached_entry: typing.Final = self._entries.get(cache_key)
+        if cached_entry is None:
+            return None
+
+        expires_at, presigned_url = cached_entry
+        if expires_at - self.refresh_before_expiry_seconds <= self.clock():
+            del self._entries[cache_key]
+            return None
+
+        self._entries.move_to_end(cache_key)
+        return presigned_url
+
+    def set(self, cache_key: typing.Hashable, presigned_url: str, *, expires_in_seconds: float) -> None:
+        self._entries[cache_key] = (self.clock() + expires_in_seconds, presigned_url)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,15 +1,62 @@
+import asyncio
+import base64
+import collections
 import dataclasses
 import datetime
+import hashlib
+import itertools
+import logging
+import time
 import typing
 
+from botocore.exceptions import ClientError
 from types_aiobotocore_s3 import S3Client
-from types_aiobotocore_s3.type_defs import GetObjectOutputTypeDef, HeadObjectOutputTypeDef
+from types_aiobotocore_s3.type_defs import (
+    CompletedPartTypeDef,
+    CopySourceTypeDef,
+    GetObjectOutputTypeDef,
+    HeadObjectOutputTypeDef,
+)
 
-from safe_s3_storage.exceptions import FailedToReplaceS3BaseUrlWithProxyBaseUrlError, InvalidS3PathError
-from safe_s3_storage.file_validator import ValidatedFile
+from safe_s3_storage.exceptions import (
+    FailedToReplaceS3BaseUrlWithProxyBaseUrlError,
+    InvalidByteRangeError,
+    InvalidS3PathError,
+)
+from safe_s3_storage.existing_object_cache import ExistingObjectCache
+from safe_s3_storage.file_content import (
+    FileContent,
+    compute_content_sha256,
+    get_content_size,
+    make_request_body,
+    view_content,
+)
+from safe_s3_storage.file_read_cache import FileReadCache
+from safe_s3_storage.file_validator import ValidatedFile, ValidatedFileStream, ValidatedImageRendition
+from safe_s3_storage.instrumentation import StageRecorder, StageTimer, measure_stage
+from safe_s3_storage.presigned_urls import PresignedUrlCache, PresignedUrlSigner
 
 
+logger: typing.Final = logging.getLogger(__name__)
 _REQUIRED_S3_PATH_PARTS_COUNT: typing.Final = 2
+_MAX_DELETE_OBJECTS_KEYS_COUNT: typing.Final = 1000
+_MAX_COPY_OBJECT_SIZE_BYTES: typing.Final = 5 * 1024 * 1024 * 1024  # 5 GB, larger objects need UploadPartCopy
+_MISSING_OBJECT_ERROR_CODES: typing.Final = ("404", "NoSuchKey", "NotFound")
+_CACHE_MISS_READ_CHUNK_SIZE_BYTES: typing.Final = 1024 * 1024
+# SigV4 presigned URLs can't be valid for longer
+_MAX_SIGV4_EXPIRES_IN_SECONDS: typing.Final = 7 * 24 * 60 * 60
+
+
+def _format_byte_range(offset: int, length: int | None) -> str:
+    # S3 ignores invalid ranges, e.g. for length 0, and returns the whole object
+    if offset < 0 or (length is not None and length <= 0):
+        raise InvalidByteRangeError(offset=offset, length=length)
+    return f"bytes={offset}-" if length is None else f"bytes={offset}-{offset + length - 1}"
+
+
+def _encode_checksum_sha256(content_sha256: str) -> str:
+    # x-amz-checksum-sha256 carries the base64 of the raw digest
+    return base64.b64encode(bytes.fromhex(content_sha256)).decode()
 
 
 def _extract_bucket_name_and_object_key(s3_path: str) -> tuple[str, str]:
@@ -20,13 +67,305 @@ def _extract_bucket_name_and_object_key(s3_path: str) -> tuple[str, str]:
 
 
 @dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
-class UploadedFile(ValidatedFile):
+class UploadedFile:
+    # no file_content, so upload results don't keep the payload alive
+    file_name: str
+    file_size: int
+    mime_type: str
+    s3_path: str
+    # the content was already stored under its content-addressed key, nothing was uploaded
+    deduplicated: bool = False
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class UploadedStreamedFile:
+    file_name: str
+    file_size: int
+    mime_type: str
+    s3_path: str
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class FileDeletionResult:
+    s3_path: str
+    error_code: str | None = None
+    error_message: str | None = None
+
+    @property
+    def deleted(self) -> bool:
+        return self.error_code is None
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class FileHeadResult:
     s3_path: str
+    file_head: HeadObjectOutputTypeDef | None = None
+    error: ClientError | None = None
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class _FileStart:
+    # the whole file, or its first FileReadCache.max_file_size_bytes if it's larger
+    file_content: bytes
+    etag: str
+    file_size: int
+    cached: bool
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class CopiedFile:
+    source_s3_path: str
+    s3_path: str
+    file_size: int
+    mime_type: str
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class FileCopyResult:
+    source_s3_path: str
+    s3_path: str
+    copied_file: CopiedFile | None = None
+    error: ClientError | None = None
+
+
+async def _iterate_over_parts(
+    file_content: FileContent | typing.AsyncIterator[bytes], part_size: int
+) -> typing.AsyncIterator[FileContent]:
+    if not isinstance(file_content, typing.AsyncIterator):
+        # memoryview slices, parts are sent without copying the content
+        file_content_view: typing.Final = view_content(file_content)
+        for part_start in range(0, len(file_content_view), part_size):
+            yield file_content_view[part_start : part_start + part_size]
+        return
+
+    part_buffer: typing.Final = bytearray()
+    async for one_chunk in file_content:
+        part_buffer.extend(one_chunk)
+        while len(part_buffer) >= part_size:
+            yield bytes(part_buffer[:part_size])
+            del part_buffer[:part_size]
+    if part_buffer:
+        yield bytes(part_buffer)
+
+
+async def _prepend_chunks(
+    first_chunks: list[FileContent], next_chunks: typing.AsyncIterator[FileContent]
+) -> typing.AsyncIterator[FileContent]:
+    for one_chunk in first_chunks:
+        yield one_chunk
+    async for one_chunk in next_chunks:
+        yield one_chunk
 
 
 @dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
 class S3Service:
     s3_client: S3Client
+    multipart_threshold_bytes: int = 16 * 1024 * 1024  # 16 MB
+    multipart_part_size_bytes: int = 8 * 1024 * 1024  # 8 MB, S3 requires at least 5 MB for all parts but the last
+    multipart_concurrency: int = 4
+    # parts of server-side copies of objects over 5 GB, copied with up to multipart_concurrency parts in flight
+    copy_part_size_bytes: int = 512 * 1024 * 1024  # 512 MB
+    # None reads objects with one GET, otherwise ranges of this size are fetched concurrently
+    ranged_download_part_size_bytes: int | None = None
+    ranged_download_concurrency: int = 4
+    # None signs every URL anew
+    presigned_url_cache: PresignedUrlCache | None = None
+    # None disables instrumentation
+    stage_recorder: StageRecorder | None = None
+    # None sends a HEAD before every content-addressed upload
+    existing_object_cache: ExistingObjectCache | None = None
+    # None reads every file from S3, writes and deletes through this service invalidate cached files
+    file_read_cache: FileReadCache | None = None
+    _in_flight_reads: dict[str, asyncio.Future[_FileStart]] = dataclasses.field(default_factory=dict, init=False)
+
+    async def _upload_part(  # noqa: PLR0913
+        self,
+        *,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        part_content: FileContent,
+        send_checksum: bool,
+    ) -> CompletedPartTypeDef:
+        if not send_checksum:
+            uploaded_part = await self.s3_client.upload_part(
+                Body=make_request_body(part_content),
+                Bucket=bucket_name,
+                Key=object_key,
+                PartNumber=part_number,
+                UploadId=upload_id,
+            )
+            return {"ETag": uploaded_part["ETag"], "PartNumber": part_number}
+
+        checksum_sha256: typing.Final = base64.b64encode(hashlib.sha256(part_content).digest()).decode()
+        uploaded_part = await self.s3_client.upload_part(
+            Body=make_request_body(part_content),
+            Bucket=bucket_name,
+            Key=object_key,
+            PartNumber=part_number,
+            UploadId=upload_id,
+            ChecksumSHA256=checksum_sha256,
+        )
+        return {"ETag": uploaded_part["ETag"], "PartNumber": part_number, "ChecksumSHA256": checksum_sha256}
+
+    async def _upload_parts(  # noqa: PLR0913
+        self,
+        *,
+        bucket_name: str,
+        object_key: str,
+        file_parts: typing.AsyncIterator[FileContent],
+        content_type: str,
+        metadata: dict[str, str],
+        send_checksums: bool,
+    ) -> int:
+        started_at: typing.Final = time.perf_counter()
+        if send_checksums:
+            # S3 verifies every part, the whole object checksum of multipart uploads is a checksum of part checksums
+            multipart_upload = await self.s3_client.create_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                ContentType=content_type,
+                Metadata=metadata,
+                ChecksumAlgorithm="SHA256",
+            )
+        else:
+            multipart_upload = await self.s3_client.create_multipart_upload(
+                Bucket=bucket_name, Key=object_key, ContentType=content_type, Metadata=metadata
+            )
+        upload_id: typing.Final = multipart_upload["UploadId"]
+        completed_parts: typing.Final[list[CompletedPartTypeDef]] = []
+        pending_parts: set[asyncio.Task[CompletedPartTypeDef]] = set()
+        file_size = 0
+        parts_count = 0
+        try:
+            async for one_part in file_parts:
+                if len(pending_parts) >= self.multipart_concurrency:
+                    done_parts, pending_parts = await asyncio.wait(pending_parts, return_when=asyncio.FIRST_COMPLETED)
+                    completed_parts.extend(one_task.result() for one_task in done_parts)
+                parts_count += 1
+                file_size += get_content_size(one_part)
+                pending_parts.add(
+                    asyncio.create_task(
+                        self._upload_part(
+                            bucket_name=bucket_name,
+                            object_key=object_key,
+                            upload_id=upload_id,
+                            part_number=parts_count,
+                            part_content=one_part,
+                            send_checksum=send_checksums,
+                        )
+                    )
+                )
+            completed_parts.extend(await asyncio.gather(*pending_parts))
+            await self.s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(completed_parts, key=lambda one_part: one_part["PartNumber"])},
+            )
+        except BaseException:
+            for one_task in pending_parts:
+                one_task.cancel()
+            await asyncio.gather(*pending_parts, return_exceptions=True)
+            await self.s3_client.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+            raise
+
+        elapsed_seconds: typing.Final = time.perf_counter() - started_at
+        logger.info(
+            f"Uploaded {bucket_name}/{object_key} in {parts_count} parts: {file_size} bytes in {elapsed_seconds:.3f}s "
+            f"({file_size / max(elapsed_seconds, 1e-9) / 1024 / 1024:.2f} MB/s)"
+        )
+        return file_size
+
+    async def _put_object(  # noqa: PLR0913
+        self,
+        *,
+        bucket_name: str,
+        object_key: str,
+        file_content: FileContent,
+        content_type: str,
+        metadata: dict[str, str],
+        content_sha256: str | None,
+    ) -> None:
+        if content_sha256 is None:
+            await self.s3_client.put_object(
+                Body=make_request_body(file_content),
+                Bucket=bucket_name,
+                Key=object_key,
+                ContentType=content_type,
+                Metadata=metadata,
+            )
+            return
+
+        # S3 rejects the upload if the received content doesn't match the digest computed during validation
+        await self.s3_client.put_object(
+            Body=make_request_body(file_content),
+            Bucket=bucket_name,
+            Key=object_key,
+            ContentType=content_type,
+            Metadata=metadata,
+            ChecksumSHA256=_encode_checksum_sha256(content_sha256),
+        )
+
+    async def _upload_content(  # noqa: PLR0913
+        self,
+        *,
+        bucket_name: str,
+        object_key: str,
+        file_content: FileContent | typing.AsyncIterator[bytes],
+        content_type: str,
+        metadata: dict[str, str],
+        content_sha256: str | None = None,
+    ) -> int:
+        if (
+            not isinstance(file_content, typing.AsyncIterator)
+            and (file_size := get_content_size(file_content)) < self.multipart_threshold_bytes
+        ):
+            await self._put_object(
+                bucket_name=bucket_name,
+                object_key=object_key,
+                file_content=file_content,
+                content_type=content_type,
+                metadata=metadata,
+                content_sha256=content_sha256,
+            )
+            return file_size
+
+        file_parts: typing.Final = _iterate_over_parts(file_content, self.multipart_part_size_bytes)
+        first_parts: typing.Final[list[FileContent]] = []
+        first_parts_size = 0
+        async for one_part in file_parts:
+            first_parts.append(one_part)
+            first_parts_size += get_content_size(one_part)
+            if first_parts_size >= self.multipart_threshold_bytes:
+                return await self._upload_parts(
+                    bucket_name=bucket_name,
+                    object_key=object_key,
+                    file_parts=_prepend_chunks(first_parts, file_parts),
+                    content_type=content_type,
+                    metadata=metadata,
+                    send_checksums=content_sha256 is not None,
+                )
+
+        await self._put_object(
+            bucket_name=bucket_name,
+            object_key=object_key,
+            file_content=b"".join(first_parts),
+            content_type=content_type,
+            metadata=metadata,
+            content_sha256=content_sha256,
+        )
+        return first_parts_size
+
+    async def _invalidate_cached_file(self, s3_path: str) -> None:
+        # reads arriving from now on send their own GET instead of joining one sent before the write
+        self._in_flight_reads.pop(s3_path, None)
+        # a deleted or overwritten object no longer holds the content its key was derived from
+        if self.existing_object_cache is not None:
+            self.existing_object_cache.discard(s3_path)
+        if self.file_read_cache is not None:
+            await self.file_read_cache.invalidate(s3_path)
 
     async def upload_file(
         self,
@@ -36,68 +375,851 @@ class S3Service:
         object_key: str,
         metadata: dict[str, str] | None = None,
     ) -> UploadedFile:
-        await self.s3_client.put_object(
-            Body=validated_file.file_content,
-            Bucket=bucket_name,
-            Key=object_key,
-            ContentType=validated_file.mime_type,
-            Metadata=metadata or {},
+        with measure_stage(self.stage_recorder, "upload_file") as stage_timer:
+            stage_timer.set_attributes(file_size_bytes=validated_file.file_size)
+            await self._upload_content(
+                bucket_name=bucket_name,
+                object_key=object_key,
+                file_content=validated_file.file_content,
+                content_type=validated_file.mime_type,
+                metadata=metadata or {},
+            )
+        await self._invalidate_cached_file(f"{bucket_name}/{object_key}")
+        return UploadedFile(
+            file_name=validated_file.file_name,
+            file_size=validated_file.file_size,
+            mime_type=validated_file.mime_type,
+            s3_path=f"{bucket_name}/{object_key}",
         )
+
+    async def _content_object_exists(self, *, bucket_name: str, object_key: str) -> bool:
+        s3_path: typing.Final = f"{bucket_name}/{object_key}"
+        if self.existing_object_cache is not None and self.existing_object_cache.contains(s3_path):
+            return True
+        try:
+            await self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        except ClientError as client_error:
+            if client_error.response.get("Error", {}).get("Code") in _MISSING_OBJECT_ERROR_CODES:
+                return False
+            raise
+        if self.existing_object_cache is not None:
+            self.existing_object_cache.add(s3_path)
+        return True
+
+    async def upload_file_by_content(
+        self,
+        validated_file: ValidatedFile,
+        *,
+        bucket_name: str,
+        object_key_prefix: str = "",
+        metadata: dict[str, str] | None = None,
+    ) -> UploadedFile:
+        # the key is the SHA-256 of the content, so identical files share one object and repeated uploads are skipped,
+        # metadata is the one of the first upload
+        content_sha256: typing.Final = validated_file.content_sha256 or compute_content_sha256(
+            validated_file.file_content
+        )
+        object_key: typing.Final = f"{object_key_prefix}{content_sha256}"
+        with measure_stage(self.stage_recorder, "upload_file_by_content") as stage_timer:
+            stage_timer.set_attributes(file_size_bytes=validated_file.file_size)
+            deduplicated: typing.Final = await self._content_object_exists(
+                bucket_name=bucket_name, object_key=object_key
+            )
+            stage_timer.set_attributes(deduplicated=deduplicated)
+            if not deduplicated:
+                await self._upload_content(
+                    bucket_name=bucket_name,
+                    object_key=object_key,
+                    file_content=validated_file.file_content,
+                    content_type=validated_file.mime_type,
+                    metadata=metadata or {},
+                    content_sha256=content_sha256,
+                )
+                if self.existing_object_cache is not None:
+                    self.existing_object_cache.add(f"{bucket_name}/{object_key}")
         return UploadedFile(
             file_name=validated_file.file_name,
-            file_content=validated_file.file_content,
             file_size=validated_file.file_size,
             mime_type=validated_file.mime_type,
             s3_path=f"{bucket_name}/{object_key}",
+            deduplicated=deduplicated,
         )
 
-    async def _retrieve_file_object(self, *, s3_path: str) -> GetObjectOutputTypeDef:
+    async def upload_image_renditions(
+        self,
+        validated_renditions: typing.Sequence[ValidatedImageRendition],
+        *,
+        bucket_name: str,
+        object_key: str,
+        metadata: dict[str, str] | None = None,
+    ) -> list[UploadedFile]:
+        # every rendition goes to its own key under object_key, e.g. avatars/42/thumbnail
+        return list(
+            await asyncio.gather(
+                *(
+                    self.upload_file(
+                        one_rendition,
+                        bucket_name=bucket_name,
+                        object_key=f"{object_key}/{one_rendition.rendition_name}",
+                        metadata=metadata,
+                    )
+                    for one_rendition in validated_renditions
+                )
+            )
+        )
+
+    async def upload_file_stream(
+        self,
+        validated_file_stream: ValidatedFileStream,
+        *,
+        bucket_name: str,
+        object_key: str,
+        metadata: dict[str, str] | None = None,
+    ) -> UploadedStreamedFile:
+        with measure_stage(self.stage_recorder, "upload_file_stream") as stage_timer:
+            file_size: typing.Final = await self._upload_content(
+                bucket_name=bucket_name,
+                object_key=object_key,
+                file_content=validated_file_stream.file_stream,
+                content_type=validated_file_stream.mime_type,
+                metadata=metadata or {},
+            )
+            stage_timer.set_attributes(file_size_bytes=file_size)
+        await self._invalidate_cached_file(f"{bucket_name}/{object_key}")
+        return UploadedStreamedFile(
+            file_name=validated_file_stream.file_name,
+            file_size=file_size,
+            mime_type=validated_file_stream.mime_type,
+            s3_path=f"{bucket_name}/{object_key}",
+        )
+
+    async def _retrieve_file_object(
+        self, *, s3_path: str, offset: int = 0, length: int | None = None
+    ) -> GetObjectOutputTypeDef:
         bucket_name, object_key = _extract_bucket_name_and_object_key(s3_path)
-        return await self.s3_client.get_object(Bucket=bucket_name, Key=object_key)
+        if offset == 0 and length is None:
+            return await self.s3_client.get_object(Bucket=bucket_name, Key=object_key)
+        return await self.s3_client.get_object(
+            Bucket=bucket_name, Key=object_key, Range=_format_byte_range(offset, length)
+        )
 
-    async def stream_file(self, *, s3_path: str, read_chunk_size: int = 70 * 1024) -> typing.AsyncIterator[bytes]:
-        file_object: typing.Final = await self._retrieve_file_object(s3_path=s3_path)
+    async def _read_file_range(
+        self, *, bucket_name: str, object_key: str, offset: int, length: int, etag: str
+    ) -> bytes:
+        file_object: typing.Final = await self.s3_client.get_object(
+            Bucket=bucket_name, Key=object_key, Range=_format_byte_range(offset, length), IfMatch=etag
+        )
+        return await file_object["Body"].read()
+
+    async def _iterate_file_ranges(
+        self, *, s3_path: str, part_size: int, offset: int, length: int | None
+    ) -> typing.AsyncIterator[bytes]:
+        # the first ranged GET also reports the object size, so no HEAD request is needed
+        bucket_name, object_key = _extract_bucket_name_and_object_key(s3_path)
+        first_part_length: typing.Final = part_size if length is None else min(part_size, length)
+        try:
+            first_part_object: typing.Final = await self.s3_client.get_object(
+                Bucket=bucket_name, Key=object_key, Range=_format_byte_range(offset, first_part_length)
+            )
+        except ClientError as client_error:
+            # S3 can't satisfy any range of an empty object
+            if offset == 0 and client_error.response.get("Error", {}).get("Code") == "InvalidRange":
+                return
+            raise
+
+        yield await first_part_object["Body"].read()
+        if not (content_range := first_part_object.get("ContentRange")):
+            return
+
+        object_size: typing.Final = int(content_range.rsplit("/", 1)[1])
+        range_end: typing.Final = object_size if length is None else min(object_size, offset + length)
+        pending_parts: typing.Final[collections.deque[asyncio.Task[bytes]]] = collections.deque()
+        part_offsets: typing.Final = iter(range(offset + first_part_length, range_end, part_size))
+        try:
+            while True:
+                for one_part_offset in itertools.islice(
+                    part_offsets, self.ranged_download_concurrency - len(pending_parts)
+                ):
+                    pending_parts.append(
+                        asyncio.create_task(
+                            self._read_file_range(
+                                bucket_name=bucket_name,
+                                object_key=object_key,
+                                offset=one_part_offset,
+                                length=min(part_size, range_end - one_part_offset),
+                                etag=first_part_object["ETag"],
+                            )
+                        )
+                    )
+                if not pending_parts:
+                    break
+                yield await pending_parts.popleft()
+        finally:
+            for one_task in pending_parts:
+                one_task.cancel()
+
+    async def _fetch_file_start(self, file_read_cache: FileReadCache, *, s3_path: str) -> _FileStart:
+        cached_file: typing.Final = await file_read_cache.get(s3_path)
+        if cached_file is not None and file_read_cache.is_fresh(cached_file):
+            return _FileStart(
+                file_content=cached_file.file_content,
+                etag=cached_file.etag,
+                file_size=len(cached_file.file_content),
+                cached=True,
+            )
+
+        bucket_name, object_key = _extract_bucket_name_and_object_key(s3_path)
+        generation: typing.Final = file_read_cache.generation
+        # a range of cacheable size, so files too large to cache aren't read twice
+        file_range: typing.Final = _format_byte_range(0, file_read_cache.max_file_size_bytes)
+        try:
+            file_object: typing.Final = (
+                await self.s3_client.get_object(Bucket=bucket_name, Key=object_key, Range=file_range)
+                if cached_file is None
+                else await self.s3_client.get_object(
+                    Bucket=bucket_name, Key=object_key, Range=file_range, IfNoneMatch=cached_file.etag
+                )
+            )
+        except ClientError as client_error:
+            error_code: typing.Final = client_error.response.get("Error", {}).get("Code")
+            if cached_file is not None and error_code == "304":
+                file_read_cache.mark_validated(s3_path)
+                return _FileStart(
+                    file_content=cached_file.file_content,
+                    etag=cached_file.etag,
+                    file_size=len(cached_file.file_content),
+                    cached=True,
+                )
+            # S3 can't satisfy any range of an empty object
+            if error_code == "InvalidRange":
+                await file_read_cache.discard(s3_path)
+                return _FileStart(file_content=b"", etag="", file_size=0, cached=False)
+            raise
+
+        file_content: typing.Final = await file_object["Body"].read()
+        file_size: typing.Final = (
+            int(content_range.rsplit("/", 1)[1])
+            if (content_range := file_object.get("ContentRange"))
+            else len(file_content)
+        )
+        if file_size == len(file_content):
+            await file_read_cache.set(
+                s3_path, etag=file_object["ETag"], file_content=file_content, generation=generation
+            )
+        else:
+            await file_read_cache.discard(s3_path)
+        return _FileStart(file_content=file_content, etag=file_object["ETag"], file_size=file_size, cached=False)
+
+    async def _read_file_start(self, file_read_cache: FileReadCache, *, s3_path: str) -> _FileStart:
+        # concurrent misses of the same file share one GET
+        if (in_flight_read := self._in_flight_reads.get(s3_path)) is not None:
+            return await asyncio.shield(in_flight_read)
+
+        read_future: typing.Final[asyncio.Future[_FileStart]] = asyncio.get_running_loop().create_future()
+        self._in_flight_reads[s3_path] = read_future
+        try:
+            file_start: typing.Final = await self._fetch_file_start(file_read_cache, s3_path=s3_path)
+        except BaseException as exc:
+            if isinstance(exc, Exception):
+                read_future.set_exception(exc)
+                read_future.exception()  # coalesced reads re-raise it, don't warn when nobody waits
+            else:
+                read_future.cancel()
+            raise
+        else:
+            read_future.set_result(file_start)
+            return file_start
+        finally:
+            # an invalidation may have dropped it already, or a newer read taken its place
+            if self._in_flight_reads.get(s3_path) is read_future:
+                del self._in_flight_reads[s3_path]
+
+    async def _stream_file_rest(
+        self, *, s3_path: str, etag: str, read_chunk_size: int, offset: int, length: int
+    ) -> typing.AsyncIterator[bytes]:
+        # the rest of a file too large to cache, If-Match fails the read if the file was replaced in between
+        bucket_name, object_key = _extract_bucket_name_and_object_key(s3_path)
+        file_object: typing.Final = await self.s3_client.get_object(
+            Bucket=bucket_name, Key=object_key, Range=_format_byte_range(offset, length), IfMatch=etag
+        )
         object_body: typing.Final = file_object["Body"]
         while one_chunk := await object_body.read(read_chunk_size):
             yield one_chunk
 
+    async def _stream_file_through_cache(
+        self, file_read_cache: FileReadCache, *, s3_path: str, read_chunk_size: int, offset: int, length: int | None
+    ) -> typing.AsyncIterator[bytes]:
+        file_start: typing.Final = await self._read_file_start(file_read_cache, s3_path=s3_path)
+        range_end: typing.Final = file_start.file_size if length is None else min(file_start.file_size, offset + length)
+        cached_range_end: typing.Final = min(range_end, len(file_start.file_content))
+        for chunk_start in range(offset, cached_range_end, read_chunk_size):
+            yield file_start.file_content[chunk_start : min(chunk_start + read_chunk_size, cached_range_end)]
+
+        rest_offset: typing.Final = max(offset, cached_range_end)
+        if rest_offset < range_end:
+            async for one_chunk in self._stream_file_rest(
+                s3_path=s3_path,
+                etag=file_start.etag,
+                read_chunk_size=read_chunk_size,
+                offset=rest_offset,
+                length=range_end - rest_offset,
+            ):
+                yield one_chunk
+
+    async def stream_file(
+        self, *, s3_path: str, read_chunk_size: int = 70 * 1024, offset: int = 0, length: int | None = None
+    ) -> typing.AsyncIterator[bytes]:
+        if offset < 0 or (length is not None and length < 0):
+            raise InvalidByteRangeError(offset=offset, length=length)
+        if length == 0:
+            return
+
+        if self.file_read_cache is not None:
+            async for one_chunk in self._stream_file_through_cache(
+                self.file_read_cache, s3_path=s3_path, read_chunk_size=read_chunk_size, offset=offset, length=length
+            ):
+                yield one_chunk
+            return
+
+        if self.ranged_download_part_size_bytes is not None:
+            async for one_part in self._iterate_file_ranges(
+                s3_path=s3_path, part_size=self.ranged_download_part_size_bytes, offset=offset, length=length
+            ):
+                for chunk_start in range(0, len(one_part), read_chunk_size):
+                    yield one_part[chunk_start : chunk_start + read_chunk_size]
+            return
+
+        file_object: typing.Final = await self._retrieve_file_object(s3_path=s3_path, offset=offset, length=length)
+        object_body: typing.Final = file_object["Body"]
+        while one_chunk := await object_body.read(read_chunk_size):
+            yield one_chunk
+
+    async def open_file(self, *, s3_path: str) -> GetObjectOutputTypeDef:
+        # one GET: ContentLength, ETag and ContentType come with the response, Body streams the content,
+        # the read-through cache is bypassed, so the stored object itself is read
+        return await self._retrieve_file_object(s3_path=s3_path)
+
     async def read_file(self, *, s3_path: str) -> bytes:
+        with measure_stage(self.stage_recorder, "read_file") as stage_timer:
+            file_content: typing.Final = (
+                await self._read_file(s3_path=s3_path)
+                if self.file_read_cache is None
+                else await self._read_file_through_cache(self.file_read_cache, s3_path=s3_path, stage_timer=stage_timer)
+            )
+            stage_timer.set_attributes(file_size_bytes=len(file_content))
+            return file_content
+
+    async def _read_file_through_cache(
+        self, file_read_cache: FileReadCache, *, s3_path: str, stage_timer: StageTimer
+    ) -> bytes:
+        file_start: typing.Final = await self._read_file_start(file_read_cache, s3_path=s3_path)
+        stage_timer.set_attributes(cached=file_start.cached)
+        if len(file_start.file_content) == file_start.file_size:
+            return file_start.file_content
+        return b"".join(
+            [
+                file_start.file_content,
+                *[
+                    one_chunk
+                    async for one_chunk in self._stream_file_rest(
+                        s3_path=s3_path,
+                        etag=file_start.etag,
+                        read_chunk_size=_CACHE_MISS_READ_CHUNK_SIZE_BYTES,
+                        offset=len(file_start.file_content),
+                        length=file_start.file_size - len(file_start.file_content),
+                    )
+                ],
+            ]
+        )
+
+    async def _read_file(self, *, s3_path: str) -> bytes:
+        if self.ranged_download_part_size_bytes is not None:
+            return b"".join(
+                [
+                    one_part
+                    async for one_part in self._iterate_file_ranges(
+                        s3_path=s3_path, part_size=self.ranged_download_part_size_bytes, offset=0, length=None
+                    )
+                ]
+            )
+
         file_object: typing.Final = await self._retrieve_file_object(s3_path=s3_path)
         return await file_object["Body"].read()
 
-    async def create_file_url(
-        self, *, s3_path: str, display_file_name: str, expires_in: datetime.timedelta, proxy_base_url: str | None = None
+    async def _can_sign_urls_locally(self, expires_in_seconds: int) -> bool:
+        # the botocore Config stubs don't declare the options passed to its constructor
+        client_config: typing.Final[typing.Any] = self.s3_client.meta.config
+        if (
+            client_config.signature_version != "s3v4"
+            or not self.s3_client.meta.region_name
+            or expires_in_seconds > _MAX_SIGV4_EXPIRES_IN_SECONDS
+        ):
+            return False
+        # signature_version reads s3v4 on default clients too, but without an explicit one botocore presigns with
+        # SigV2 in regions that still support it, so ask its choose-signer handlers like generate_presigned_url does
+        client_events: typing.Final[typing.Any] = self.s3_client.meta.events
+        _, chosen_signature_version = await client_events.emit_until_response(
+            "choose-signer.s3.GetObject",
+            signing_name="s3",
+            region_name=self.s3_client.meta.region_name,
+            signature_version="s3v4-query",
+            context={},
+        )
+        if chosen_signature_version not in {None, "s3v4-query"}:
+            return False
+        addressing_style: typing.Final = (client_config.s3 or {}).get("addressing_style", "auto")
+        # botocore switches to virtual-hosted URLs for AWS endpoints unless path-style is forced
+        return addressing_style == "path" or (
+            addressing_style == "auto" and not self.s3_client.meta.endpoint_url.endswith(".amazonaws.com")
+        )
+
+    async def _build_presigned_url_signer(self, expires_in_seconds: int) -> PresignedUrlSigner | None:
+        if not await self._can_sign_urls_locally(expires_in_seconds):
+            return None
+        credentials: typing.Final = self.s3_client._get_credentials()  # type: ignore[attr-defined] # noqa: SLF001
+        if credentials is None:
+            return None
+
+        return PresignedUrlSigner.create(
+            endpoint_url=self.s3_client.meta.endpoint_url,
+            region_name=self.s3_client.meta.region_name,
+            credentials=await credentials.get_frozen_credentials(),
+            signed_at=datetime.datetime.now(datetime.timezone.utc),
+        )
+
+    async def _presign_file_url(
+        self,
+        *,
+        s3_path: str,
+        display_file_name: str,
+        expires_in_seconds: int,
+        presigned_url_signer: PresignedUrlSigner | None,
     ) -> str:
         bucket_name, object_key = _extract_bucket_name_and_object_key(s3_path)
-        expires_in_seconds: typing.Final = round(expires_in.total_seconds())
-        presigned_url: typing.Final = await self.s3_client.generate_presigned_url(
+        content_disposition: typing.Final = f'inline; filename="{display_file_name}"'
+        cache_control: typing.Final = f"max-age={expires_in_seconds}, public"
+        if presigned_url_signer is not None:
+            return presigned_url_signer.sign_get_object_url(
+                bucket_name=bucket_name,
+                object_key=object_key,
+                expires_in_seconds=expires_in_seconds,
+                response_params={
+                    "response-content-disposition": content_disposition,
+                    "response-cache-control": cache_control,
+                },
+            )
+        return await self.s3_client.generate_presigned_url(
             "get_object",
             Params={
                 "Bucket": bucket_name,
                 "Key": object_key,
-                "ResponseContentDisposition": f'inline; filename="{display_file_name}"',
-                "ResponseCacheControl": f"max-age={expires_in_seconds}, public",
+                "ResponseContentDisposition": content_disposition,
+                "ResponseCacheControl": cache_control,
             },
             ExpiresIn=expires_in_seconds,
         )
 
-        if proxy_base_url is None:
-            return presigned_url
-        if presigned_url == (
-            presigned_url_without_prefix := presigned_url.removeprefix(
-                self.s3_client.meta.endpoint_url.removesuffix("/")
+    async def create_file_urls(
+        self,
+        *,
+        s3_paths_and_display_file_names: typing.Iterable[tuple[str, str]],
+        expires_in: datetime.timedelta,
+        proxy_base_url: str | None = None,
+    ) -> list[str]:
+        expires_in_seconds: typing.Final = round(expires_in.total_seconds())
+        with measure_stage(self.stage_recorder, "create_file_urls") as stage_timer:
+            file_urls: typing.Final = await self._create_file_urls(
+                s3_paths_and_display_file_names=s3_paths_and_display_file_names,
+                expires_in_seconds=expires_in_seconds,
+                proxy_base_url=proxy_base_url,
+            )
+            stage_timer.set_attributes(file_urls_count=len(file_urls))
+            return file_urls
+
+    async def _create_file_urls(
+        self,
+        *,
+        s3_paths_and_display_file_names: typing.Iterable[tuple[str, str]],
+        expires_in_seconds: int,
+        proxy_base_url: str | None,
+    ) -> list[str]:
+        s3_base_url: typing.Final = self.s3_client.meta.endpoint_url.removesuffix("/")
+        replacement_base_url: typing.Final = None if proxy_base_url is None else proxy_base_url.removesuffix("/")
+        presigned_url_signer: typing.Final = await self._build_presigned_url_signer(expires_in_seconds)
+        file_urls: typing.Final[list[str]] = []
+        for s3_path, display_file_name in s3_paths_and_display_file_names:
+            cache_key = (s3_path, display_file_name, expires_in_seconds, replacement_base_url)
+            if self.presigned_url_cache is not None and (cached_url := self.presigned_url_cache.get(cache_key)):
+                file_urls.append(cached_url)
+                continue
+
+            presigned_url = await self._presign_file_url(
+                s3_path=s3_path,
+                display_file_name=display_file_name,
+                expires_in_seconds=expires_in_seconds,
+                presigned_url_signer=presigned_url_signer,
+            )
+            if proxy_base_url is not None and replacement_base_url is not None:
+                if not presigned_url.startswith(s3_base_url):
+                    raise FailedToReplaceS3BaseUrlWithProxyBaseUrlError(
+                        s3_file_presigned_url=presigned_url, proxy_base_url=proxy_base_url
+                    )
+                presigned_url = replacement_base_url + presigned_url[len(s3_base_url) :]
+
+            if self.presigned_url_cache is not None:
+                self.presigned_url_cache.set(cache_key, presigned_url, expires_in_seconds=expires_in_seconds)
+            file_urls.append(presigned_url)
+        return file_urls
+
+    async def create_file_url(
+        self, *, s3_path: str, display_file_name: str, expires_in: datetime.timedelta, proxy_base_url: str | None = None
+    ) -> str:
+        return (
+            await self.create_file_urls(
+                s3_paths_and_display_file_names=[(s3_path, display_file_name)],
+                expires_in=expires_in,
+                proxy_base_url=proxy_base_url,
             )
+        )[0]
+
+    async def _copy_part(  # noqa: PLR0913
+        self,
+        *,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        copy_source: CopySourceTypeDef,
+        copy_source_range: str,
+        source_etag: str,
+        semaphore: asyncio.Semaphore,
+    ) -> CompletedPartTypeDef:
+        async with semaphore:
+            copied_part: typing.Final = await self.s3_client.upload_part_copy(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                CopySource=copy_source,
+                CopySourceRange=copy_source_range,
+                CopySourceIfMatch=source_etag,
+            )
+        return {"ETag": copied_part["CopyPartResult"]["ETag"], "PartNumber": part_number}
+
+    async def _copy_parts(  # noqa: PLR0913
+        self,
+        *,
+        bucket_name: str,
+        object_key: str,
+        copy_source: CopySourceTypeDef,
+        source_head: HeadObjectOutputTypeDef,
+        content_type: str,
+        metadata: dict[str, str],
+    ) -> None:
+        multipart_upload: typing.Final = await self.s3_client.create_multipart_upload(
+            Bucket=bucket_name, Key=object_key, ContentType=content_type, Metadata=metadata
+        )
+        upload_id: typing.Final = multipart_upload["UploadId"]
+        semaphore: typing.Final = asyncio.Semaphore(self.multipart_concurrency)
+        part_copies: typing.Final = [
+            asyncio.create_task(
+                self._copy_part(
+                    bucket_name=bucket_name,
+                    object_key=object_key,
+                    upload_id=upload_id,
+                    part_number=part_number,
+                    copy_source=copy_source,
+                    copy_source_range=_format_byte_range(
+                        part_start, min(self.copy_part_size_bytes, source_head["ContentLength"] - part_start)
+                    ),
+                    source_etag=source_head["ETag"],
+                    semaphore=semaphore,
+                )
+            )
+            for part_number, part_start in enumerate(
+                range(0, source_head["ContentLength"], self.copy_part_size_bytes), start=1
+            )
+        ]
+        try:
+            completed_parts: typing.Final = await asyncio.gather(*part_copies)
+            await self.s3_client.complete_multipart_upload(
+                Bucket=bucket_name, Key=object_key, UploadId=upload_id, MultipartUpload={"Parts": completed_parts}
+            )
+        except BaseException:
+            for one_task in part_copies:
+                one_task.cancel()
+            await asyncio.gather(*part_copies, return_exceptions=True)
+            await self.s3_client.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+            raise
+
+    async def copy_file(
+        self,
+        *,
+        source_s3_path: str,
+        s3_path: str,
+        content_type: str | None = None,
+        metadata: dict[str, str] | None = None,
+    ) -> CopiedFile:
+        # content_type and metadata replace the ones of the source object, None keeps them
+        source_bucket_name, source_object_key = _extract_bucket_name_and_object_key(source_s3_path)
+        bucket_name, object_key = _extract_bucket_name_and_object_key(s3_path)
+        copy_source: typing.Final[CopySourceTypeDef] = {"Bucket": source_bucket_name, "Key": source_object_key}
+        # the size decides between CopyObject and UploadPartCopy, metadata has to be resent when only one part changes
+        source_head: typing.Final = await self.s3_client.head_object(Bucket=source_bucket_name, Key=source_object_key)
+        target_content_type: typing.Final = content_type or source_head.get("ContentType", "binary/octet-stream")
+        target_metadata: typing.Final = source_head.get("Metadata", {}) if metadata is None else metadata
+        copied_file: typing.Final = CopiedFile(
+            source_s3_path=source_s3_path,
+            s3_path=f"{bucket_name}/{object_key}",
+            file_size=source_head["ContentLength"],
+            mime_type=target_content_type,
+        )
+        # S3 rejects copying an object onto itself without changing anything, and there's nothing to change
+        if (
+            (source_bucket_name, source_object_key) == (bucket_name, object_key)
+            and content_type is None
+            and metadata is None
         ):
-            raise FailedToReplaceS3BaseUrlWithProxyBaseUrlError(
-                s3_file_presigned_url=presigned_url, proxy_base_url=proxy_base_url
+            return copied_file
+
+        if source_head["ContentLength"] > _MAX_COPY_OBJECT_SIZE_BYTES:
+            await self._copy_parts(
+                bucket_name=bucket_name,
+                object_key=object_key,
+                copy_source=copy_source,
+                source_head=source_head,
+                content_type=target_content_type,
+                metadata=target_metadata,
+            )
+        elif content_type is None and metadata is None:
+            await self.s3_client.copy_object(
+                Bucket=bucket_name,
+                Key=object_key,
+                CopySource=copy_source,
+                CopySourceIfMatch=source_head["ETag"],
+                MetadataDirective="COPY",
+            )
+        else:
+            await self.s3_client.copy_object(
+                Bucket=bucket_name,
+                Key=object_key,
+                CopySource=copy_source,
+                CopySourceIfMatch=source_head["ETag"],
+                MetadataDirective="REPLACE",
+                ContentType=target_content_type,
+                Metadata=target_metadata,
+            )
+        await self._invalidate_cached_file(f"{bucket_name}/{object_key}")
+        return copied_file
+
+    async def move_file(
+        self,
+        *,
+        source_s3_path: str,
+        s3_path: str,
+        content_type: str | None = None,
+        metadata: dict[str, str] | None = None,
+    ) -> CopiedFile:
+        copied_file: typing.Final = await self.copy_file(
+            source_s3_path=source_s3_path, s3_path=s3_path, content_type=content_type, metadata=metadata
+        )
+        # moving a file onto itself at most replaces its content type or metadata, deleting would lose it
+        if _extract_bucket_name_and_object_key(source_s3_path) != _extract_bucket_name_and_object_key(s3_path):
+            await self.delete_file(s3_path=source_s3_path)
+        return copied_file
+
+    async def _copy_one_of_many_files(  # noqa: PLR0913
+        self,
+        *,
+        source_s3_path: str,
+        s3_path: str,
+        delete_source: bool,
+        content_type: str | None,
+        metadata: dict[str, str] | None,
+        semaphore: asyncio.Semaphore,
+    ) -> FileCopyResult:
+        copy_method: typing.Final = self.move_file if delete_source else self.copy_file
+        async with semaphore:
+            try:
+                copied_file: typing.Final = await copy_method(
+                    source_s3_path=source_s3_path, s3_path=s3_path, content_type=content_type, metadata=metadata
+                )
+            except ClientError as client_error:
+                return FileCopyResult(source_s3_path=source_s3_path, s3_path=s3_path, error=client_error)
+        return FileCopyResult(source_s3_path=source_s3_path, s3_path=s3_path, copied_file=copied_file)
+
+    async def _copy_many_files(
+        self,
+        *,
+        source_and_target_s3_paths: typing.Sequence[tuple[str, str]],
+        delete_source: bool,
+        content_type: str | None,
+        metadata: dict[str, str] | None,
+        max_concurrent_requests: int,
+    ) -> list[FileCopyResult]:
+        for source_s3_path, s3_path in source_and_target_s3_paths:
+            _extract_bucket_name_and_object_key(source_s3_path)
+            _extract_bucket_name_and_object_key(s3_path)
+        semaphore: typing.Final = asyncio.Semaphore(max_concurrent_requests)
+        return list(
+            await asyncio.gather(
+                *(
+                    self._copy_one_of_many_files(
+                        source_s3_path=source_s3_path,
+                        s3_path=s3_path,
+                        delete_source=delete_source,
+                        content_type=content_type,
+                        metadata=metadata,
+                        semaphore=semaphore,
+                    )
+                    for source_s3_path, s3_path in source_and_target_s3_paths
+                )
             )
-        return proxy_base_url.removesuffix("/") + presigned_url_without_prefix
+        )
+
+    async def copy_files(
+        self,
+        *,
+        source_and_target_s3_paths: typing.Sequence[tuple[str, str]],
+        content_type: str | None = None,
+        metadata: dict[str, str] | None = None,
+        max_concurrent_requests: int = 8,
+    ) -> list[FileCopyResult]:
+        return await self._copy_many_files(
+            source_and_target_s3_paths=source_and_target_s3_paths,
+            delete_source=False,
+            content_type=content_type,
+            metadata=metadata,
+            max_concurrent_requests=max_concurrent_requests,
+        )
+
+    async def move_files(
+        self,
+        *,
+        source_and_target_s3_paths: typing.Sequence[tuple[str, str]],
+        content_type: str | None = None,
+        metadata: dict[str, str] | None = None,
+        max_concurrent_requests: int = 8,
+    ) -> list[FileCopyResult]:
+        return await self._copy_many_files(
+            source_and_target_s3_paths=source_and_target_s3_paths,
+            delete_source=True,
+            content_type=content_type,
+            metadata=metadata,
+            max_concurrent_requests=max_concurrent_requests,
+        )
 
     async def delete_file(self, *, s3_path: str) -> bool:
         bucket_name, object_key = _extract_bucket_name_and_object_key(s3_path)
         await self.s3_client.delete_object(Bucket=bucket_name, Key=object_key)
+        await self._invalidate_cached_file(f"{bucket_name}/{object_key}")
         return True
 
+    async def _delete_objects_batch(
+        self, *, bucket_name: str, object_keys: list[str], semaphore: asyncio.Semaphore
+    ) -> dict[str, tuple[str, str]]:
+        try:
+            async with semaphore:
+                deleted_objects: typing.Final = await self.s3_client.delete_objects(
+                    Bucket=bucket_name,
+                    Delete={"Objects": [{"Key": one_object_key} for one_object_key in object_keys], "Quiet": True},
+                )
+        except Exception as exc:  # noqa: BLE001
+            # a failed batch fails its keys only, the other batches keep their results
+            batch_error: typing.Final = (
+                (exc.response.get("Error", {}).get("Code", ""), exc.response.get("Error", {}).get("Message", ""))
+                if isinstance(exc, ClientError)
+                else (type(exc).__name__, str(exc))
+            )
+            return dict.fromkeys(object_keys, batch_error)
+        # in quiet mode S3 reports only the keys it failed to delete
+        return {
+            one_error["Key"]: (one_error.get("Code", ""), one_error.get("Message", ""))
+            for one_error in deleted_objects.get("Errors", [])
+        }
+
+    async def delete_files(
+        self, *, s3_paths: typing.Sequence[str], max_concurrent_requests: int = 4
+    ) -> list[FileDeletionResult]:
+        object_keys_by_bucket: typing.Final[dict[str, dict[str, None]]] = collections.defaultdict(dict)
+        for one_s3_path in s3_paths:
+            bucket_name, object_key = _extract_bucket_name_and_object_key(one_s3_path)
+            object_keys_by_bucket[bucket_name][object_key] = None
+
+        semaphore: typing.Final = asyncio.Semaphore(max_concurrent_requests)
+        batch_buckets: typing.Final[list[str]] = []
+        batch_deletions: typing.Final[list[typing.Awaitable[dict[str, tuple[str, str]]]]] = []
+        for bucket_name, unique_object_keys in object_keys_by_bucket.items():
+            object_keys = list(unique_object_keys)
+            for batch_start in range(0, len(object_keys), _MAX_DELETE_OBJECTS_KEYS_COUNT):
+                batch_buckets.append(bucket_name)
+                batch_deletions.append(
+                    self._delete_objects_batch(
+                        bucket_name=bucket_name,
+                        object_keys=object_keys[batch_start : batch_start + _MAX_DELETE_OBJECTS_KEYS_COUNT],
+                        semaphore=semaphore,
+                    )
+                )
+        try:
+            deletion_errors: typing.Final = {
+                (bucket_name, object_key): one_error
+                for bucket_name, batch_errors in zip(batch_buckets, await asyncio.gather(*batch_deletions), strict=True)
+                for object_key, one_error in batch_errors.items()
+            }
+        finally:
+            # even when cancelled, some batches may have deleted their keys already
+            for bucket_name, unique_object_keys in object_keys_by_bucket.items():
+                for one_object_key in unique_object_keys:
+                    await self._invalidate_cached_file(f"{bucket_name}/{one_object_key}")
+
+        deletion_results: typing.Final[list[FileDeletionResult]] = []
+        for one_s3_path in s3_paths:
+            if deletion_error := deletion_errors.get(_extract_bucket_name_and_object_key(one_s3_path)):
+                deletion_results.append(
+                    FileDeletionResult(
+                        s3_path=one_s3_path, error_code=deletion_error[0], error_message=deletion_error[1]
+                    )
+                )
+            else:
+                deletion_results.append(FileDeletionResult(s3_path=one_s3_path))
+        return deletion_results
+
     async def collect_file_head(self, *, s3_path: str) -> HeadObjectOutputTypeDef:
         bucket_name, object_key = _extract_bucket_name_and_object_key(s3_path)
         return await self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+
+    async def _collect_one_of_many_file_heads(self, *, s3_path: str, semaphore: asyncio.Semaphore) -> FileHeadResult:
+        async with semaphore:
+            try:
+                return FileHeadResult(s3_path=s3_path, file_head=await self.collect_file_head(s3_path=s3_path))
+            except ClientError as client_error:
+                return FileHeadResult(s3_path=s3_path, error=client_error)
+
+    async def collect_file_heads(
+        self, *, s3_paths: typing.Sequence[str], max_concurrent_requests: int = 32
+    ) -> list[FileHeadResult]:
+        for one_s3_path in s3_paths:
+            _extract_bucket_name_and_object_key(one_s3_path)
+        semaphore: typing.Final = asyncio.Semaphore(max_concurrent_requests)
+        return list(
+            await asyncio.gather(
+                *(
+                    self._collect_one_of_many_file_heads(s3_path=one_s3_path, semaphore=semaphore)
+                    for one_s3_path in s3_paths
+                )
+            )
+        )
+
+    async def list_object_keys(
+        self, *, bucket_name: str, prefix: str = "", start_after: str | None = None
+    ) -> typing.AsyncIterator[str]:
+        # keys in lexicographic order, each page starts after the last key of the previous one,
+        # so a listing can be resumed from any key it has yielded
+        last_key: str = start_after or ""
+        while True:
+            listing = await self.s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, StartAfter=last_key)
+            for one_object in listing.get("Contents", []):
+                last_key = one_object["Key"]
+                yield last_key
+            if not listing.get("IsTruncated"):
+                return
@@ -0,0 +1,135 @@
+import asyncio
+import bisect
+import collections
+import contextlib
+import dataclasses
+import time
+import typing
+
+from safe_s3_storage.exceptions import ScanQueueWaitTimeoutError, TooManyQueuedScansError
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class _QueuedScan:
+    priority: float
+    admission_key: str | None
+    admitted: asyncio.Future[None]
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class ScanAdmissionController:
+    max_in_flight_scans: int = 32
+    # limit per admission key, e.g. tenant, so a burst of one tenant can't take all slots
+    max_in_flight_scans_per_key: int | None = None
+    # None queues without bound
+    max_queued_scans: int | None = None
+    # scans waiting longer fail, new scans that would have to queue fail right away while the average recent wait
+    # is above early_rejection_wait_ratio of it, timed out scans count as waiting exactly max_queue_wait_seconds
+    max_queue_wait_seconds: float | None = None
+    early_rejection_wait_ratio: float = 0.8
+    # queued scans are ordered by arrival time plus size divided by this rate,
+    # so small scans overtake a large one queued shortly before them
+    size_weight_bytes_per_second: float = 10 * 1024 * 1024  # 10 MB/s
+    queue_wait_ewma_weight: float = 0.3
+    clock: typing.Callable[[], float] = time.monotonic
+    # use them as backpressure signal
+    in_flight_scans: int = dataclasses.field(default=0, init=False)
+    queue_wait_ewma_seconds: float = dataclasses.field(default=0.0, init=False)
+    _in_flight_scans_per_key: collections.Counter[str] = dataclasses.field(
+        default_factory=collections.Counter, init=False
+    )
+    _queue: list[_QueuedScan] = dataclasses.field(default_factory=list, init=False)
+
+    @property
+    def queued_scans(self) -> int:
+        return len(self._queue)
+
+    def count_in_flight_scans(self, admission_key: str) -> int:
+        return self._in_flight_scans_per_key[admission_key]
+
+    def _has_free_slot(self, admission_key: str | None) -> bool:
+        return self.in_flight_scans < self.max_in_flight_scans and (
+            admission_key is None
+            or self.max_in_flight_scans_per_key is None
+            or self._in_flight_scans_per_key[admission_key] < self.max_in_flight_scans_per_key
+        )
+
+    def _take_slot(self, admission_key: str | None) -> None:
+        self.in_flight_scans += 1
+        if admission_key is not None:
+            self._in_flight_scans_per_key[admission_key] += 1
+
+    def _record_queue_wait(self, queue_wait_seconds: float) -> None:
+        self.queue_wait_ewma_seconds = (
+            self.queue_wait_ewma_weight * queue_wait_seconds
+            + (1 - self.queue_wait_ewma_weight) * self.queue_wait_ewma_seconds
+        )
+
+    def _admit_queued_scans(self) -> None:
+        # scans blocked by their key limit don't hold up the ones behind them
+        for one_scan in self._queue:
+            if self.in_flight_scans >= self.max_in_flight_scans:
+                break
+            if self._has_free_slot(one_scan.admission_key):
+                self._take_slot(one_scan.admission_key)
+                one_scan.admitted.set_result(None)
+        self._queue = [one_scan for one_scan in self._queue if not one_scan.admitted.done()]
+
+    async def acquire(self, *, admission_key: str | None, size_bytes: int) -> float:
+        # returns seconds spent in the queue, every acquire needs a release
+        if self._has_free_slot(admission_key):
+            self._take_slot(admission_key)
+            self._record_queue_wait(0.0)
+            return 0.0
+        if self.max_queued_scans is not None and len(self._queue) >= self.max_queued_scans:
+            raise TooManyQueuedScansError(queued_scans=len(self._queue), max_queued_scans=self.max_queued_scans)
+        if (
+            self.max_queue_wait_seconds is not None
+            and self.queue_wait_ewma_seconds >= self.max_queue_wait_seconds * self.early_rejection_wait_ratio
+        ):
+            raise ScanQueueWaitTimeoutError(
+                queue_wait_seconds=self.queue_wait_ewma_seconds, max_queue_wait_seconds=self.max_queue_wait_seconds
+            )
+
+        queued_at: typing.Final = self.clock()
+        queued_scan: typing.Final = _QueuedScan(
+            priority=queued_at + size_bytes / self.size_weight_bytes_per_second,
+            admission_key=admission_key,
+            admitted=asyncio.get_running_loop().create_future(),
+        )
+        bisect.insort(self._queue, queued_scan, key=lambda one_scan: one_scan.priority)
+        try:
+            await asyncio.wait_for(asyncio.shield(queued_scan.admitted), timeout=self.max_queue_wait_seconds)
+        except BaseException as exc:
+            if queued_scan.admitted.done():
+                # admitted while the wait was being cancelled, hand the slot to the next scan
+                self.release(admission_key=admission_key)
+            else:
+                queued_scan.admitted.cancel()
+                self._queue.remove(queued_scan)
+            if not isinstance(exc, asyncio.TimeoutError) or self.max_queue_wait_seconds is None:
+                raise
+            self._record_queue_wait(self.max_queue_wait_seconds)
+            raise ScanQueueWaitTimeoutError(
+                queue_wait_seconds=self.clock() - queued_at, max_queue_wait_seconds=self.max_queue_wait_seconds
+            ) from exc
+
+        queue_wait_seconds: typing.Final = self.clock() - queued_at
+        self._record_queue_wait(queue_wait_seconds)
+        return queue_wait_seconds
+
+    def release(self, *, admission_key: str | None) -> None:
+        self.in_flight_scans -= 1
+        if admission_key is not None:
+            self._in_flight_scans_per_key[admission_key] -= 1
+            if not self._in_flight_scans_per_key[admission_key]:
+                del self._in_flight_scans_per_key[admission_key]
+        self._admit_queued_scans()
+
+    @contextlib.asynccontextmanager
+    async def admit(self, *, admission_key: str | None, size_bytes: int) -> typing.AsyncIterator[float]:
+        queue_wait_seconds: typing.Final = await self.acquire(admission_key=admission_key, size_bytes=size_bytes)
+        try:
+            yield queue_wait_seconds
+        finally:
+            self.release(admission_key=admission_key)
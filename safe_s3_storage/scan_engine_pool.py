@@ -0,0 +1,86 @@
+import asyncio
+import dataclasses
+import enum
+import typing
+
+from safe_s3_storage.circuit_breaker import CircuitBreaker, CircuitBreakerState
+
+
+class LoadBalancingStrategy(str, enum.Enum):
+    least_outstanding_requests = enum.auto()
+    lowest_latency = enum.auto()
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class ScanEngineEndpoint:
+    service_url: str
+    # an open circuit ejects the endpoint until its recovery timeout passes
+    circuit_breaker: CircuitBreaker
+    outstanding_requests: int = 0
+    latency_ewma_seconds: float | None = None
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class ScanEngineEndpointPool:
+    service_urls: list[str]
+    load_balancing_strategy: LoadBalancingStrategy = LoadBalancingStrategy.least_outstanding_requests
+    max_concurrent_requests_per_endpoint: int | None = None
+    latency_ewma_weight: float = 0.3
+    circuit_breaker_factory: typing.Callable[[], CircuitBreaker] = CircuitBreaker
+    endpoints: list[ScanEngineEndpoint] = dataclasses.field(init=False)
+    _endpoint_released: asyncio.Condition = dataclasses.field(init=False)
+
+    def __post_init__(self) -> None:
+        self.endpoints = [
+            ScanEngineEndpoint(service_url=one_service_url, circuit_breaker=self.circuit_breaker_factory())
+            for one_service_url in self.service_urls
+        ]
+        self._endpoint_released = asyncio.Condition()
+
+    def _score_endpoint(self, endpoint: ScanEngineEndpoint) -> float:
+        if self.load_balancing_strategy == LoadBalancingStrategy.least_outstanding_requests:
+            return endpoint.outstanding_requests
+        # endpoints without latency samples yet score 0, so they get probed first
+        return (endpoint.latency_ewma_seconds or 0) * (endpoint.outstanding_requests + 1)
+
+    def _has_free_slot(self, endpoint: ScanEngineEndpoint) -> bool:
+        return (
+            self.max_concurrent_requests_per_endpoint is None
+            or endpoint.outstanding_requests < self.max_concurrent_requests_per_endpoint
+        )
+
+    async def acquire_endpoint(self) -> ScanEngineEndpoint | None:
+        async with self._endpoint_released:
+            while True:
+                healthy_endpoints = [
+                    one_endpoint
+                    for one_endpoint in self.endpoints
+                    if one_endpoint.circuit_breaker.state != CircuitBreakerState.open
+                ]
+                if not healthy_endpoints:
+                    return None
+
+                for one_endpoint in sorted(filter(self._has_free_slot, healthy_endpoints), key=self._score_endpoint):
+                    if one_endpoint.circuit_breaker.allows_request():
+                        one_endpoint.outstanding_requests += 1
+                        return one_endpoint
+                await self._endpoint_released.wait()
+
+    async def release_endpoint(
+        self, endpoint: ScanEngineEndpoint, *, succeeded: bool | None, latency_seconds: float
+    ) -> None:
+        async with self._endpoint_released:
+            endpoint.outstanding_requests -= 1
+            if succeeded is None:
+                endpoint.circuit_breaker.record_cancellation()
+            elif succeeded:
+                endpoint.circuit_breaker.record_success()
+                endpoint.latency_ewma_seconds = (
+                    latency_seconds
+                    if endpoint.latency_ewma_seconds is None
+                    else self.latency_ewma_weight * latency_seconds
+                    + (1 - self.latency_ewma_weight) * endpoint.latency_ewma_seconds
+                )
+            else:
+                endpoint.circuit_breaker.record_failure()
+            self._endpoint_released.notify_all()
@@ -0,0 +1,57 @@
+import collections
+import dataclasses
+import math
+import typing
+
+
+_HEDGE_DELAY_UPDATE_INTERVAL: typing.Final = 16  # samples, sorting the window on every scan is wasted work
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class ScanHedgingPolicy:
+    # a duplicate scan is sent once the first one runs longer than this percentile of recent scan latencies
+    latency_percentile: float = 0.95
+    min_hedge_delay_seconds: float = 0.01
+    latency_window_size: int = 1000
+    # no hedging until enough latencies are known
+    min_latency_samples: int = 20
+    # every scan earns this many hedges, e.g. at most 5% extra requests, unused hedges pile up to max_hedge_burst
+    max_extra_requests_ratio: float = 0.05
+    max_hedge_burst: float = 10
+    _latencies: collections.deque[float] = dataclasses.field(init=False)
+    _samples_since_update: int = dataclasses.field(default=0, init=False)
+    _hedge_delay_seconds: float | None = dataclasses.field(default=None, init=False)
+    _hedge_budget: float = dataclasses.field(default=0.0, init=False)
+
+    def __post_init__(self) -> None:
+        self._latencies = collections.deque(maxlen=self.latency_window_size)
+
+    @property
+    def hedge_delay_seconds(self) -> float | None:
+        return self._hedge_delay_seconds
+
+    def record_latency(self, latency_seconds: float) -> None:
+        self._latencies.append(latency_seconds)
+        self._samples_since_update += 1
+        if len(self._latencies) < self.min_latency_samples or (
+            self._hedge_delay_seconds is not None and self._samples_since_update < _HEDGE_DELAY_UPDATE_INTERVAL
+        ):
+            return
+
+        sorted_latencies: typing.Final = sorted(self._latencies)
+        percentile_index: typing.Final = min(
+            len(sorted_latencies) - 1, math.ceil(self.latency_percentile * len(sorted_latencies)) - 1
+        )
+        self._hedge_delay_seconds = max(self.min_hedge_delay_seconds, sorted_latencies[percentile_index])
+        self._samples_since_update = 0
+
+    def start_scan(self) -> float | None:
+        # returns the delay before hedging this scan, None while latencies are unknown
+        self._hedge_budget = min(self.max_hedge_burst, self._hedge_budget + self.max_extra_requests_ratio)
+        return self._hedge_delay_seconds
+
+    def allows_hedge(self) -> bool:
+        if self._hedge_budget < 1:
+            return False
+        self._hedge_budget -= 1
+        return True
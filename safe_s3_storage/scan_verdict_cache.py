@@ -0,0 +1,42 @@
+import collections
+import dataclasses
+import time
+import typing
+
+
+class ScanVerdictCache(typing.Protocol):
+    async def get(self, content_digest: str) -> bytes | None: ...
+
+    async def set(self, content_digest: str, scan_response: bytes) -> None: ...
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class InMemoryScanVerdictCache:
+    max_entries: int = 10_000
+    ttl_seconds: float = 60 * 60  # 1 hour, keep it below the antivirus signature update interval
+    clock: typing.Callable[[], float] = time.monotonic
+    _entries: collections.OrderedDict[str, tuple[float, bytes]] = dataclasses.field(
+        default_factory=collections.OrderedDict, init=False
+    )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, content_digest: str) -> bytes | None:
+        cached_entry: typing.Final = self._entries.get(content_digest)
+        if cached_entry is None:
+            return None
+
+        expires_at, scan_response = cached_entry
+        if expires_at <= self.clock():
+            del self._entries[content_digest]
+            return None
+
+        self._entries.move_to_end(content_digest)
+        return scan_response
+
+    async def set(self, content_digest: str, scan_response: bytes) -> None:
+        self._entries[content_digest] = (self.clock() + self.ttl_seconds, scan_response)
+        self._entries.move_to_end(content_digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
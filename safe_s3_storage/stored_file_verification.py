@@ -0,0 +1,154 @@
+import asyncio
+import collections
+import dataclasses
+import pathlib
+import typing
+
+from safe_s3_storage.file_validator import FileValidator, VerifiedFile
+from safe_s3_storage.s3_service import S3Service
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class FileRescanResult:
+    s3_path: str
+    verified_file: VerifiedFile | None = None
+    error: Exception | None = None
+
+
+class RescanProgressStore(typing.Protocol):
+    async def load_last_key(self) -> str | None: ...
+
+    async def save_last_key(self, last_key: str) -> None: ...
+
+
+def _write_text_atomically(file_path: pathlib.Path, text: str) -> None:
+    temporary_path: typing.Final = file_path.with_name(file_path.name + ".tmp")
+    temporary_path.write_text(text)
+    temporary_path.replace(file_path)
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class FileRescanProgressStore:
+    # the last key is replaced atomically, so a crash leaves the previous checkpoint
+    progress_path: pathlib.Path
+
+    async def load_last_key(self) -> str | None:
+        try:
+            last_key: typing.Final = await asyncio.to_thread(self.progress_path.read_text)
+        except FileNotFoundError:
+            return None
+        return last_key or None
+
+    async def save_last_key(self, last_key: str) -> None:
+        await asyncio.to_thread(_write_text_atomically, self.progress_path, last_key)
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class _RescanProgress:
+    progress_store: RescanProgressStore | None
+    checkpoint_interval: int
+    last_completed_key: str | None
+    # keys in listing order with their rescans, the checkpoint only moves past keys
+    # whose results, and the results of all keys before them, were handed to the caller
+    listed_rescans: collections.deque[tuple[str, asyncio.Task[FileRescanResult]]] = dataclasses.field(
+        default_factory=collections.deque
+    )
+    reported_rescans: set[asyncio.Task[FileRescanResult]] = dataclasses.field(default_factory=set)
+    completed_since_checkpoint: int = 0
+
+    async def report(self, rescan_task: asyncio.Task[FileRescanResult]) -> None:
+        self.reported_rescans.add(rescan_task)
+        while self.listed_rescans and self.listed_rescans[0][1] in self.reported_rescans:
+            object_key, reported_rescan = self.listed_rescans.popleft()
+            self.reported_rescans.remove(reported_rescan)
+            self.last_completed_key = object_key
+            self.completed_since_checkpoint += 1
+        if self.completed_since_checkpoint >= self.checkpoint_interval:
+            await self.save()
+
+    async def save(self) -> None:
+        if self.progress_store is not None and self.last_completed_key is not None and self.completed_since_checkpoint:
+            await self.progress_store.save_last_key(self.last_completed_key)
+        self.completed_since_checkpoint = 0
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class StoredFileVerifier:
+    s3_service: S3Service
+    file_validator: FileValidator
+    # rescans compete with uploads for scan slots, give them their own key in ScanAdmissionController
+    admission_key: str | None = None
+    read_chunk_size: int = 1024 * 1024
+
+    async def verify_file(self, *, s3_path: str) -> VerifiedFile:
+        # streams the stored object through FileValidator.verify_stream, e.g. after antivirus signature updates
+        file_object: typing.Final = await self.s3_service.open_file(s3_path=s3_path)
+        object_body: typing.Final = file_object["Body"]
+
+        async def iterate_object_body() -> typing.AsyncIterator[bytes]:
+            while one_chunk := await object_body.read(self.read_chunk_size):
+                yield one_chunk
+
+        # verify_stream stops reading on the first failure, the connection must not stay checked out
+        try:
+            return await self.file_validator.verify_stream(
+                file_name=s3_path,
+                file_stream=iterate_object_body(),
+                file_size=file_object["ContentLength"],
+                admission_key=self.admission_key,
+            )
+        finally:
+            object_body.close()
+
+    async def _rescan_file(self, s3_path: str) -> FileRescanResult:
+        try:
+            return FileRescanResult(s3_path=s3_path, verified_file=await self.verify_file(s3_path=s3_path))
+        except Exception as exc:  # noqa: BLE001
+            return FileRescanResult(s3_path=s3_path, error=exc)
+
+    async def _collect_rescans(
+        self, running_rescans: set[asyncio.Task[FileRescanResult]], rescan_progress: _RescanProgress
+    ) -> typing.AsyncIterator[FileRescanResult]:
+        done_rescans, _ = await asyncio.wait(running_rescans, return_when=asyncio.FIRST_COMPLETED)
+        running_rescans.difference_update(done_rescans)
+        for one_rescan in done_rescans:
+            yield one_rescan.result()
+            # only reached once the caller asks for the next result, so a result it never got is rescanned on resume
+            await rescan_progress.report(one_rescan)
+
+    async def rescan_prefix(
+        self,
+        *,
+        bucket_name: str,
+        prefix: str = "",
+        max_concurrent_files: int = 16,
+        progress_store: RescanProgressStore | None = None,
+        checkpoint_interval: int = 100,
+    ) -> typing.AsyncIterator[FileRescanResult]:
+        # yields results as rescans finish, failures are results too,
+        # with a progress store a restarted rescan continues after the last key every earlier key was done for
+        rescan_progress: typing.Final = _RescanProgress(
+            progress_store=progress_store,
+            checkpoint_interval=checkpoint_interval,
+            last_completed_key=await progress_store.load_last_key() if progress_store is not None else None,
+        )
+        running_rescans: typing.Final[set[asyncio.Task[FileRescanResult]]] = set()
+        try:
+            async for one_object_key in self.s3_service.list_object_keys(
+                bucket_name=bucket_name, prefix=prefix, start_after=rescan_progress.last_completed_key
+            ):
+                while len(running_rescans) >= max_concurrent_files:
+                    async for one_result in self._collect_rescans(running_rescans, rescan_progress):
+                        yield one_result
+                rescan_task = asyncio.create_task(self._rescan_file(f"{bucket_name}/{one_object_key}"))
+                running_rescans.add(rescan_task)
+                rescan_progress.listed_rescans.append((one_object_key, rescan_task))
+
+            while running_rescans:
+                async for one_result in self._collect_rescans(running_rescans, rescan_progress):
+                    yield one_result
+            await rescan_progress.save()
+        finally:
+            for one_rescan in running_rescans:
+                one_rescan.cancel()
+            await asyncio.gather(*running_rescans, return_exceptions=True)
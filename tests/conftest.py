@@ -1,3 +1,4 @@
+import struct
 import typing
 
 import faker
@@ -9,8 +10,54 @@ def anyio_backend() -> str:
     return "asyncio"
 
 
+@pytest.fixture
+def png_file() -> bytes:
+    return (
+        b"\x89PNG\r\n\x1a\n"  # PNG signature
+        b"\x00\x00\x00\r"  # IHDR chunk length
+        b"IHDR"  # IHDR chunk type
+        b"\x00\x00\x00\x01"  # width: 1
+        b"\x00\x00\x00\x01"  # height: 1
+        b"\x08"  # bit depth: 8
+        b"\x06"  # color type: RGBA
+        b"\x00"  # compression method
+        b"\x00"  # filter method
+        b"\x00"  # interlace method
+        b"\x1f\x15\xc4\x89"  # CRC for IHDR
+        b"\x00\x00\x00\x0a"  # IDAT chunk length
+        b"IDAT"  # IDAT chunk type
+        b"\x78\x9c\x63\x60\x00\x00\x00\x02\x00\x01"  # compressed image data (deflate)
+        b"\x5d\xc6\x2d\xb4"  # CRC for IDAT
+        b"\x00\x00\x00\x00"  # IEND chunk length
+        b"IEND"  # IEND chunk type
+        b"\xae\x42\x60\x82"  # CRC for IEND
+    )
+
+
 MIME_OCTET_STREAM: typing.Final = "application/octet-stream"
+# random bytes are sometimes sniffed as text or TGA images, this is application/octet-stream every time
+OCTET_STREAM_CONTENT: typing.Final = b"\x00" * 100
 
 
 def generate_binary_content(faker: faker.Faker) -> bytes:
     return faker.binary(length=faker.pyint(min_value=10, max_value=100))
+
+
+def make_jpeg_header(*, width: int, height: int) -> bytes:
+    start_of_image: typing.Final = b"\xff\xd8"
+    app0_segment: typing.Final = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    start_of_frame: typing.Final = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width)
+    return start_of_image + app0_segment + start_of_frame
+
+
+async def iterate_chunks(*chunks: bytes) -> typing.AsyncIterator[bytes]:
+    for one_chunk in chunks:
+        yield one_chunk
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
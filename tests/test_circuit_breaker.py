@@ -0,0 +1,43 @@
+import typing
+
+from safe_s3_storage.circuit_breaker import CircuitBreaker, CircuitBreakerState
+from tests.conftest import FakeClock
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self) -> None:
+        circuit_breaker: typing.Final = CircuitBreaker(failure_threshold=2)
+
+        circuit_breaker.record_failure()
+        circuit_breaker.record_success()
+        circuit_breaker.record_failure()
+        assert circuit_breaker.allows_request()
+        circuit_breaker.record_failure()
+
+        assert circuit_breaker.state == CircuitBreakerState.open
+        assert not circuit_breaker.allows_request()
+
+    def test_lets_single_probe_through_after_recovery_timeout(self) -> None:
+        clock: typing.Final = FakeClock()
+        circuit_breaker: typing.Final = CircuitBreaker(failure_threshold=1, recovery_timeout_seconds=10, clock=clock)
+        circuit_breaker.record_failure()
+
+        clock.now = 10
+
+        assert circuit_breaker.state == CircuitBreakerState.half_open
+        assert circuit_breaker.allows_request()
+        assert not circuit_breaker.allows_request()
+        circuit_breaker.record_success()
+        assert circuit_breaker.state == CircuitBreakerState.closed
+
+    def test_reopens_when_probe_fails(self) -> None:
+        clock: typing.Final = FakeClock()
+        circuit_breaker: typing.Final = CircuitBreaker(failure_threshold=3, recovery_timeout_seconds=10, clock=clock)
+        for _ in range(3):
+            circuit_breaker.record_failure()
+        clock.now = 10
+        assert circuit_breaker.allows_request()
+
+        circuit_breaker.record_failure()
+
+        assert circuit_breaker.state == CircuitBreakerState.open
@@ -0,0 +1,51 @@
+import typing
+
+import faker
+
+from safe_s3_storage.existing_object_cache import ExistingObjectCache
+from tests.conftest import FakeClock
+
+
+class TestExistingObjectCache:
+    def test_contains_added_paths(self, faker: faker.Faker) -> None:
+        s3_path: typing.Final = faker.file_path()
+        existing_object_cache: typing.Final = ExistingObjectCache()
+
+        existing_object_cache.add(s3_path)
+
+        assert existing_object_cache.contains(s3_path)
+        assert not existing_object_cache.contains(faker.file_path())
+
+    def test_discards_paths(self, faker: faker.Faker) -> None:
+        s3_path: typing.Final = faker.file_path()
+        existing_object_cache: typing.Final = ExistingObjectCache()
+        existing_object_cache.add(s3_path)
+
+        existing_object_cache.discard(s3_path)
+        existing_object_cache.discard(faker.file_path())
+
+        assert not existing_object_cache.contains(s3_path)
+        assert len(existing_object_cache) == 0
+
+    def test_expires_entries(self, faker: faker.Faker) -> None:
+        s3_path: typing.Final = faker.file_path()
+        clock: typing.Final = FakeClock()
+        existing_object_cache: typing.Final = ExistingObjectCache(ttl_seconds=10, clock=clock)
+        existing_object_cache.add(s3_path)
+
+        clock.now = 10
+
+        assert not existing_object_cache.contains(s3_path)
+        assert len(existing_object_cache) == 0
+
+    def test_evicts_least_recently_used(self) -> None:
+        existing_object_cache: typing.Final = ExistingObjectCache(max_entries=2)
+        existing_object_cache.add("bucket/first")
+        existing_object_cache.add("bucket/second")
+        existing_object_cache.contains("bucket/first")
+
+        existing_object_cache.add("bucket/third")
+
+        assert existing_object_cache.contains("bucket/first")
+        assert not existing_object_cache.contains("bucket/second")
+        assert existing_object_cache.contains("bucket/third")
@@ -0,0 +1,93 @@
+import io
+import mmap
+import tempfile
+import typing
+
+import faker
+import pytest
+
+from safe_s3_storage.file_content import (
+    ContentReader,
+    get_content_size,
+    make_request_body,
+    map_file_content,
+    read_content_header,
+)
+from safe_s3_storage.file_validator import FileValidator
+from tests.conftest import MIME_OCTET_STREAM, generate_binary_content
+
+
+class TestFileContent:
+    @pytest.mark.parametrize("buffer_type", [bytes, bytearray, memoryview])
+    def test_reads_size_and_header(self, faker: faker.Faker, buffer_type: type) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+
+        assert get_content_size(buffer_type(file_content)) == len(file_content)
+        assert read_content_header(buffer_type(file_content), 5) == file_content[:5]
+
+    def test_content_reader_reads_and_seeks(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        content_reader: typing.Final = ContentReader(memoryview(file_content))
+
+        assert content_reader.read(3) == file_content[:3]
+        assert content_reader.read() == file_content[3:]
+        assert content_reader.seek(0, io.SEEK_END) == len(file_content)
+        content_reader.seek(0)
+        assert content_reader.read() == file_content
+
+    def test_passes_bytes_as_request_body(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+
+        assert make_request_body(file_content) is file_content
+        assert isinstance(make_request_body(memoryview(file_content)), ContentReader)
+
+    def test_maps_in_memory_files(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        with tempfile.SpooledTemporaryFile(max_size=len(file_content) + 1) as spooled_file:
+            spooled_file.write(file_content)
+
+            mapped_content: typing.Final = map_file_content(spooled_file)
+
+            assert mapped_content == file_content
+            # the content doesn't pin the file, so it stays writable
+            spooled_file.write(file_content)
+        assert mapped_content == file_content
+
+    def test_copies_bytes_io_content(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        bytes_file: typing.Final = io.BytesIO(file_content)
+
+        mapped_content: typing.Final = map_file_content(bytes_file)
+        bytes_file.close()
+
+        assert mapped_content == file_content
+
+    def test_maps_files_on_disk(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        with tempfile.TemporaryFile() as temporary_file:
+            temporary_file.write(file_content)
+            temporary_file.flush()
+
+            mapped_content: typing.Final = map_file_content(temporary_file)
+
+            assert isinstance(mapped_content, mmap.mmap)
+            assert mapped_content[:] == file_content
+            mapped_content.close()
+
+    @pytest.mark.parametrize("buffer_type", [bytearray, memoryview])
+    async def test_validates_buffers(self, faker: faker.Faker, buffer_type: type) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+
+        validated_file: typing.Final = await FileValidator(allowed_mime_types=[MIME_OCTET_STREAM]).validate_file(
+            file_name=faker.file_name(), file_content=buffer_type(file_content)
+        )
+
+        assert isinstance(validated_file.file_content, buffer_type)
+        assert validated_file.file_size == len(file_content)
+
+    async def test_converts_image_from_memoryview(self, faker: faker.Faker, png_file: bytes) -> None:
+        validated_file: typing.Final = await FileValidator(allowed_mime_types=["image/png"]).validate_file(
+            file_name=faker.file_name(), file_content=memoryview(png_file)
+        )
+
+        assert validated_file.mime_type == "image/webp"
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import pathlib
+import typing
+
+from safe_s3_storage.file_read_cache import FileReadCache
+from tests.conftest import FakeClock
+
+
+class TestFileReadCache:
+    async def test_evicts_least_recently_used_by_size(self) -> None:
+        file_read_cache: typing.Final = FileReadCache(max_size_bytes=10)
+        await file_read_cache.set("bucket/first", etag="1", file_content=b"1111", generation=0)
+        await file_read_cache.set("bucket/second", etag="2", file_content=b"2222", generation=0)
+        await file_read_cache.get("bucket/first")
+
+        await file_read_cache.set("bucket/third", etag="3", file_content=b"3333", generation=0)
+
+        assert await file_read_cache.get("bucket/second") is None
+        assert [
+            cached_file.file_content
+            for one_s3_path in ("bucket/first", "bucket/third")
+            if (cached_file := await file_read_cache.get(one_s3_path))
+        ] == [b"1111", b"3333"]
+        assert file_read_cache.size_bytes == 8  # noqa: PLR2004
+
+    async def test_skips_files_over_limit(self) -> None:
+        file_read_cache: typing.Final = FileReadCache(max_file_size_bytes=3)
+
+        await file_read_cache.set("bucket/file", etag="1", file_content=b"1111", generation=0)
+
+        assert await file_read_cache.get("bucket/file") is None
+        assert len(file_read_cache) == 0
+
+    async def test_moves_evicted_files_to_disk(self, tmp_path: pathlib.Path) -> None:
+        file_read_cache: typing.Final = FileReadCache(max_size_bytes=4, disk_directory=tmp_path)
+        await file_read_cache.set("bucket/first", etag="1", file_content=b"1111", generation=0)
+        await file_read_cache.set("bucket/second", etag="2", file_content=b"2222", generation=0)
+        assert file_read_cache.disk_size_bytes == 4  # noqa: PLR2004
+
+        cached_file: typing.Final = await file_read_cache.get("bucket/first")
+
+        assert cached_file is not None
+        assert (cached_file.etag, cached_file.file_content) == ("1", b"1111")
+        assert len(await asyncio.to_thread(os.listdir, tmp_path)) == 1
+        assert len(file_read_cache) == 2  # noqa: PLR2004
+
+    async def test_removes_invalidated_files_from_disk(self, tmp_path: pathlib.Path) -> None:
+        file_read_cache: typing.Final = FileReadCache(max_size_bytes=4, disk_directory=tmp_path)
+        await file_read_cache.set("bucket/first", etag="1", file_content=b"1111", generation=0)
+        await file_read_cache.set("bucket/second", etag="2", file_content=b"2222", generation=0)
+
+        await file_read_cache.invalidate("bucket/first")
+
+        assert await file_read_cache.get("bucket/first") is None
+        assert await asyncio.to_thread(os.listdir, tmp_path) == []
+        assert file_read_cache.disk_size_bytes == 0
+
+    async def test_drops_reads_started_before_invalidation(self) -> None:
+        file_read_cache: typing.Final = FileReadCache()
+        generation: typing.Final = file_read_cache.generation
+
+        await file_read_cache.invalidate("bucket/file")
+        await file_read_cache.set("bucket/file", etag="1", file_content=b"1111", generation=generation)
+
+        assert await file_read_cache.get("bucket/file") is None
+
+    async def test_revalidation_refreshes_files(self) -> None:
+        clock: typing.Final = FakeClock()
+        file_read_cache: typing.Final = FileReadCache(max_age_seconds=10, clock=clock)
+        await file_read_cache.set("bucket/file", etag="1", file_content=b"1111", generation=0)
+        clock.now = 10
+        stale_file: typing.Final = await file_read_cache.get("bucket/file")
+        assert stale_file is not None
+        assert not file_read_cache.is_fresh(stale_file)
+
+        file_read_cache.mark_validated("bucket/file")
+
+        fresh_file: typing.Final = await file_read_cache.get("bucket/file")
+        assert fresh_file is not None
+        assert file_read_cache.is_fresh(fresh_file)
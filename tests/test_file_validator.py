@@ -1,55 +1,42 @@
+import asyncio
+import hashlib
 import random
+import tempfile
 import typing
+from unittest import mock
 
 import faker
 import httpx
 import pytest
+import pyvips  # type: ignore[import-untyped]
 from httpx import codes as status_codes
 
 from safe_s3_storage import exceptions
 from safe_s3_storage.exceptions import KasperskyScanEngineConnectionStatusError
-from safe_s3_storage.file_validator import (
-    _IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP,
-    FileValidator,
+from safe_s3_storage.file_validator import FileValidator, VerifiedFile
+from safe_s3_storage.image_conversion import (
+    IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP,
     ImageConversionFormat,
+    ImageConversionPolicy,
+    ImageRendition,
 )
 from safe_s3_storage.kaspersky_scan_engine import (
     KasperskyScanEngineClient,
     KasperskyScanEngineResponse,
     KasperskyScanEngineScanResult,
 )
-from tests.conftest import MIME_OCTET_STREAM, generate_binary_content
-
-
-@pytest.fixture
-def png_file() -> bytes:
-    return (
-        b"\x89PNG\r\n\x1a\n"  # PNG signature
-        b"\x00\x00\x00\r"  # IHDR chunk length
-        b"IHDR"  # IHDR chunk type
-        b"\x00\x00\x00\x01"  # width: 1
-        b"\x00\x00\x00\x01"  # height: 1
-        b"\x08"  # bit depth: 8
-        b"\x06"  # color type: RGBA
-        b"\x00"  # compression method
-        b"\x00"  # filter method
-        b"\x00"  # interlace method
-        b"\x1f\x15\xc4\x89"  # CRC for IHDR
-        b"\x00\x00\x00\x0a"  # IDAT chunk length
-        b"IDAT"  # IDAT chunk type
-        b"\x78\x9c\x63\x60\x00\x00\x00\x02\x00\x01"  # compressed image data (deflate)
-        b"\x5d\xc6\x2d\xb4"  # CRC for IDAT
-        b"\x00\x00\x00\x00"  # IEND chunk length
-        b"IEND"  # IEND chunk type
-        b"\xae\x42\x60\x82"  # CRC for IEND
-    )
+from tests.conftest import MIME_OCTET_STREAM, generate_binary_content, iterate_chunks, make_jpeg_header
 
 
 def get_mocked_kaspersky_scan_engine_client(*, faker: faker.Faker, ok_response: bool) -> KasperskyScanEngineClient:
     if ok_response:
-        all_scan_results: typing.Final[list[KasperskyScanEngineScanResult]] = list(KasperskyScanEngineScanResult)
-        all_scan_results.remove(KasperskyScanEngineScanResult.DETECT)
-        scan_result = random.choice(all_scan_results)
+        scan_result = random.choice(
+            [
+                KasperskyScanEngineScanResult.CLEAN,
+                KasperskyScanEngineScanResult.DISINFECTED,
+                KasperskyScanEngineScanResult.DELETED,
+            ]
+        )
     else:
         scan_result = KasperskyScanEngineScanResult.DETECT
 
@@ -96,6 +83,25 @@ class TestFileValidator:
                 file_name=faker.file_name(), file_content=png_file
             )
 
+    async def test_fails_to_validate_image_dimensions(self, faker: faker.Faker) -> None:
+        with pytest.raises(exceptions.TooLargeImageDimensionsError):
+            await FileValidator(allowed_mime_types=["image/jpeg"], max_image_pixels=10_000).validate_file(
+                file_name=faker.file_name(), file_content=make_jpeg_header(width=1000, height=1000)
+            )
+
+    async def test_fails_to_validate_image_dimensions_of_other_formats(self, faker: faker.Faker) -> None:
+        with pytest.raises(exceptions.TooLargeImageDimensionsError):
+            await FileValidator(allowed_mime_types=["image/tiff"], max_image_pixels=10_000).validate_file(
+                file_name=faker.file_name(), file_content=pyvips.Image.black(1000, 1000).write_to_buffer(".tif")
+            )
+
+    async def test_allows_image_within_pixel_limit(self, faker: faker.Faker, png_file: bytes) -> None:
+        validated_file: typing.Final = await FileValidator(
+            allowed_mime_types=["image/png"], max_image_pixels=1, excluded_conversion_formats=["png"]
+        ).validate_file(file_name=f"{faker.pystr()}.png", file_content=png_file)
+
+        assert validated_file.file_content == png_file
+
     async def test_fails_to_convert_image(self, faker: faker.Faker, png_file: bytes) -> None:
         with pytest.raises(exceptions.FailedToConvertImageError):
             await FileValidator(allowed_mime_types=["image/png"]).validate_file(
@@ -120,13 +126,13 @@ class TestFileValidator:
 
         assert (
             validated_file.file_name
-            == f"{file_base_name}.{_IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP[image_conversion_format][1]}"
+            == f"{file_base_name}.{IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP[image_conversion_format][1]}"
         )
         assert validated_file.file_content != png_file
         assert validated_file.file_size == len(validated_file.file_content)
         assert (
             validated_file.mime_type
-            == _IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP[image_conversion_format][0]
+            == IMAGE_CONVERSION_FORMAT_TO_MIME_TYPE_AND_EXTENSION_MAP[image_conversion_format][0]
         )
 
     @pytest.mark.parametrize("file_content", ["test'", "abracadabra", "python script"])
@@ -212,3 +218,391 @@ class TestFileValidator:
         assert validated_file.file_name == f"{file_base_name}.{file_extension}"
         assert validated_file.file_content == png_file
         assert validated_file.file_size == len(validated_file.file_content)
+
+
+class TestFileValidatorConversionPolicy:
+    async def test_keeps_small_image_in_target_format(self, faker: faker.Faker, png_file: bytes) -> None:
+        file_validator: typing.Final = FileValidator(
+            image_conversion_format=ImageConversionFormat.webp,
+            image_conversion_policy=ImageConversionPolicy(keep_target_format_max_size_bytes=1024 * 1024),
+        )
+        webp_file: typing.Final = (
+            await file_validator.validate_file(file_name=f"{faker.pystr()}.png", file_content=png_file)
+        ).file_content
+        file_name: typing.Final = f"{faker.pystr()}.webp"
+
+        validated_file: typing.Final = await file_validator.validate_file(file_name=file_name, file_content=webp_file)
+
+        assert validated_file.file_name == file_name
+        assert validated_file.file_content == webp_file
+        assert file_validator.image_conversion_statistics.converted_images == 1
+        assert file_validator.image_conversion_statistics.skipped_images == 1
+
+    async def test_keeps_original_when_conversion_does_not_shrink_it(self, faker: faker.Faker, png_file: bytes) -> None:
+        file_name: typing.Final = f"{faker.pystr()}.png"
+        file_validator: typing.Final = FileValidator(
+            image_conversion_policy=ImageConversionPolicy(min_size_reduction_ratio=0.99)
+        )
+
+        validated_file: typing.Final = await file_validator.validate_file(file_name=file_name, file_content=png_file)
+
+        assert validated_file.file_name == file_name
+        assert validated_file.file_content == png_file
+        assert file_validator.image_conversion_statistics.kept_originals == 1
+        assert file_validator.image_conversion_statistics.saved_bytes == 0
+
+    async def test_collects_statistics(self, faker: faker.Faker, png_file: bytes) -> None:
+        file_validator: typing.Final = FileValidator()
+
+        validated_file: typing.Final = await file_validator.validate_file(
+            file_name=f"{faker.pystr()}.png", file_content=png_file
+        )
+
+        statistics: typing.Final = file_validator.image_conversion_statistics
+        assert statistics.converted_images == 1
+        assert statistics.original_bytes == len(png_file)
+        assert statistics.stored_bytes == validated_file.file_size
+        assert statistics.saved_bytes == len(png_file) - validated_file.file_size
+        assert statistics.conversion_seconds > 0
+
+
+class TestFileValidatorRenditions:
+    async def test_creates_renditions(self, faker: faker.Faker, png_file: bytes) -> None:
+        file_base_name: typing.Final = faker.pystr()
+        renditions: typing.Final = [
+            ImageRendition(name="original"),
+            ImageRendition(name="small", max_width=64, image_conversion_format=ImageConversionFormat.jpeg, quality=70),
+            ImageRendition(name="tiny", max_width=16, max_height=16),
+        ]
+
+        validated_renditions: typing.Final = await FileValidator(
+            allowed_mime_types=["image/png"]
+        ).validate_image_renditions(file_name=f"{file_base_name}.png", file_content=png_file, renditions=renditions)
+
+        assert [one_rendition.rendition_name for one_rendition in validated_renditions] == ["original", "small", "tiny"]
+        assert [one_rendition.file_name for one_rendition in validated_renditions] == [
+            f"{file_base_name}_original.webp",
+            f"{file_base_name}_small.jpg",
+            f"{file_base_name}_tiny.webp",
+        ]
+        assert [one_rendition.mime_type for one_rendition in validated_renditions] == [
+            "image/webp",
+            "image/jpeg",
+            "image/webp",
+        ]
+        assert all(one_rendition.file_size == len(one_rendition.file_content) for one_rendition in validated_renditions)
+
+    async def test_fails_on_not_image(self, faker: faker.Faker) -> None:
+        with pytest.raises(exceptions.NotAnImageError):
+            await FileValidator().validate_image_renditions(
+                file_name=faker.file_name(),
+                file_content=generate_binary_content(faker),
+                renditions=[ImageRendition(name="small", max_width=64)],
+            )
+
+    async def test_scans_renditions(self, faker: faker.Faker, png_file: bytes) -> None:
+        with pytest.raises(exceptions.KasperskyScanEngineThreatDetectedError):
+            await FileValidator(
+                kaspersky_scan_engine=get_mocked_kaspersky_scan_engine_client(faker=faker, ok_response=False)
+            ).validate_image_renditions(
+                file_name=faker.file_name(),
+                file_content=png_file,
+                renditions=[ImageRendition(name="small", max_width=8)],
+            )
+
+
+class TestFileValidatorStream:
+    async def test_ok_not_image(self, faker: faker.Faker) -> None:
+        file_name: typing.Final = faker.file_name()
+        file_chunks: typing.Final = [
+            generate_binary_content(faker) for _ in range(faker.pyint(min_value=2, max_value=10))
+        ]
+
+        validated_file_stream: typing.Final = await FileValidator(
+            allowed_mime_types=[MIME_OCTET_STREAM]
+        ).validate_stream(file_name=file_name, file_stream=iterate_chunks(*file_chunks))
+
+        assert validated_file_stream.file_name == file_name
+        assert validated_file_stream.mime_type == MIME_OCTET_STREAM
+        assert b"".join([one_chunk async for one_chunk in validated_file_stream.file_stream]) == b"".join(file_chunks)
+
+    async def test_sniffs_mime_type_from_header_only(self, faker: faker.Faker) -> None:
+        file_chunks: typing.Final = [b"\x00" * 8 * 1024, b"never consumed before validation"]
+        consumed_chunks: typing.Final[list[bytes]] = []
+
+        async def track_chunks() -> typing.AsyncIterator[bytes]:
+            for one_chunk in file_chunks:
+                consumed_chunks.append(one_chunk)
+                yield one_chunk
+
+        validated_file_stream: typing.Final = await FileValidator(
+            allowed_mime_types=[MIME_OCTET_STREAM]
+        ).validate_stream(file_name=faker.file_name(), file_stream=track_chunks())
+
+        assert consumed_chunks == file_chunks[:1]
+        assert [one_chunk async for one_chunk in validated_file_stream.file_stream] == file_chunks
+
+    async def test_fails_to_validate_mime_type(self, faker: faker.Faker) -> None:
+        with pytest.raises(exceptions.NotAllowedMimeTypeError):
+            await FileValidator(allowed_mime_types=["image/jpeg"]).validate_stream(
+                file_name=faker.file_name(), file_stream=iterate_chunks(generate_binary_content(faker))
+            )
+
+    async def test_fails_to_validate_file_size_on_header(self, faker: faker.Faker) -> None:
+        with pytest.raises(exceptions.TooLargeFileError):
+            await FileValidator(allowed_mime_types=[MIME_OCTET_STREAM], max_file_size_bytes=0).validate_stream(
+                file_name=faker.file_name(), file_stream=iterate_chunks(generate_binary_content(faker))
+            )
+
+    async def test_fails_to_validate_declared_file_size(self, faker: faker.Faker) -> None:
+        file_chunks: typing.Final = [b"\x00" * 8 * 1024, b"never consumed"]
+        consumed_chunks: typing.Final[list[bytes]] = []
+
+        async def track_chunks() -> typing.AsyncIterator[bytes]:
+            for one_chunk in file_chunks:
+                consumed_chunks.append(one_chunk)
+                yield one_chunk
+
+        with pytest.raises(exceptions.TooLargeFileError):
+            await FileValidator(allowed_mime_types=[MIME_OCTET_STREAM], max_file_size_bytes=10 * 1024).validate_stream(
+                file_name=faker.file_name(), file_stream=track_chunks(), file_size=20 * 1024
+            )
+        assert consumed_chunks == file_chunks[:1]
+
+    async def test_fails_to_validate_file_size_while_streaming(self, faker: faker.Faker) -> None:
+        first_chunk: typing.Final = b"\x00" * 8 * 1024
+        validated_file_stream: typing.Final = await FileValidator(
+            allowed_mime_types=[MIME_OCTET_STREAM], max_file_size_bytes=len(first_chunk)
+        ).validate_stream(
+            file_name=faker.file_name(), file_stream=iterate_chunks(first_chunk, generate_binary_content(faker))
+        )
+
+        with pytest.raises(exceptions.TooLargeFileError):
+            _: typing.Final = [one_chunk async for one_chunk in validated_file_stream.file_stream]
+
+    async def test_converts_image(self, faker: faker.Faker, png_file: bytes) -> None:
+        file_base_name: typing.Final = faker.pystr()
+
+        validated_file_stream: typing.Final = await FileValidator(allowed_mime_types=["image/png"]).validate_stream(
+            file_name=f"{file_base_name}.png", file_stream=iterate_chunks(png_file[:10], png_file[10:])
+        )
+
+        assert validated_file_stream.file_name == f"{file_base_name}.webp"
+        assert validated_file_stream.mime_type == "image/webp"
+        assert b"".join([one_chunk async for one_chunk in validated_file_stream.file_stream]) != png_file
+
+    async def test_converts_spilled_image_from_file(self, faker: faker.Faker, png_file: bytes) -> None:
+        with mock.patch.object(pyvips.Image, "new_from_file", wraps=pyvips.Image.new_from_file) as new_from_file_mock:
+            validated_file_stream: typing.Final = await FileValidator(
+                allowed_mime_types=["image/png"], stream_spool_max_size_bytes=0
+            ).validate_stream(file_name=faker.file_name(extension="png"), file_stream=iterate_chunks(png_file))
+
+        assert validated_file_stream.mime_type == "image/webp"
+        assert new_from_file_mock.mock_calls[0].kwargs == {"access": "sequential"}
+
+    async def test_scans_buffered_file(self, faker: faker.Faker) -> None:
+        with pytest.raises(exceptions.KasperskyScanEngineThreatDetectedError):
+            await FileValidator(
+                kaspersky_scan_engine=get_mocked_kaspersky_scan_engine_client(faker=faker, ok_response=False),
+                allowed_mime_types=[MIME_OCTET_STREAM],
+            ).validate_stream(
+                file_name=faker.file_name(),
+                file_stream=iterate_chunks(generate_binary_content(faker), generate_binary_content(faker)),
+            )
+
+    async def test_scans_declared_size_file_while_streaming(self, faker: faker.Faker) -> None:
+        file_chunks: typing.Final = [b"\x00" * 8 * 1024, generate_binary_content(faker)]
+        validated_file_stream: typing.Final = await FileValidator(
+            kaspersky_scan_engine=get_mocked_kaspersky_scan_engine_client(faker=faker, ok_response=True),
+            allowed_mime_types=[MIME_OCTET_STREAM],
+        ).validate_stream(
+            file_name=faker.file_name(),
+            file_stream=iterate_chunks(*file_chunks),
+            file_size=sum(len(one_chunk) for one_chunk in file_chunks),
+        )
+
+        assert [one_chunk async for one_chunk in validated_file_stream.file_stream] == file_chunks
+
+    async def test_fails_declared_size_file_scan_at_stream_end(self, faker: faker.Faker) -> None:
+        file_chunks: typing.Final = [b"\x00" * 8 * 1024, generate_binary_content(faker)]
+        validated_file_stream: typing.Final = await FileValidator(
+            kaspersky_scan_engine=get_mocked_kaspersky_scan_engine_client(faker=faker, ok_response=False),
+            allowed_mime_types=[MIME_OCTET_STREAM],
+        ).validate_stream(
+            file_name=faker.file_name(),
+            file_stream=iterate_chunks(*file_chunks),
+            file_size=sum(len(one_chunk) for one_chunk in file_chunks),
+        )
+
+        with pytest.raises(exceptions.KasperskyScanEngineThreatDetectedError):
+            _: typing.Final = [one_chunk async for one_chunk in validated_file_stream.file_stream]
+
+    async def test_fails_on_declared_size_mismatch(self, faker: faker.Faker) -> None:
+        file_chunks: typing.Final = [b"\x00" * 8 * 1024, generate_binary_content(faker)]
+        validated_file_stream: typing.Final = await FileValidator(
+            kaspersky_scan_engine=get_mocked_kaspersky_scan_engine_client(faker=faker, ok_response=True),
+            allowed_mime_types=[MIME_OCTET_STREAM],
+        ).validate_stream(
+            file_name=faker.file_name(),
+            file_stream=iterate_chunks(*file_chunks),
+            file_size=sum(len(one_chunk) for one_chunk in file_chunks) + 1,
+        )
+
+        with pytest.raises(exceptions.FileSizeMismatchError):
+            _: typing.Final = [one_chunk async for one_chunk in validated_file_stream.file_stream]
+
+    @pytest.mark.parametrize("stream_spool_max_size_bytes", [0, 1024 * 1024])
+    async def test_spools_buffered_file(self, faker: faker.Faker, stream_spool_max_size_bytes: int) -> None:
+        file_chunks: typing.Final = [generate_binary_content(faker), b"\x00" * 3 * 1024 * 1024]
+
+        validated_file_stream: typing.Final = await FileValidator(
+            kaspersky_scan_engine=get_mocked_kaspersky_scan_engine_client(faker=faker, ok_response=True),
+            allowed_mime_types=[MIME_OCTET_STREAM],
+            stream_spool_max_size_bytes=stream_spool_max_size_bytes,
+        ).validate_stream(file_name=faker.file_name(), file_stream=iterate_chunks(*file_chunks))
+
+        assert b"".join([one_chunk async for one_chunk in validated_file_stream.file_stream]) == b"".join(file_chunks)
+
+
+class TestFileValidatorVerifyStream:
+    async def test_ok(self, faker: faker.Faker) -> None:
+        file_name: typing.Final = faker.file_name()
+        file_chunks: typing.Final = [
+            generate_binary_content(faker) for _ in range(faker.pyint(min_value=2, max_value=10))
+        ]
+        file_content: typing.Final = b"".join(file_chunks)
+
+        verified_file: typing.Final = await FileValidator(
+            kaspersky_scan_engine=get_mocked_kaspersky_scan_engine_client(faker=faker, ok_response=True),
+            allowed_mime_types=[MIME_OCTET_STREAM],
+        ).verify_stream(file_name=file_name, file_stream=iterate_chunks(*file_chunks), file_size=len(file_content))
+
+        assert verified_file == VerifiedFile(
+            file_name=file_name,
+            file_size=len(file_content),
+            mime_type=MIME_OCTET_STREAM,
+            content_sha256=hashlib.sha256(file_content).hexdigest(),
+        )
+
+    async def test_hashes_without_scan(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+
+        verified_file: typing.Final = await FileValidator(allowed_mime_types=[MIME_OCTET_STREAM]).verify_stream(
+            file_name=faker.file_name(), file_stream=iterate_chunks(file_content), file_size=len(file_content)
+        )
+
+        assert verified_file.content_sha256 == hashlib.sha256(file_content).hexdigest()
+
+    async def test_fails_to_scan(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        with pytest.raises(exceptions.KasperskyScanEngineThreatDetectedError):
+            await FileValidator(
+                kaspersky_scan_engine=get_mocked_kaspersky_scan_engine_client(faker=faker, ok_response=False)
+            ).verify_stream(
+                file_name=faker.file_name(), file_stream=iterate_chunks(file_content), file_size=len(file_content)
+            )
+
+    async def test_fails_to_validate_mime_type(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        with pytest.raises(exceptions.NotAllowedMimeTypeError):
+            await FileValidator(allowed_mime_types=["image/jpeg"]).verify_stream(
+                file_name=faker.file_name(), file_stream=iterate_chunks(file_content), file_size=len(file_content)
+            )
+
+    @pytest.mark.parametrize("size_difference", [-1, 1])
+    async def test_fails_on_size_mismatch(self, faker: faker.Faker, size_difference: int) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        with pytest.raises(exceptions.FileSizeMismatchError):
+            await FileValidator().verify_stream(
+                file_name=faker.file_name(),
+                file_stream=iterate_chunks(file_content),
+                file_size=len(file_content) + size_difference,
+            )
+
+
+class TestFileValidatorFileObject:
+    async def test_validates_spooled_file(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        with tempfile.SpooledTemporaryFile(max_size=1) as spooled_file:
+            spooled_file.write(file_content)
+
+            validated_file: typing.Final = await FileValidator(
+                allowed_mime_types=[MIME_OCTET_STREAM]
+            ).validate_file_object(file_name=faker.file_name(), file_object=spooled_file)
+
+            assert bytes(validated_file.file_content) == file_content
+            assert validated_file.file_size == len(file_content)
+
+
+class TestFileValidatorMany:
+    async def test_returns_results_with_indexes(self, faker: faker.Faker, png_file: bytes) -> None:
+        files: typing.Final = [
+            (faker.file_name(), generate_binary_content(faker)),
+            ("image.png", png_file),
+            (faker.file_name(), faker.pystr().encode()),
+        ]
+
+        validation_results: typing.Final = [
+            one_result
+            async for one_result in FileValidator(allowed_mime_types=[MIME_OCTET_STREAM, "image/png"]).validate_many(
+                files, max_concurrent_files=2
+            )
+        ]
+
+        results_by_index: typing.Final = {one_result.index: one_result for one_result in validation_results}
+        assert sorted(results_by_index) == [0, 1, 2]
+        assert results_by_index[0].validated_file is not None
+        assert results_by_index[0].validated_file.file_content == files[0][1]
+        assert results_by_index[1].validated_file is not None
+        assert results_by_index[1].validated_file.mime_type == "image/webp"
+        assert isinstance(results_by_index[2].error, exceptions.NotAllowedMimeTypeError)
+        assert results_by_index[2].file_name == files[2][0]
+
+    async def test_accepts_async_iterable(self, faker: faker.Faker) -> None:
+        async def iterate_files() -> typing.AsyncIterator[tuple[str, bytes]]:
+            for _ in range(3):
+                yield faker.file_name(), generate_binary_content(faker)
+
+        validation_results: typing.Final = [
+            one_result async for one_result in FileValidator().validate_many(iterate_files())
+        ]
+
+        assert sorted(one_result.index for one_result in validation_results) == [0, 1, 2]
+        assert all(one_result.error is None for one_result in validation_results)
+
+    async def test_limits_concurrent_scans(self, faker: faker.Faker) -> None:
+        max_concurrent_scans: typing.Final = 2
+        in_flight_scans = 0
+        max_in_flight_scans = 0
+
+        async def handle_request(_: httpx.Request) -> httpx.Response:
+            nonlocal in_flight_scans, max_in_flight_scans
+            in_flight_scans += 1
+            max_in_flight_scans = max(max_in_flight_scans, in_flight_scans)
+            await asyncio.sleep(0.01)
+            in_flight_scans -= 1
+            return httpx.Response(
+                status_codes.OK,
+                json=KasperskyScanEngineResponse(scanResult=KasperskyScanEngineScanResult.CLEAN).model_dump(
+                    mode="json"
+                ),
+            )
+
+        file_validator: typing.Final = FileValidator(
+            kaspersky_scan_engine=KasperskyScanEngineClient(
+                service_url=faker.url(schemes=["http"]),
+                client_name=faker.pystr(),
+                httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+            )
+        )
+
+        validation_results: typing.Final = [
+            one_result
+            async for one_result in file_validator.validate_many(
+                [(faker.file_name(), generate_binary_content(faker)) for _ in range(10)],
+                max_concurrent_scans=max_concurrent_scans,
+            )
+        ]
+
+        assert len(validation_results) == 10  # noqa: PLR2004
+        assert max_in_flight_scans == max_concurrent_scans
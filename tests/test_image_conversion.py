@@ -0,0 +1,69 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
+import threading
+import time
+import typing
+
+import faker
+import pytest
+
+from safe_s3_storage import exceptions
+from safe_s3_storage.file_validator import FileValidator
+from safe_s3_storage.image_conversion import ImageConversionPool
+
+
+def _blocking_identity(value: int, *, release_event: threading.Event) -> int:
+    release_event.wait(timeout=5)
+    return value
+
+
+class TestImageConversionPool:
+    async def test_runs_off_event_loop(self) -> None:
+        event_loop_thread_id: typing.Final = threading.get_ident()
+
+        conversion_thread_id: typing.Final = await ImageConversionPool().run(threading.get_ident)
+
+        assert conversion_thread_id != event_loop_thread_id
+
+    async def test_limits_concurrency(self) -> None:
+        release_event: typing.Final = threading.Event()
+        image_conversion_pool: typing.Final = ImageConversionPool(max_concurrent_conversions=2)
+
+        conversion_tasks: typing.Final = [
+            asyncio.create_task(image_conversion_pool.run(_blocking_identity, one_value, release_event=release_event))
+            for one_value in range(5)
+        ]
+        await asyncio.sleep(0.05)
+
+        assert image_conversion_pool.running_conversions == 2  # noqa: PLR2004
+        assert image_conversion_pool.pending_conversions == 5  # noqa: PLR2004
+        release_event.set()
+        assert await asyncio.gather(*conversion_tasks) == list(range(5))
+        assert image_conversion_pool.pending_conversions == 0
+
+    async def test_rejects_when_too_many_pending(self) -> None:
+        release_event: typing.Final = threading.Event()
+        image_conversion_pool: typing.Final = ImageConversionPool(
+            max_concurrent_conversions=1, max_pending_conversions=1
+        )
+        running_task: typing.Final = asyncio.create_task(
+            image_conversion_pool.run(_blocking_identity, 1, release_event=release_event)
+        )
+        await asyncio.sleep(0)
+
+        with pytest.raises(exceptions.TooManyPendingImageConversionsError):
+            await image_conversion_pool.run(time.monotonic)
+
+        release_event.set()
+        await running_task
+
+    async def test_converts_in_process_pool(self, faker: faker.Faker, png_file: bytes) -> None:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            validated_file: typing.Final = await FileValidator(
+                allowed_mime_types=["image/png"], image_conversion_pool=ImageConversionPool(executor=executor)
+            ).validate_file(file_name=faker.file_name(), file_content=png_file)
+
+        assert validated_file.mime_type == "image/webp"
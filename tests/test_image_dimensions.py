@@ -0,0 +1,33 @@
+import struct
+import typing
+
+import pytest
+import pyvips  # type: ignore[import-untyped]
+
+from safe_s3_storage.image_dimensions import read_image_dimensions
+from tests.conftest import make_jpeg_header
+
+
+class TestReadImageDimensions:
+    def test_reads_png(self, png_file: bytes) -> None:
+        assert read_image_dimensions(png_file) == (1, 1)
+
+    def test_reads_gif(self) -> None:
+        assert read_image_dimensions(b"GIF89a" + struct.pack("<HH", 300, 200)) == (300, 200)
+
+    def test_reads_jpeg(self) -> None:
+        assert read_image_dimensions(make_jpeg_header(width=4000, height=3000)) == (4000, 3000)
+
+    def test_reads_webp(self) -> None:
+        webp_header: typing.Final = (
+            b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x00" * 8 + (4095).to_bytes(3, "little") + (1023).to_bytes(3, "little")
+        )
+
+        assert read_image_dimensions(webp_header) == (4096, 1024)
+
+    def test_reads_other_formats_with_pyvips(self) -> None:
+        assert read_image_dimensions(pyvips.Image.black(300, 200).write_to_buffer(".tif")) == (300, 200)
+
+    @pytest.mark.parametrize("file_header", [b"", b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff\xe0", b"%PDF-1.7"])
+    def test_returns_none_for_unknown_or_truncated_headers(self, file_header: bytes) -> None:
+        assert read_image_dimensions(file_header) is None
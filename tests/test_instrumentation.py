@@ -0,0 +1,146 @@
+import typing
+from unittest import mock
+
+import faker
+import httpx
+import pytest
+from httpx import codes as status_codes
+
+from safe_s3_storage import exceptions
+from safe_s3_storage.file_validator import FileValidator
+from safe_s3_storage.instrumentation import (
+    OpenTelemetryStageRecorder,
+    StageMeasurement,
+    measure_stage,
+)
+from safe_s3_storage.kaspersky_scan_engine import (
+    KasperskyScanEngineClient,
+    KasperskyScanEngineResponse,
+    KasperskyScanEngineScanResult,
+)
+from safe_s3_storage.s3_service import S3Service
+from tests.conftest import MIME_OCTET_STREAM, generate_binary_content
+
+
+class ListStageRecorder:
+    def __init__(self) -> None:
+        self.stage_measurements: list[StageMeasurement] = []
+
+    def record_stage(self, stage_measurement: StageMeasurement) -> None:
+        self.stage_measurements.append(stage_measurement)
+
+    def find_stage(self, stage: str) -> StageMeasurement:
+        return next(one_measurement for one_measurement in self.stage_measurements if one_measurement.stage == stage)
+
+
+class TestMeasureStage:
+    def test_records_duration_attributes_and_error(self) -> None:
+        stage_recorder: typing.Final = ListStageRecorder()
+
+        def fail_stage() -> None:
+            with measure_stage(stage_recorder, "stage") as stage_timer:
+                stage_timer.set_attributes(file_size_bytes=42)
+                raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            fail_stage()
+
+        stage_measurement: typing.Final = stage_recorder.find_stage("stage")
+        assert stage_measurement.duration_seconds >= 0
+        assert stage_measurement.attributes == {"file_size_bytes": 42}
+        assert isinstance(stage_measurement.error, ValueError)
+
+    def test_shares_disabled_timer(self) -> None:
+        with measure_stage(None, "first") as first_timer, measure_stage(None, "second") as second_timer:
+            first_timer.set_attributes(file_size_bytes=42)
+
+        assert first_timer is second_timer
+
+
+class TestInstrumentedStages:
+    async def test_records_validation_stages(self, faker: faker.Faker, png_file: bytes) -> None:
+        stage_recorder: typing.Final = ListStageRecorder()
+
+        validated_file: typing.Final = await FileValidator(stage_recorder=stage_recorder).validate_file(
+            file_name=faker.file_name(), file_content=png_file
+        )
+
+        assert [one_measurement.stage for one_measurement in stage_recorder.stage_measurements] == [
+            "detect_mime_type",
+            "convert_image",
+            "validate_file",
+        ]
+        assert stage_recorder.find_stage("detect_mime_type").attributes == {"mime_type": "image/png"}
+        assert stage_recorder.find_stage("convert_image").attributes == {
+            "mime_type": "image/png",
+            "original_size_bytes": len(png_file),
+            "converted": True,
+            "stored_size_bytes": validated_file.file_size,
+        }
+
+    async def test_records_scan_verdict_and_retries(self, faker: faker.Faker) -> None:
+        stage_recorder: typing.Final = ListStageRecorder()
+        responses: typing.Final = iter(
+            [
+                httpx.Response(status_codes.SERVICE_UNAVAILABLE),
+                httpx.Response(
+                    status_codes.OK,
+                    json=KasperskyScanEngineResponse(scanResult=KasperskyScanEngineScanResult.DETECT).model_dump(
+                        mode="json"
+                    ),
+                ),
+            ]
+        )
+        scan_engine: typing.Final = KasperskyScanEngineClient(
+            service_url=faker.url(schemes=["http"]),
+            client_name=faker.pystr(),
+            httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(lambda _: next(responses))),
+            retry_backoff_base_seconds=0,
+            stage_recorder=stage_recorder,
+        )
+        file_content: typing.Final = generate_binary_content(faker)
+
+        with pytest.raises(exceptions.KasperskyScanEngineThreatDetectedError):
+            await scan_engine.scan_memory(file_name=faker.file_name(), file_content=file_content)
+
+        stage_measurement: typing.Final = stage_recorder.find_stage("scan_memory")
+        assert stage_measurement.attributes == {
+            "file_size_bytes": len(file_content),
+            "retries": 1,
+            "verdict": "DETECT",
+        }
+        assert isinstance(stage_measurement.error, exceptions.KasperskyScanEngineThreatDetectedError)
+
+    async def test_records_storage_stages(self, faker: faker.Faker) -> None:
+        stage_recorder: typing.Final = ListStageRecorder()
+        file_content: typing.Final = generate_binary_content(faker)
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            get_object=mock.AsyncMock(return_value={"Body": mock.Mock(read=mock.AsyncMock(return_value=file_content))})
+        )
+        s3_service: typing.Final = S3Service(s3_client=s3_client_mock, stage_recorder=stage_recorder)
+        validated_file: typing.Final = await FileValidator(allowed_mime_types=[MIME_OCTET_STREAM]).validate_file(
+            file_name=faker.file_name(), file_content=file_content
+        )
+
+        uploaded_file: typing.Final = await s3_service.upload_file(
+            validated_file, bucket_name=faker.pystr(), object_key=faker.pystr()
+        )
+        await s3_service.read_file(s3_path=uploaded_file.s3_path)
+
+        assert stage_recorder.find_stage("upload_file").attributes == {"file_size_bytes": len(file_content)}
+        assert stage_recorder.find_stage("read_file").attributes == {"file_size_bytes": len(file_content)}
+
+
+class TestOpenTelemetryStageRecorder:
+    def test_creates_span_with_stage_times(self) -> None:
+        tracer_mock: typing.Final = mock.Mock()
+        stage_measurement: typing.Final = StageMeasurement(
+            stage="scan_memory", started_at_ns=1_000, duration_seconds=0.5, attributes={"verdict": "CLEAN"}
+        )
+
+        OpenTelemetryStageRecorder(tracer=tracer_mock).record_stage(stage_measurement)
+
+        tracer_mock.start_span.assert_called_once_with(
+            "safe_s3_storage.scan_memory", start_time=1_000, attributes={"verdict": "CLEAN"}
+        )
+        tracer_mock.start_span.return_value.end.assert_called_once_with(end_time=500_001_000)
@@ -0,0 +1,452 @@
+import asyncio
+import base64
+import typing
+
+import faker
+import httpx
+import pytest
+from httpx import codes as status_codes
+
+from safe_s3_storage import exceptions
+from safe_s3_storage.circuit_breaker import CircuitBreaker
+from safe_s3_storage.kaspersky_scan_engine import (
+    KasperskyScanEngineClient,
+    KasperskyScanEngineRequest,
+    KasperskyScanEngineResponse,
+    KasperskyScanEngineScanResult,
+    ScanEngineFallbackPolicy,
+)
+from safe_s3_storage.scan_admission import ScanAdmissionController
+from safe_s3_storage.scan_verdict_cache import InMemoryScanVerdictCache
+from tests.conftest import generate_binary_content, iterate_chunks
+
+
+def build_kaspersky_scan_engine_client(
+    *,
+    faker: faker.Faker,
+    scan_results: list[KasperskyScanEngineScanResult],
+    sent_requests: list[httpx.Request],
+    **client_kwargs: typing.Any,  # noqa: ANN401
+) -> KasperskyScanEngineClient:
+    async def handle_request(request: httpx.Request) -> httpx.Response:
+        sent_requests.append(request)
+        await asyncio.sleep(0)
+        scan_result: typing.Final = scan_results[min(len(sent_requests), len(scan_results)) - 1]
+        return httpx.Response(
+            status_codes.OK, json=KasperskyScanEngineResponse(scanResult=scan_result).model_dump(mode="json")
+        )
+
+    return KasperskyScanEngineClient(
+        service_url=faker.url(schemes=["http"]),
+        client_name=faker.pystr(),
+        httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+        **client_kwargs,
+    )
+
+
+class TestKasperskyScanEngineStreamedRequest:
+    @pytest.mark.parametrize("file_size", [0, 1, 2, 3, 4, 3 * 64 * 1024, 3 * 64 * 1024 + 1, 500_000])
+    async def test_sends_same_document_as_buffered_request(self, faker: faker.Faker, file_size: int) -> None:
+        file_content: typing.Final = faker.binary(length=file_size)
+        client_name: typing.Final = faker.pystr() + '"\\ quoted'
+        sent_bodies: typing.Final[list[bytes]] = []
+        sent_content_lengths: typing.Final[list[str]] = []
+
+        async def handle_request(request: httpx.Request) -> httpx.Response:
+            sent_bodies.append(await request.aread())
+            sent_content_lengths.append(request.headers["Content-Length"])
+            return httpx.Response(
+                status_codes.OK,
+                json=KasperskyScanEngineResponse(scanResult=KasperskyScanEngineScanResult.CLEAN).model_dump(
+                    mode="json"
+                ),
+            )
+
+        await KasperskyScanEngineClient(
+            service_url=faker.url(schemes=["http"]),
+            client_name=client_name,
+            httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+        ).scan_memory(file_name=faker.file_name(), file_content=file_content)
+
+        assert KasperskyScanEngineRequest.model_validate_json(sent_bodies[0]) == KasperskyScanEngineRequest(
+            timeout="10000", object=base64.b64encode(file_content).decode(), name=client_name
+        )
+        assert sent_content_lengths == [str(len(sent_bodies[0]))]
+
+
+class TestKasperskyScanEngineChunkedRequest:
+    @pytest.mark.parametrize("file_size", [0, 1, 2, 3, 4, 100, 1000])
+    async def test_sends_same_document_as_buffered_request(self, faker: faker.Faker, file_size: int) -> None:
+        file_content: typing.Final = faker.binary(length=file_size)
+        chunk_starts: typing.Final = sorted({0, *(faker.pyint(max_value=file_size) for _ in range(5))})
+        file_chunks: typing.Final = [
+            file_content[chunk_start:chunk_end]
+            for chunk_start, chunk_end in zip(chunk_starts, [*chunk_starts[1:], file_size], strict=True)
+        ]
+        client_name: typing.Final = faker.pystr()
+        sent_bodies: typing.Final[list[bytes]] = []
+        sent_content_lengths: typing.Final[list[str]] = []
+
+        async def handle_request(request: httpx.Request) -> httpx.Response:
+            sent_bodies.append(await request.aread())
+            sent_content_lengths.append(request.headers["Content-Length"])
+            return build_scan_response(KasperskyScanEngineScanResult.CLEAN)
+
+        await KasperskyScanEngineClient(
+            service_url=faker.url(schemes=["http"]),
+            client_name=client_name,
+            httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+        ).scan_stream(file_name=faker.file_name(), file_stream=iterate_chunks(*file_chunks), file_size=file_size)
+
+        assert KasperskyScanEngineRequest.model_validate_json(sent_bodies[0]) == KasperskyScanEngineRequest(
+            timeout="10000", object=base64.b64encode(file_content).decode(), name=client_name
+        )
+        assert sent_content_lengths == [str(len(sent_bodies[0]))]
+
+    async def test_raises_on_detect(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        with pytest.raises(exceptions.KasperskyScanEngineThreatDetectedError):
+            await build_kaspersky_scan_engine_client(
+                faker=faker, scan_results=[KasperskyScanEngineScanResult.DETECT], sent_requests=[]
+            ).scan_stream(
+                file_name=faker.file_name(), file_stream=iterate_chunks(file_content), file_size=len(file_content)
+            )
+
+    async def test_does_not_retry_stream(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        file_content: typing.Final = generate_binary_content(faker)
+        client: typing.Final = build_failing_kaspersky_scan_engine_client(
+            faker=faker,
+            responses=[
+                httpx.Response(status_codes.SERVICE_UNAVAILABLE),
+                build_scan_response(KasperskyScanEngineScanResult.CLEAN),
+            ],
+            sent_requests=sent_requests,
+        )
+
+        with pytest.raises(exceptions.KasperskyScanEngineConnectionStatusError):
+            await client.scan_stream(
+                file_name=faker.file_name(), file_stream=iterate_chunks(file_content), file_size=len(file_content)
+            )
+        assert len(sent_requests) == 1
+
+
+class TestKasperskyScanEngineVerdictCache:
+    async def test_reuses_clean_verdict(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        file_content: typing.Final = generate_binary_content(faker)
+        kaspersky_scan_engine: typing.Final = build_kaspersky_scan_engine_client(
+            faker=faker,
+            scan_results=[KasperskyScanEngineScanResult.CLEAN],
+            sent_requests=sent_requests,
+            verdict_cache=InMemoryScanVerdictCache(),
+        )
+
+        for _ in range(3):
+            await kaspersky_scan_engine.scan_memory(file_name=faker.file_name(), file_content=file_content)
+
+        assert len(sent_requests) == 1
+
+    async def test_reraises_cached_detect_verdict(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        file_content: typing.Final = generate_binary_content(faker)
+        kaspersky_scan_engine: typing.Final = build_kaspersky_scan_engine_client(
+            faker=faker,
+            scan_results=[KasperskyScanEngineScanResult.DETECT],
+            sent_requests=sent_requests,
+            verdict_cache=InMemoryScanVerdictCache(),
+        )
+
+        for _ in range(2):
+            with pytest.raises(exceptions.KasperskyScanEngineThreatDetectedError):
+                await kaspersky_scan_engine.scan_memory(file_name=faker.file_name(), file_content=file_content)
+
+        assert len(sent_requests) == 1
+
+    async def test_does_not_cache_not_scanned_verdict(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        file_content: typing.Final = generate_binary_content(faker)
+        kaspersky_scan_engine: typing.Final = build_kaspersky_scan_engine_client(
+            faker=faker,
+            scan_results=[KasperskyScanEngineScanResult.NON_SCANNED, KasperskyScanEngineScanResult.CLEAN],
+            sent_requests=sent_requests,
+            verdict_cache=InMemoryScanVerdictCache(),
+            not_scanned_policy=ScanEngineFallbackPolicy.skip_scan,
+        )
+
+        for _ in range(3):
+            await kaspersky_scan_engine.scan_memory(file_name=faker.file_name(), file_content=file_content)
+
+        assert len(sent_requests) == 2  # noqa: PLR2004
+
+    async def test_coalesces_concurrent_scans(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        file_content: typing.Final = generate_binary_content(faker)
+        kaspersky_scan_engine: typing.Final = build_kaspersky_scan_engine_client(
+            faker=faker,
+            scan_results=[KasperskyScanEngineScanResult.CLEAN],
+            sent_requests=sent_requests,
+            verdict_cache=InMemoryScanVerdictCache(),
+        )
+
+        await asyncio.gather(
+            *(
+                kaspersky_scan_engine.scan_memory(file_name=faker.file_name(), file_content=file_content)
+                for _ in range(5)
+            )
+        )
+
+        assert len(sent_requests) == 1
+
+    async def test_coalesced_scans_share_failure(self, faker: faker.Faker) -> None:
+        kaspersky_scan_engine: typing.Final = KasperskyScanEngineClient(
+            service_url=faker.url(schemes=["http"]),
+            client_name=faker.pystr(),
+            httpx_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(lambda _: httpx.Response(status_codes.BAD_REQUEST))
+            ),
+            verdict_cache=InMemoryScanVerdictCache(),
+        )
+        file_content: typing.Final = generate_binary_content(faker)
+
+        scan_results: typing.Final = await asyncio.gather(
+            *(
+                kaspersky_scan_engine.scan_memory(file_name=faker.file_name(), file_content=file_content)
+                for _ in range(3)
+            ),
+            return_exceptions=True,
+        )
+
+        assert all(
+            isinstance(one_result, exceptions.KasperskyScanEngineConnectionStatusError) for one_result in scan_results
+        )
+
+
+def build_failing_kaspersky_scan_engine_client(
+    *,
+    faker: faker.Faker,
+    responses: list[httpx.Response | Exception],
+    sent_requests: list[httpx.Request],
+    **client_kwargs: typing.Any,  # noqa: ANN401
+) -> KasperskyScanEngineClient:
+    def handle_request(request: httpx.Request) -> httpx.Response:
+        sent_requests.append(request)
+        one_response: typing.Final = responses[min(len(sent_requests), len(responses)) - 1]
+        if isinstance(one_response, Exception):
+            raise one_response
+        return one_response
+
+    return KasperskyScanEngineClient(
+        service_url=faker.url(schemes=["http"]),
+        client_name=faker.pystr(),
+        httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+        retry_backoff_base_seconds=0,
+        **client_kwargs,
+    )
+
+
+def build_scan_response(scan_result: KasperskyScanEngineScanResult) -> httpx.Response:
+    return httpx.Response(
+        status_codes.OK, json=KasperskyScanEngineResponse(scanResult=scan_result).model_dump(mode="json")
+    )
+
+
+class TestKasperskyScanEngineAdmission:
+    async def test_limits_in_flight_scans(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        admission_controller: typing.Final = ScanAdmissionController(max_in_flight_scans=2)
+        kaspersky_scan_engine: typing.Final = build_kaspersky_scan_engine_client(
+            faker=faker,
+            scan_results=[KasperskyScanEngineScanResult.CLEAN],
+            sent_requests=sent_requests,
+            admission_controller=admission_controller,
+        )
+        max_in_flight_scans = 0
+
+        async def scan_and_track() -> None:
+            nonlocal max_in_flight_scans
+            scan_task: typing.Final = asyncio.create_task(
+                kaspersky_scan_engine.scan_memory(
+                    file_name=faker.file_name(), file_content=generate_binary_content(faker), admission_key="tenant"
+                )
+            )
+            while not scan_task.done():
+                max_in_flight_scans = max(max_in_flight_scans, admission_controller.in_flight_scans)
+                await asyncio.sleep(0)
+            await scan_task
+
+        await asyncio.gather(*(scan_and_track() for _ in range(6)))
+
+        assert len(sent_requests) == 6  # noqa: PLR2004
+        assert max_in_flight_scans == 2  # noqa: PLR2004
+        assert admission_controller.in_flight_scans == 0
+
+    async def test_rejects_scans_over_queue_limit(self, faker: faker.Faker) -> None:
+        kaspersky_scan_engine: typing.Final = build_kaspersky_scan_engine_client(
+            faker=faker,
+            scan_results=[KasperskyScanEngineScanResult.CLEAN],
+            sent_requests=[],
+            admission_controller=ScanAdmissionController(max_in_flight_scans=1, max_queued_scans=0),
+        )
+
+        scan_results: typing.Final = await asyncio.gather(
+            *(
+                kaspersky_scan_engine.scan_memory(
+                    file_name=faker.file_name(), file_content=generate_binary_content(faker)
+                )
+                for _ in range(2)
+            ),
+            return_exceptions=True,
+        )
+
+        assert scan_results[0] is None
+        assert isinstance(scan_results[1], exceptions.TooManyQueuedScansError)
+
+    async def test_rejects_scans_despite_skip_fallback(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        kaspersky_scan_engine: typing.Final = build_kaspersky_scan_engine_client(
+            faker=faker,
+            scan_results=[KasperskyScanEngineScanResult.CLEAN],
+            sent_requests=sent_requests,
+            admission_controller=ScanAdmissionController(max_in_flight_scans=1, max_queued_scans=0),
+            unavailable_policy=ScanEngineFallbackPolicy.skip_scan,
+        )
+
+        scan_results: typing.Final = await asyncio.gather(
+            *(
+                kaspersky_scan_engine.scan_memory(
+                    file_name=faker.file_name(), file_content=generate_binary_content(faker)
+                )
+                for _ in range(2)
+            ),
+            return_exceptions=True,
+        )
+
+        assert isinstance(scan_results[1], exceptions.TooManyQueuedScansError)
+        assert len(sent_requests) == 1
+
+
+class TestKasperskyScanEngineRetries:
+    @pytest.mark.parametrize(
+        "failed_response",
+        [
+            httpx.Response(status_codes.SERVICE_UNAVAILABLE),
+            httpx.Response(status_codes.TOO_MANY_REQUESTS),
+            httpx.ConnectError("connection refused"),
+            httpx.ReadTimeout("timed out"),
+            build_scan_response(KasperskyScanEngineScanResult.SERVER_ERROR),
+        ],
+    )
+    async def test_retries_transient_errors(
+        self, faker: faker.Faker, failed_response: httpx.Response | Exception
+    ) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        kaspersky_scan_engine: typing.Final = build_failing_kaspersky_scan_engine_client(
+            faker=faker,
+            responses=[failed_response, failed_response, build_scan_response(KasperskyScanEngineScanResult.CLEAN)],
+            sent_requests=sent_requests,
+        )
+
+        await kaspersky_scan_engine.scan_memory(
+            file_name=faker.file_name(), file_content=generate_binary_content(faker)
+        )
+
+        assert len(sent_requests) == 3  # noqa: PLR2004
+
+    async def test_does_not_retry_client_errors(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        kaspersky_scan_engine: typing.Final = build_failing_kaspersky_scan_engine_client(
+            faker=faker, responses=[httpx.Response(status_codes.BAD_REQUEST)], sent_requests=sent_requests
+        )
+
+        with pytest.raises(exceptions.KasperskyScanEngineConnectionStatusError):
+            await kaspersky_scan_engine.scan_memory(
+                file_name=faker.file_name(), file_content=generate_binary_content(faker)
+            )
+
+        assert len(sent_requests) == 1
+
+    async def test_fails_after_max_retries(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        kaspersky_scan_engine: typing.Final = build_failing_kaspersky_scan_engine_client(
+            faker=faker,
+            responses=[httpx.ConnectError("connection refused")],
+            sent_requests=sent_requests,
+            max_retries=2,
+        )
+
+        with pytest.raises(exceptions.KasperskyScanEngineConnectionStatusError) as exc_info:
+            await kaspersky_scan_engine.scan_memory(
+                file_name=faker.file_name(), file_content=generate_binary_content(faker)
+            )
+
+        assert isinstance(exc_info.value.__cause__, httpx.ConnectError)
+        assert len(sent_requests) == 3  # noqa: PLR2004
+
+    async def test_skips_scan_after_max_retries_with_fallback(self, faker: faker.Faker) -> None:
+        kaspersky_scan_engine: typing.Final = build_failing_kaspersky_scan_engine_client(
+            faker=faker,
+            responses=[httpx.Response(status_codes.BAD_GATEWAY)],
+            sent_requests=[],
+            max_retries=1,
+            unavailable_policy=ScanEngineFallbackPolicy.skip_scan,
+        )
+
+        await kaspersky_scan_engine.scan_memory(
+            file_name=faker.file_name(), file_content=generate_binary_content(faker)
+        )
+
+    @pytest.mark.parametrize(
+        "scan_result", [KasperskyScanEngineScanResult.NON_SCANNED, KasperskyScanEngineScanResult.SERVER_ERROR]
+    )
+    async def test_raises_on_not_scanned(self, faker: faker.Faker, scan_result: KasperskyScanEngineScanResult) -> None:
+        kaspersky_scan_engine: typing.Final = build_failing_kaspersky_scan_engine_client(
+            faker=faker, responses=[build_scan_response(scan_result)], sent_requests=[], max_retries=1
+        )
+
+        with pytest.raises(exceptions.KasperskyScanEngineNotScannedError):
+            await kaspersky_scan_engine.scan_memory(
+                file_name=faker.file_name(), file_content=generate_binary_content(faker)
+            )
+
+
+class TestKasperskyScanEngineCircuitBreaker:
+    async def test_fails_fast_when_circuit_is_open(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        kaspersky_scan_engine: typing.Final = build_failing_kaspersky_scan_engine_client(
+            faker=faker,
+            responses=[httpx.ConnectError("connection refused")],
+            sent_requests=sent_requests,
+            max_retries=0,
+            circuit_breaker=CircuitBreaker(failure_threshold=2),
+        )
+        for _ in range(2):
+            with pytest.raises(exceptions.KasperskyScanEngineConnectionStatusError):
+                await kaspersky_scan_engine.scan_memory(
+                    file_name=faker.file_name(), file_content=generate_binary_content(faker)
+                )
+
+        with pytest.raises(exceptions.KasperskyScanEngineUnavailableError):
+            await kaspersky_scan_engine.scan_memory(
+                file_name=faker.file_name(), file_content=generate_binary_content(faker)
+            )
+
+        assert len(sent_requests) == 2  # noqa: PLR2004
+
+    async def test_skips_scan_when_circuit_is_open_with_fallback(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+        kaspersky_scan_engine: typing.Final = build_failing_kaspersky_scan_engine_client(
+            faker=faker,
+            responses=[httpx.ConnectError("connection refused")],
+            sent_requests=sent_requests,
+            max_retries=0,
+            circuit_breaker=CircuitBreaker(failure_threshold=1),
+            unavailable_policy=ScanEngineFallbackPolicy.skip_scan,
+        )
+
+        for _ in range(3):
+            await kaspersky_scan_engine.scan_memory(
+                file_name=faker.file_name(), file_content=generate_binary_content(faker)
+            )
+
+        assert len(sent_requests) == 1
@@ -0,0 +1,51 @@
+import concurrent.futures
+import typing
+
+import faker
+import magic
+import pytest
+
+from safe_s3_storage.mime_detection import MimeTypeDetector, match_mime_type_signature
+from tests.conftest import MIME_OCTET_STREAM, generate_binary_content
+
+
+SIGNATURE_SAMPLES: typing.Final = [
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF\x00", "image/jpeg"),
+    (b"GIF89a\x01\x00\x01\x00", "image/gif"),
+    (b"RIFF\x24\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"%PDF-1.7\n", "application/pdf"),
+]
+
+
+class TestMimeTypeDetector:
+    @pytest.mark.parametrize(("file_content", "mime_type"), SIGNATURE_SAMPLES)
+    def test_matches_signature(self, file_content: bytes, mime_type: str) -> None:
+        assert match_mime_type_signature(file_content) == mime_type
+
+    def test_matches_png_signature(self, png_file: bytes) -> None:
+        assert match_mime_type_signature(png_file) == "image/png"
+        assert MimeTypeDetector().detect_mime_type(png_file) == magic.from_buffer(png_file, mime=True)
+
+    def test_does_not_match_zip_signature(self) -> None:
+        assert match_mime_type_signature(b"PK\x03\x04\x14\x00\x00\x00") is None
+
+    def test_falls_back_to_libmagic(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = b"\x00" + generate_binary_content(faker)
+
+        assert match_mime_type_signature(file_content) is None
+        assert MimeTypeDetector().detect_mime_type(file_content) == magic.from_buffer(file_content, mime=True)
+
+    def test_passes_header_slice_to_libmagic(self) -> None:
+        file_content: typing.Final = b"\x00" * 16 + b"plain text" * 100
+
+        assert MimeTypeDetector(libmagic_header_size_bytes=16).detect_mime_type(file_content) == MIME_OCTET_STREAM
+
+    def test_is_thread_safe(self, faker: faker.Faker, png_file: bytes) -> None:
+        mime_type_detector: typing.Final = MimeTypeDetector()
+        file_contents: typing.Final = [png_file, b"\x00" + generate_binary_content(faker)] * 50
+        expected_mime_types: typing.Final = [magic.from_buffer(one_content, mime=True) for one_content in file_contents]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            mime_types: typing.Final = list(executor.map(mime_type_detector.detect_mime_type, file_contents))
+
+        assert mime_types == expected_mime_types
@@ -0,0 +1,43 @@
+import typing
+
+import faker
+
+from safe_s3_storage.presigned_urls import PresignedUrlCache
+from tests.conftest import FakeClock
+
+
+class TestPresignedUrlCache:
+    def test_returns_stored_url(self, faker: faker.Faker) -> None:
+        cache_key, presigned_url = faker.pystr(), faker.url()
+        url_cache: typing.Final = PresignedUrlCache()
+
+        url_cache.set(cache_key, presigned_url, expires_in_seconds=3600)
+
+        assert url_cache.get(cache_key) == presigned_url
+        assert url_cache.get(faker.pystr()) is None
+
+    def test_expires_entries_before_url_expiry(self, faker: faker.Faker) -> None:
+        cache_key: typing.Final = faker.pystr()
+        clock: typing.Final = FakeClock()
+        url_cache: typing.Final = PresignedUrlCache(refresh_before_expiry_seconds=60, clock=clock)
+        url_cache.set(cache_key, faker.url(), expires_in_seconds=600)
+
+        clock.now = 539
+        assert url_cache.get(cache_key) is not None
+
+        clock.now = 540
+        assert url_cache.get(cache_key) is None
+        assert len(url_cache) == 0
+
+    def test_evicts_least_recently_used(self, faker: faker.Faker) -> None:
+        first_key, second_key, third_key = faker.pystr(), faker.pystr(), faker.pystr()
+        url_cache: typing.Final = PresignedUrlCache(max_entries=2)
+        url_cache.set(first_key, "first", expires_in_seconds=3600)
+        url_cache.set(second_key, "second", expires_in_seconds=3600)
+        url_cache.get(first_key)
+
+        url_cache.set(third_key, "third", expires_in_seconds=3600)
+
+        assert url_cache.get(first_key) == "first"
+        assert url_cache.get(second_key) is None
+        assert url_cache.get(third_key) == "third"
@@ -1,14 +1,38 @@
+import asyncio
+import base64
 import datetime
+import hashlib
+import random
 import typing
+import urllib.parse
 from unittest import mock
 
+import aioboto3
+import botocore.auth
 import faker
 import pytest
+from aiobotocore.config import AioConfig
+from botocore.exceptions import ClientError
 
-from safe_s3_storage.exceptions import FailedToReplaceS3BaseUrlWithProxyBaseUrlError, InvalidS3PathError
-from safe_s3_storage.file_validator import FileValidator
-from safe_s3_storage.s3_service import S3Service, UploadedFile
-from tests.conftest import MIME_OCTET_STREAM, generate_binary_content
+from safe_s3_storage.exceptions import (
+    FailedToReplaceS3BaseUrlWithProxyBaseUrlError,
+    InvalidByteRangeError,
+    InvalidS3PathError,
+)
+from safe_s3_storage.existing_object_cache import ExistingObjectCache
+from safe_s3_storage.file_read_cache import FileReadCache
+from safe_s3_storage.file_validator import FileValidator, ValidatedFile, ValidatedFileStream, ValidatedImageRendition
+from safe_s3_storage.presigned_urls import PresignedUrlCache
+from safe_s3_storage.s3_service import (
+    CopiedFile,
+    FileCopyResult,
+    FileDeletionResult,
+    FileHeadResult,
+    S3Service,
+    UploadedFile,
+    UploadedStreamedFile,
+)
+from tests.conftest import MIME_OCTET_STREAM, OCTET_STREAM_CONTENT, FakeClock, generate_binary_content, iterate_chunks
 
 
 class TestS3ServiceUpload:
@@ -30,7 +54,6 @@ class TestS3ServiceUpload:
         )
 
         assert uploaded_file == UploadedFile(
-            file_content=file_content,
             file_name=file_name,
             file_size=len(file_content),
             mime_type=MIME_OCTET_STREAM,
@@ -45,6 +68,370 @@ class TestS3ServiceUpload:
         )
 
 
+class TestS3ServiceUploadRenditions:
+    async def test_uploads_renditions_under_derived_keys(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock()
+        bucket_name, object_key = faker.pystr(), faker.pystr()
+        validated_renditions: typing.Final = [
+            ValidatedImageRendition(
+                file_name=f"{one_rendition_name}.webp",
+                file_content=generate_binary_content(faker),
+                file_size=10,
+                mime_type="image/webp",
+                rendition_name=one_rendition_name,
+            )
+            for one_rendition_name in ("original", "thumbnail")
+        ]
+
+        uploaded_files: typing.Final = await S3Service(s3_client=s3_client_mock).upload_image_renditions(
+            validated_renditions, bucket_name=bucket_name, object_key=object_key
+        )
+
+        assert [one_file.s3_path for one_file in uploaded_files] == [
+            f"{bucket_name}/{object_key}/original",
+            f"{bucket_name}/{object_key}/thumbnail",
+        ]
+        assert sorted(one_call.kwargs["Key"] for one_call in s3_client_mock.put_object.call_args_list) == [
+            f"{object_key}/original",
+            f"{object_key}/thumbnail",
+        ]
+
+
+class TestS3ServiceUploadBuffer:
+    @pytest.mark.parametrize("buffer_type", [bytearray, memoryview])
+    async def test_uploads_buffer_without_copying(self, faker: faker.Faker, buffer_type: type) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock()
+        file_content: typing.Final = generate_binary_content(faker)
+
+        uploaded_file: typing.Final = await S3Service(s3_client=s3_client_mock).upload_file(
+            ValidatedFile(
+                file_name=faker.file_name(),
+                file_content=buffer_type(file_content),
+                file_size=len(file_content),
+                mime_type=MIME_OCTET_STREAM,
+            ),
+            bucket_name=faker.pystr(),
+            object_key=faker.pystr(),
+        )
+
+        request_body: typing.Final = s3_client_mock.put_object.mock_calls[0].kwargs["Body"]
+        assert request_body.read() == file_content
+        assert uploaded_file.file_size == len(file_content)
+
+
+class TestS3ServiceUploadByContent:
+    async def test_uploads_missing_object_with_checksum(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            head_object=mock.AsyncMock(side_effect=ClientError({"Error": {"Code": "404"}}, "HeadObject"))
+        )
+        bucket_name, object_key_prefix = faker.pystr(), f"{faker.pystr()}/"
+        file_content: typing.Final = OCTET_STREAM_CONTENT
+        validated_file: typing.Final = await FileValidator(
+            allowed_mime_types=[MIME_OCTET_STREAM], compute_content_digest=True
+        ).validate_file(file_name=faker.file_name(), file_content=file_content)
+
+        uploaded_file: typing.Final = await S3Service(s3_client=s3_client_mock).upload_file_by_content(
+            validated_file, bucket_name=bucket_name, object_key_prefix=object_key_prefix
+        )
+
+        content_digest: typing.Final = hashlib.sha256(file_content).digest()
+        assert validated_file.content_sha256 == content_digest.hex()
+        assert uploaded_file.s3_path == f"{bucket_name}/{object_key_prefix}{content_digest.hex()}"
+        assert not uploaded_file.deduplicated
+        s3_client_mock.put_object.assert_called_once_with(
+            Body=file_content,
+            Bucket=bucket_name,
+            Key=f"{object_key_prefix}{content_digest.hex()}",
+            ContentType=MIME_OCTET_STREAM,
+            Metadata={},
+            ChecksumSHA256=base64.b64encode(content_digest).decode(),
+        )
+
+    async def test_skips_upload_of_existing_object(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock()
+        file_content: typing.Final = generate_binary_content(faker)
+
+        uploaded_file: typing.Final = await S3Service(s3_client=s3_client_mock).upload_file_by_content(
+            ValidatedFile(
+                file_name=faker.file_name(),
+                file_content=file_content,
+                file_size=len(file_content),
+                mime_type=MIME_OCTET_STREAM,
+            ),
+            bucket_name=faker.pystr(),
+        )
+
+        assert uploaded_file.deduplicated
+        assert uploaded_file.s3_path.endswith(hashlib.sha256(file_content).hexdigest())
+        s3_client_mock.head_object.assert_called_once()
+        s3_client_mock.put_object.assert_not_called()
+
+    async def test_caches_existing_objects(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            head_object=mock.AsyncMock(side_effect=ClientError({"Error": {"Code": "404"}}, "HeadObject"))
+        )
+        s3_service: typing.Final = S3Service(s3_client=s3_client_mock, existing_object_cache=ExistingObjectCache())
+        file_content: typing.Final = generate_binary_content(faker)
+        validated_file: typing.Final = ValidatedFile(
+            file_name=faker.file_name(),
+            file_content=file_content,
+            file_size=len(file_content),
+            mime_type=MIME_OCTET_STREAM,
+        )
+        bucket_name: typing.Final = faker.pystr()
+
+        first_upload: typing.Final = await s3_service.upload_file_by_content(validated_file, bucket_name=bucket_name)
+        second_upload: typing.Final = await s3_service.upload_file_by_content(validated_file, bucket_name=bucket_name)
+
+        assert not first_upload.deduplicated
+        assert second_upload.deduplicated
+        assert second_upload.s3_path == first_upload.s3_path
+        s3_client_mock.head_object.assert_called_once()
+        s3_client_mock.put_object.assert_called_once()
+
+    async def test_uploads_deleted_object_again(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            head_object=mock.AsyncMock(side_effect=ClientError({"Error": {"Code": "404"}}, "HeadObject"))
+        )
+        s3_service: typing.Final = S3Service(s3_client=s3_client_mock, existing_object_cache=ExistingObjectCache())
+        file_content: typing.Final = generate_binary_content(faker)
+        validated_file: typing.Final = ValidatedFile(
+            file_name=faker.file_name(),
+            file_content=file_content,
+            file_size=len(file_content),
+            mime_type=MIME_OCTET_STREAM,
+        )
+        bucket_name: typing.Final = faker.pystr()
+        first_upload: typing.Final = await s3_service.upload_file_by_content(validated_file, bucket_name=bucket_name)
+        await s3_service.delete_file(s3_path=first_upload.s3_path)
+        s3_client_mock.reset_mock()
+
+        second_upload: typing.Final = await s3_service.upload_file_by_content(validated_file, bucket_name=bucket_name)
+
+        assert not second_upload.deduplicated
+        s3_client_mock.head_object.assert_called_once()
+        s3_client_mock.put_object.assert_called_once()
+
+    async def test_fails_on_other_head_errors(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            head_object=mock.AsyncMock(side_effect=ClientError({"Error": {"Code": "403"}}, "HeadObject"))
+        )
+        file_content: typing.Final = generate_binary_content(faker)
+
+        with pytest.raises(ClientError):
+            await S3Service(s3_client=s3_client_mock).upload_file_by_content(
+                ValidatedFile(
+                    file_name=faker.file_name(),
+                    file_content=file_content,
+                    file_size=len(file_content),
+                    mime_type=MIME_OCTET_STREAM,
+                ),
+                bucket_name=faker.pystr(),
+            )
+
+        s3_client_mock.put_object.assert_not_called()
+
+    async def test_sends_part_checksums_in_multipart_upload(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            head_object=mock.AsyncMock(side_effect=ClientError({"Error": {"Code": "404"}}, "HeadObject")),
+            create_multipart_upload=mock.AsyncMock(return_value={"UploadId": faker.pystr()}),
+            upload_part=mock.AsyncMock(return_value={"ETag": faker.pystr()}),
+        )
+        file_content: typing.Final = b"0123456789"
+
+        await S3Service(
+            s3_client=s3_client_mock, multipart_threshold_bytes=len(file_content), multipart_part_size_bytes=5
+        ).upload_file_by_content(
+            ValidatedFile(
+                file_name=faker.file_name(),
+                file_content=file_content,
+                file_size=len(file_content),
+                mime_type=MIME_OCTET_STREAM,
+            ),
+            bucket_name=faker.pystr(),
+        )
+
+        assert s3_client_mock.create_multipart_upload.mock_calls[0].kwargs["ChecksumAlgorithm"] == "SHA256"
+        expected_checksums: typing.Final = [
+            base64.b64encode(hashlib.sha256(one_part).digest()).decode() for one_part in (b"01234", b"56789")
+        ]
+        assert [
+            one_call.kwargs["ChecksumSHA256"] for one_call in s3_client_mock.upload_part.mock_calls
+        ] == expected_checksums
+        assert [
+            one_part["ChecksumSHA256"]
+            for one_part in s3_client_mock.complete_multipart_upload.mock_calls[0].kwargs["MultipartUpload"]["Parts"]
+        ] == expected_checksums
+
+
+class TestS3ServiceMultipartUpload:
+    async def test_ok_multipart_bytes(self, faker: faker.Faker) -> None:
+        multipart_concurrency: typing.Final = 2
+        in_flight_parts = 0
+        max_in_flight_parts = 0
+
+        async def upload_part(**kwargs: typing.Any) -> dict[str, str]:  # noqa: ANN401
+            nonlocal in_flight_parts, max_in_flight_parts
+            in_flight_parts += 1
+            max_in_flight_parts = max(max_in_flight_parts, in_flight_parts)
+            await asyncio.sleep(random.random() / 100)
+            in_flight_parts -= 1
+            return {"ETag": f"etag-{kwargs['PartNumber']}"}
+
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            create_multipart_upload=mock.AsyncMock(return_value={"UploadId": faker.pystr()}),
+            upload_part=mock.AsyncMock(side_effect=upload_part),
+        )
+        file_content: typing.Final = b"0123456789abcdefghij"
+
+        uploaded_file: typing.Final = await S3Service(
+            s3_client=s3_client_mock,
+            multipart_threshold_bytes=len(file_content),
+            multipart_part_size_bytes=3,
+            multipart_concurrency=multipart_concurrency,
+        ).upload_file(
+            ValidatedFile(
+                file_name=faker.file_name(),
+                file_content=file_content,
+                file_size=len(file_content),
+                mime_type=MIME_OCTET_STREAM,
+            ),
+            bucket_name=faker.pystr(),
+            object_key=faker.pystr(),
+        )
+
+        assert uploaded_file.file_size == len(file_content)
+        assert max_in_flight_parts == multipart_concurrency
+        assert (
+            b"".join(one_call.kwargs["Body"].read() for one_call in s3_client_mock.upload_part.mock_calls)
+            == file_content
+        )
+        assert [
+            one_part["PartNumber"]
+            for one_part in s3_client_mock.complete_multipart_upload.mock_calls[0].kwargs["MultipartUpload"]["Parts"]
+        ] == list(range(1, 8))
+        s3_client_mock.put_object.assert_not_called()
+
+    async def test_bytes_below_threshold_uses_single_request(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock()
+        file_content: typing.Final = generate_binary_content(faker)
+
+        await S3Service(s3_client=s3_client_mock, multipart_threshold_bytes=len(file_content) + 1).upload_file(
+            ValidatedFile(
+                file_name=faker.file_name(),
+                file_content=file_content,
+                file_size=len(file_content),
+                mime_type=MIME_OCTET_STREAM,
+            ),
+            bucket_name=faker.pystr(),
+            object_key=faker.pystr(),
+        )
+
+        s3_client_mock.put_object.assert_called_once()
+        s3_client_mock.create_multipart_upload.assert_not_called()
+
+
+class TestS3ServiceUploadStream:
+    async def test_ok_small_stream(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock()
+        file_name, bucket_name = faker.file_name(), faker.pystr()
+        file_chunks: typing.Final = [
+            generate_binary_content(faker) for _ in range(faker.pyint(min_value=2, max_value=10))
+        ]
+
+        uploaded_file: typing.Final = await S3Service(s3_client=s3_client_mock).upload_file_stream(
+            ValidatedFileStream(
+                file_name=file_name, mime_type=MIME_OCTET_STREAM, file_stream=iterate_chunks(*file_chunks)
+            ),
+            bucket_name=bucket_name,
+            object_key=file_name,
+        )
+
+        assert uploaded_file == UploadedStreamedFile(
+            file_name=file_name,
+            file_size=len(b"".join(file_chunks)),
+            mime_type=MIME_OCTET_STREAM,
+            s3_path=f"{bucket_name}/{file_name}",
+        )
+        s3_client_mock.put_object.assert_called_once_with(
+            Body=b"".join(file_chunks), Bucket=bucket_name, Key=file_name, ContentType=MIME_OCTET_STREAM, Metadata={}
+        )
+        s3_client_mock.create_multipart_upload.assert_not_called()
+
+    async def test_stream_below_threshold_uses_single_request(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock()
+
+        await S3Service(
+            s3_client=s3_client_mock, multipart_threshold_bytes=100, multipart_part_size_bytes=4
+        ).upload_file_stream(
+            ValidatedFileStream(
+                file_name=faker.file_name(), mime_type=MIME_OCTET_STREAM, file_stream=iterate_chunks(b"abc", b"defghij")
+            ),
+            bucket_name=faker.pystr(),
+            object_key=faker.pystr(),
+        )
+
+        assert s3_client_mock.put_object.mock_calls[0].kwargs["Body"] == b"abcdefghij"
+        s3_client_mock.create_multipart_upload.assert_not_called()
+
+    async def test_ok_multipart_stream(self, faker: faker.Faker) -> None:
+        upload_id, bucket_name, object_key = faker.pystr(), faker.pystr(), faker.pystr()
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            create_multipart_upload=mock.AsyncMock(return_value={"UploadId": upload_id}),
+            upload_part=mock.AsyncMock(side_effect=lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}),
+        )
+
+        uploaded_file: typing.Final = await S3Service(
+            s3_client=s3_client_mock, multipart_threshold_bytes=4, multipart_part_size_bytes=4
+        ).upload_file_stream(
+            ValidatedFileStream(
+                file_name=faker.file_name(), mime_type=MIME_OCTET_STREAM, file_stream=iterate_chunks(b"abc", b"defghij")
+            ),
+            bucket_name=bucket_name,
+            object_key=object_key,
+        )
+
+        assert uploaded_file.file_size == len(b"abcdefghij")
+        assert [one_call.kwargs["Body"] for one_call in s3_client_mock.upload_part.mock_calls] == [
+            b"abcd",
+            b"efgh",
+            b"ij",
+        ]
+        s3_client_mock.complete_multipart_upload.assert_called_once_with(
+            Bucket=bucket_name,
+            Key=object_key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [{"ETag": f"etag-{part_number}", "PartNumber": part_number} for part_number in (1, 2, 3)]
+            },
+        )
+        s3_client_mock.put_object.assert_not_called()
+        s3_client_mock.abort_multipart_upload.assert_not_called()
+
+    async def test_aborts_multipart_upload_on_failure(self, faker: faker.Faker) -> None:
+        upload_id, bucket_name, object_key = faker.pystr(), faker.pystr(), faker.pystr()
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            create_multipart_upload=mock.AsyncMock(return_value={"UploadId": upload_id}),
+            upload_part=mock.AsyncMock(side_effect=[{"ETag": "etag-1"}, RuntimeError]),
+        )
+
+        with pytest.raises(RuntimeError):
+            await S3Service(
+                s3_client=s3_client_mock, multipart_threshold_bytes=4, multipart_part_size_bytes=4
+            ).upload_file_stream(
+                ValidatedFileStream(
+                    file_name=faker.file_name(), mime_type=MIME_OCTET_STREAM, file_stream=iterate_chunks(b"a" * 10)
+                ),
+                bucket_name=bucket_name,
+                object_key=object_key,
+            )
+
+        s3_client_mock.abort_multipart_upload.assert_called_once_with(
+            Bucket=bucket_name, Key=object_key, UploadId=upload_id
+        )
+        s3_client_mock.complete_multipart_upload.assert_not_called()
+
+
 class TestS3ServiceRead:
     async def test_ok_read(self, faker: faker.Faker) -> None:
         file_content: typing.Final = generate_binary_content(faker)
@@ -82,6 +469,379 @@ class TestS3ServiceRead:
             await S3Service(s3_client=mock.Mock()).read_file(s3_path=faker.pystr())
 
 
+def build_ranged_s3_client_mock(file_content: bytes, etag: str) -> mock.Mock:
+    async def get_object(**kwargs: typing.Any) -> dict[str, typing.Any]:  # noqa: ANN401
+        if "IfMatch" in kwargs:
+            assert kwargs["IfMatch"] == etag
+        if "Range" not in kwargs:
+            return {"Body": mock.Mock(read=mock.AsyncMock(side_effect=[file_content, b""])), "ETag": etag}
+        if not file_content:
+            raise ClientError({"Error": {"Code": "InvalidRange"}}, "GetObject")
+
+        range_start, range_end = kwargs["Range"].removeprefix("bytes=").split("-")
+        range_content: typing.Final = file_content[int(range_start) : int(range_end) + 1 if range_end else None]
+        await asyncio.sleep(random.random() / 1000)
+        return {
+            # a chunked read stops at the empty read after the content
+            "Body": mock.Mock(read=mock.AsyncMock(side_effect=[range_content, b""])),
+            "ETag": etag,
+            "ContentRange": f"bytes {range_start}-{int(range_start) + len(range_content) - 1}/{len(file_content)}",
+        }
+
+    return mock.Mock(get_object=mock.AsyncMock(side_effect=get_object))
+
+
+class TestS3ServiceRangedRead:
+    @pytest.mark.parametrize("file_size", [0, 1, 9, 10, 11, 95])
+    async def test_ok_read(self, faker: faker.Faker, file_size: int) -> None:
+        file_content: typing.Final = faker.binary(length=file_size)
+        s3_client_mock: typing.Final = build_ranged_s3_client_mock(file_content, faker.pystr())
+
+        read_file: typing.Final = await S3Service(
+            s3_client=s3_client_mock, ranged_download_part_size_bytes=10, ranged_download_concurrency=3
+        ).read_file(s3_path=f"{faker.pystr()}/{faker.pystr()}")
+
+        assert read_file == file_content
+        assert s3_client_mock.get_object.call_count == max(1, -(-file_size // 10))
+
+    async def test_ok_stream_in_order(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = faker.binary(length=1000)
+
+        read_chunks: typing.Final = [
+            one_chunk
+            async for one_chunk in S3Service(
+                s3_client=build_ranged_s3_client_mock(file_content, faker.pystr()),
+                ranged_download_part_size_bytes=64,
+                ranged_download_concurrency=4,
+            ).stream_file(s3_path=f"{faker.pystr()}/{faker.pystr()}", read_chunk_size=16)
+        ]
+
+        assert b"".join(read_chunks) == file_content
+        assert max(len(one_chunk) for one_chunk in read_chunks) == 16  # noqa: PLR2004
+
+    @pytest.mark.parametrize(("offset", "length"), [(0, 5), (5, None), (7, 30), (90, 100)])
+    async def test_ok_stream_range(self, faker: faker.Faker, offset: int, length: int | None) -> None:
+        file_content: typing.Final = faker.binary(length=95)
+
+        read_chunks: typing.Final = [
+            one_chunk
+            async for one_chunk in S3Service(
+                s3_client=build_ranged_s3_client_mock(file_content, faker.pystr()), ranged_download_part_size_bytes=10
+            ).stream_file(s3_path=f"{faker.pystr()}/{faker.pystr()}", offset=offset, length=length)
+        ]
+
+        assert b"".join(read_chunks) == file_content[offset : None if length is None else offset + length]
+
+    async def test_ok_stream_range_without_ranged_download(self, faker: faker.Faker) -> None:
+        bucket_name, s3_key = faker.pystr(), faker.pystr()
+        s3_client_mock: typing.Final = mock.Mock(
+            get_object=mock.AsyncMock(return_value={"Body": mock.Mock(read=mock.AsyncMock(side_effect=[b"abc", b""]))})
+        )
+
+        read_chunks: typing.Final = [
+            one_chunk
+            async for one_chunk in S3Service(s3_client=s3_client_mock).stream_file(
+                s3_path=f"{bucket_name}/{s3_key}", offset=10, length=3
+            )
+        ]
+
+        assert read_chunks == [b"abc"]
+        s3_client_mock.get_object.assert_called_once_with(Bucket=bucket_name, Key=s3_key, Range="bytes=10-12")
+
+    async def test_streams_nothing_for_empty_range(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.Mock(get_object=mock.AsyncMock())
+
+        read_chunks: typing.Final = [
+            one_chunk
+            async for one_chunk in S3Service(s3_client=s3_client_mock).stream_file(
+                s3_path=f"{faker.pystr()}/{faker.pystr()}", offset=10, length=0
+            )
+        ]
+
+        assert read_chunks == []
+        s3_client_mock.get_object.assert_not_called()
+
+    @pytest.mark.parametrize(("offset", "length"), [(-1, None), (0, -1)])
+    async def test_fails_on_invalid_range(self, faker: faker.Faker, offset: int, length: int | None) -> None:
+        with pytest.raises(InvalidByteRangeError):
+            _: typing.Final = [
+                one_chunk
+                async for one_chunk in S3Service(s3_client=mock.Mock()).stream_file(
+                    s3_path=f"{faker.pystr()}/{faker.pystr()}", offset=offset, length=length
+                )
+            ]
+
+
+def build_cached_s3_client_mock(file_content: bytes, etag: str) -> mock.Mock:
+    ranged_s3_client_mock: typing.Final = build_ranged_s3_client_mock(file_content, etag)
+
+    async def get_object(**kwargs: typing.Any) -> dict[str, typing.Any]:  # noqa: ANN401
+        if kwargs.get("IfNoneMatch") == etag:
+            raise ClientError({"Error": {"Code": "304"}}, "GetObject")
+        return await ranged_s3_client_mock.get_object(**kwargs)
+
+    return mock.Mock(
+        get_object=mock.AsyncMock(side_effect=get_object),
+        put_object=mock.AsyncMock(),
+        delete_object=mock.AsyncMock(),
+    )
+
+
+class TestS3ServiceReadThroughCache:
+    async def test_serves_fresh_files_from_cache(self, faker: faker.Faker) -> None:
+        file_content, s3_path = generate_binary_content(faker), f"{faker.pystr()}/{faker.pystr()}"
+        s3_client_mock: typing.Final = build_cached_s3_client_mock(file_content, faker.pystr())
+        s3_service: typing.Final = S3Service(
+            s3_client=s3_client_mock, file_read_cache=FileReadCache(max_age_seconds=60)
+        )
+
+        assert [await s3_service.read_file(s3_path=s3_path) for _ in range(3)] == [file_content] * 3
+        assert s3_client_mock.get_object.call_count == 1
+
+    async def test_revalidates_with_if_none_match(self, faker: faker.Faker) -> None:
+        file_content, etag = generate_binary_content(faker), faker.pystr()
+        bucket_name, object_key = faker.pystr(), faker.pystr()
+        s3_client_mock: typing.Final = build_cached_s3_client_mock(file_content, etag)
+        s3_service: typing.Final = S3Service(s3_client=s3_client_mock, file_read_cache=FileReadCache())
+
+        await s3_service.read_file(s3_path=f"{bucket_name}/{object_key}")
+        file_content_from_cache: typing.Final = await s3_service.read_file(s3_path=f"{bucket_name}/{object_key}")
+
+        assert file_content_from_cache == file_content
+        assert s3_client_mock.get_object.mock_calls[1].kwargs == {
+            "Bucket": bucket_name,
+            "Key": object_key,
+            "Range": f"bytes=0-{4 * 1024 * 1024 - 1}",
+            "IfNoneMatch": etag,
+        }
+
+    async def test_coalesces_concurrent_misses(self, faker: faker.Faker) -> None:
+        file_content, s3_path = generate_binary_content(faker), f"{faker.pystr()}/{faker.pystr()}"
+        s3_client_mock: typing.Final = build_cached_s3_client_mock(file_content, faker.pystr())
+        s3_service: typing.Final = S3Service(s3_client=s3_client_mock, file_read_cache=FileReadCache())
+
+        read_contents: typing.Final = await asyncio.gather(*(s3_service.read_file(s3_path=s3_path) for _ in range(5)))
+
+        assert read_contents == [file_content] * 5
+        assert s3_client_mock.get_object.call_count == 1
+
+    async def test_reads_rest_of_files_too_large_to_cache(self, faker: faker.Faker) -> None:
+        file_content, etag = faker.binary(length=25), faker.pystr()
+        s3_client_mock: typing.Final = build_cached_s3_client_mock(file_content, etag)
+        file_read_cache: typing.Final = FileReadCache(max_file_size_bytes=10)
+        s3_service: typing.Final = S3Service(s3_client=s3_client_mock, file_read_cache=file_read_cache)
+
+        assert await s3_service.read_file(s3_path="bucket/large") == file_content
+        assert [one_call.kwargs["Range"] for one_call in s3_client_mock.get_object.mock_calls] == [
+            "bytes=0-9",
+            "bytes=10-24",
+        ]
+        assert s3_client_mock.get_object.mock_calls[1].kwargs["IfMatch"] == etag
+        assert len(file_read_cache) == 0
+
+    async def test_streams_ranges_from_cache(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = build_cached_s3_client_mock(b"0123456789", faker.pystr())
+        s3_service: typing.Final = S3Service(
+            s3_client=s3_client_mock, file_read_cache=FileReadCache(max_age_seconds=60)
+        )
+        await s3_service.read_file(s3_path="bucket/file")
+
+        read_chunks: typing.Final = [
+            one_chunk
+            async for one_chunk in s3_service.stream_file(s3_path="bucket/file", read_chunk_size=2, offset=3, length=5)
+        ]
+
+        assert read_chunks == [b"34", b"56", b"7"]
+        assert s3_client_mock.get_object.call_count == 1
+
+    async def test_writes_invalidate_cached_files(self, faker: faker.Faker) -> None:
+        file_content: typing.Final = generate_binary_content(faker)
+        s3_client_mock: typing.Final = build_cached_s3_client_mock(file_content, faker.pystr())
+        s3_service: typing.Final = S3Service(
+            s3_client=s3_client_mock, file_read_cache=FileReadCache(max_age_seconds=60)
+        )
+        await s3_service.read_file(s3_path="bucket/file")
+
+        await s3_service.upload_file(
+            ValidatedFile(
+                file_name=faker.file_name(),
+                file_content=file_content,
+                file_size=len(file_content),
+                mime_type=MIME_OCTET_STREAM,
+            ),
+            bucket_name="bucket",
+            object_key="file",
+        )
+        await s3_service.read_file(s3_path="bucket/file")
+        await s3_service.delete_file(s3_path="bucket/file")
+        await s3_service.read_file(s3_path="bucket/file")
+
+        assert s3_client_mock.get_object.call_count == 3  # noqa: PLR2004
+        assert all("IfNoneMatch" not in one_call.kwargs for one_call in s3_client_mock.get_object.mock_calls)
+
+    async def test_reads_after_invalidation_skip_in_flight_reads(self, faker: faker.Faker) -> None:
+        stale_content, file_content = generate_binary_content(faker), generate_binary_content(faker)
+        stale_read_sent: typing.Final = asyncio.Event()
+        stale_read_released: typing.Final = asyncio.Event()
+
+        async def get_object(**kwargs: typing.Any) -> dict[str, typing.Any]:  # noqa: ANN401, ARG001
+            if not stale_read_sent.is_set():
+                stale_read_sent.set()
+                await stale_read_released.wait()
+                return {"Body": mock.Mock(read=mock.AsyncMock(return_value=stale_content)), "ETag": "stale"}
+            return {"Body": mock.Mock(read=mock.AsyncMock(return_value=file_content)), "ETag": "fresh"}
+
+        file_read_cache: typing.Final = FileReadCache(max_age_seconds=60)
+        s3_service: typing.Final = S3Service(
+            s3_client=mock.Mock(get_object=mock.AsyncMock(side_effect=get_object), delete_object=mock.AsyncMock()),
+            file_read_cache=file_read_cache,
+        )
+        stale_read: typing.Final = asyncio.create_task(s3_service.read_file(s3_path="bucket/file"))
+        await stale_read_sent.wait()
+
+        await s3_service.delete_file(s3_path="bucket/file")
+        fresh_read: typing.Final = asyncio.create_task(s3_service.read_file(s3_path="bucket/file"))
+        await asyncio.sleep(0)
+        stale_read_released.set()
+
+        assert await stale_read == stale_content
+        assert await fresh_read == file_content
+        cached_file: typing.Final = await file_read_cache.get("bucket/file")
+        assert cached_file is not None
+        assert cached_file.etag == "fresh"
+
+
+def get_source_head(*, content_length: int = 10) -> dict[str, typing.Any]:
+    return {
+        "ContentLength": content_length,
+        "ContentType": "image/webp",
+        "ETag": '"source-etag"',
+        "Metadata": {"original-name": "cat.webp"},
+    }
+
+
+class TestS3ServiceCopy:
+    async def test_copies_metadata(self, faker: faker.Faker) -> None:
+        source_bucket_name, bucket_name = faker.pystr(), faker.pystr()
+        s3_client_mock: typing.Final = mock.AsyncMock(head_object=mock.AsyncMock(return_value=get_source_head()))
+
+        copied_file: typing.Final = await S3Service(s3_client=s3_client_mock).copy_file(
+            source_s3_path=f"{source_bucket_name}/staging/cat", s3_path=f"{bucket_name}/public/cat"
+        )
+
+        assert copied_file == CopiedFile(
+            source_s3_path=f"{source_bucket_name}/staging/cat",
+            s3_path=f"{bucket_name}/public/cat",
+            file_size=10,
+            mime_type="image/webp",
+        )
+        s3_client_mock.copy_object.assert_called_once_with(
+            Bucket=bucket_name,
+            Key="public/cat",
+            CopySource={"Bucket": source_bucket_name, "Key": "staging/cat"},
+            CopySourceIfMatch='"source-etag"',
+            MetadataDirective="COPY",
+        )
+
+    async def test_replaces_content_type_and_keeps_metadata(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.AsyncMock(head_object=mock.AsyncMock(return_value=get_source_head()))
+
+        await S3Service(s3_client=s3_client_mock).copy_file(
+            source_s3_path=f"{faker.pystr()}/cat", s3_path=f"{faker.pystr()}/cat", content_type="image/png"
+        )
+
+        assert s3_client_mock.copy_object.mock_calls[0].kwargs["MetadataDirective"] == "REPLACE"
+        assert s3_client_mock.copy_object.mock_calls[0].kwargs["ContentType"] == "image/png"
+        assert s3_client_mock.copy_object.mock_calls[0].kwargs["Metadata"] == {"original-name": "cat.webp"}
+
+    async def test_copies_large_object_in_parts(self, faker: faker.Faker) -> None:
+        upload_id: typing.Final = faker.pystr()
+        content_length: typing.Final = 5 * 1024 * 1024 * 1024 + 1
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            head_object=mock.AsyncMock(return_value=get_source_head(content_length=content_length)),
+            create_multipart_upload=mock.AsyncMock(return_value={"UploadId": upload_id}),
+            upload_part_copy=mock.AsyncMock(
+                side_effect=lambda **kwargs: {"CopyPartResult": {"ETag": f"etag-{kwargs['PartNumber']}"}}
+            ),
+        )
+
+        await S3Service(s3_client=s3_client_mock, copy_part_size_bytes=3 * 1024 * 1024 * 1024).copy_file(
+            source_s3_path=f"{faker.pystr()}/large", s3_path=f"{faker.pystr()}/large"
+        )
+
+        s3_client_mock.copy_object.assert_not_called()
+        assert [one_call.kwargs["CopySourceRange"] for one_call in s3_client_mock.upload_part_copy.mock_calls] == [
+            "bytes=0-3221225471",
+            f"bytes=3221225472-{content_length - 1}",
+        ]
+        assert s3_client_mock.create_multipart_upload.mock_calls[0].kwargs["Metadata"] == {"original-name": "cat.webp"}
+        assert s3_client_mock.complete_multipart_upload.mock_calls[0].kwargs["MultipartUpload"] == {
+            "Parts": [{"ETag": "etag-1", "PartNumber": 1}, {"ETag": "etag-2", "PartNumber": 2}]
+        }
+
+    async def test_moves_file(self, faker: faker.Faker) -> None:
+        source_bucket_name: typing.Final = faker.pystr()
+        s3_client_mock: typing.Final = mock.AsyncMock(head_object=mock.AsyncMock(return_value=get_source_head()))
+
+        await S3Service(s3_client=s3_client_mock).move_file(
+            source_s3_path=f"{source_bucket_name}/cat", s3_path=f"{faker.pystr()}/cat"
+        )
+
+        s3_client_mock.copy_object.assert_called_once()
+        s3_client_mock.delete_object.assert_called_once_with(Bucket=source_bucket_name, Key="cat")
+
+    async def test_moves_file_onto_itself_without_deleting(self, faker: faker.Faker) -> None:
+        s3_path: typing.Final = f"{faker.pystr()}/cat"
+        s3_client_mock: typing.Final = mock.AsyncMock(head_object=mock.AsyncMock(return_value=get_source_head()))
+
+        await S3Service(s3_client=s3_client_mock).move_file(
+            source_s3_path=s3_path, s3_path=s3_path, metadata={"original-name": "cat.jpg"}
+        )
+
+        assert s3_client_mock.copy_object.mock_calls[0].kwargs["MetadataDirective"] == "REPLACE"
+        s3_client_mock.delete_object.assert_not_called()
+
+    async def test_moves_file_onto_itself_without_changes(self, faker: faker.Faker) -> None:
+        s3_path: typing.Final = f"{faker.pystr()}/cat"
+        # S3 rejects a copy onto itself that changes nothing
+        s3_client_mock: typing.Final = mock.AsyncMock(
+            head_object=mock.AsyncMock(return_value=get_source_head()),
+            copy_object=mock.AsyncMock(side_effect=ClientError({"Error": {"Code": "InvalidRequest"}}, "CopyObject")),
+        )
+
+        copied_file: typing.Final = await S3Service(s3_client=s3_client_mock).move_file(
+            source_s3_path=s3_path, s3_path=s3_path
+        )
+
+        assert copied_file == CopiedFile(source_s3_path=s3_path, s3_path=s3_path, file_size=10, mime_type="image/webp")
+        s3_client_mock.copy_object.assert_not_called()
+        s3_client_mock.delete_object.assert_not_called()
+
+    async def test_moves_many_files_with_errors(self, faker: faker.Faker) -> None:
+        bucket_name: typing.Final = faker.pystr()
+        missing_error: typing.Final = ClientError({"Error": {"Code": "404"}}, "HeadObject")
+
+        async def head_object(**kwargs: typing.Any) -> dict[str, typing.Any]:  # noqa: ANN401
+            if kwargs["Key"] == "missing":
+                raise missing_error
+            return get_source_head()
+
+        s3_client_mock: typing.Final = mock.AsyncMock(head_object=mock.AsyncMock(side_effect=head_object))
+
+        copy_results: typing.Final = await S3Service(s3_client=s3_client_mock).move_files(
+            source_and_target_s3_paths=[
+                (f"{bucket_name}/found", "public/found"),
+                (f"{bucket_name}/missing", "public/missing"),
+            ]
+        )
+
+        assert copy_results[0].copied_file is not None
+        assert copy_results[1] == FileCopyResult(
+            source_s3_path=f"{bucket_name}/missing", s3_path="public/missing", error=missing_error
+        )
+        s3_client_mock.delete_object.assert_called_once_with(Bucket=bucket_name, Key="found")
+
+
 class TestS3ServiceDelete:
     async def test_ok_delete(self, faker: faker.Faker) -> None:
         bucket_name, s3_key = faker.pystr(), faker.pystr()
@@ -91,6 +851,83 @@ class TestS3ServiceDelete:
         s3_client_mock.delete_object.assert_called_once_with(Bucket=bucket_name, Key=s3_key)
 
 
+class TestS3ServiceDeleteMany:
+    async def test_batches_keys_by_bucket(self, faker: faker.Faker) -> None:
+        first_bucket_name, second_bucket_name = faker.pystr(), faker.pystr()
+        first_bucket_keys: typing.Final = [f"key-{index}" for index in range(1001)]
+        s3_paths: typing.Final = [f"{first_bucket_name}/{one_key}" for one_key in first_bucket_keys] + [
+            f"{second_bucket_name}/single-key"
+        ]
+        s3_client_mock: typing.Final = mock.Mock(delete_objects=mock.AsyncMock(return_value={}))
+
+        deletion_results: typing.Final = await S3Service(s3_client=s3_client_mock).delete_files(
+            s3_paths=[*s3_paths, s3_paths[0]]
+        )
+
+        assert s3_client_mock.delete_objects.mock_calls == [
+            mock.call(
+                Bucket=first_bucket_name,
+                Delete={"Objects": [{"Key": one_key} for one_key in first_bucket_keys[:1000]], "Quiet": True},
+            ),
+            mock.call(Bucket=first_bucket_name, Delete={"Objects": [{"Key": "key-1000"}], "Quiet": True}),
+            mock.call(Bucket=second_bucket_name, Delete={"Objects": [{"Key": "single-key"}], "Quiet": True}),
+        ]
+        assert [one_result.s3_path for one_result in deletion_results] == [*s3_paths, s3_paths[0]]
+        assert all(one_result.deleted for one_result in deletion_results)
+
+    async def test_reports_per_key_errors(self, faker: faker.Faker) -> None:
+        bucket_name, error_message = faker.pystr(), faker.sentence()
+        s3_client_mock: typing.Final = mock.Mock(
+            delete_objects=mock.AsyncMock(
+                return_value={"Errors": [{"Key": "locked", "Code": "AccessDenied", "Message": error_message}]}
+            )
+        )
+
+        deletion_results: typing.Final = await S3Service(s3_client=s3_client_mock).delete_files(
+            s3_paths=[f"{bucket_name}/deleted", f"{bucket_name}/locked"]
+        )
+
+        assert deletion_results == [
+            FileDeletionResult(s3_path=f"{bucket_name}/deleted"),
+            FileDeletionResult(s3_path=f"{bucket_name}/locked", error_code="AccessDenied", error_message=error_message),
+        ]
+        assert not deletion_results[1].deleted
+
+    async def test_reports_failed_batch_per_key(self, faker: faker.Faker) -> None:
+        failed_bucket_name, deleted_bucket_name = faker.pystr(), faker.pystr()
+        s3_client_mock: typing.Final = mock.Mock(
+            delete_objects=mock.AsyncMock(
+                side_effect=[
+                    ClientError({"Error": {"Code": "SlowDown", "Message": "Please reduce your request rate."}}, "X"),
+                    {},
+                ]
+            )
+        )
+        file_read_cache: typing.Final = FileReadCache()
+        await file_read_cache.set(f"{deleted_bucket_name}/deleted", etag="1", file_content=b"1", generation=0)
+
+        deletion_results: typing.Final = await S3Service(
+            s3_client=s3_client_mock, file_read_cache=file_read_cache
+        ).delete_files(s3_paths=[f"{failed_bucket_name}/first", f"{deleted_bucket_name}/deleted"])
+
+        assert deletion_results == [
+            FileDeletionResult(
+                s3_path=f"{failed_bucket_name}/first",
+                error_code="SlowDown",
+                error_message="Please reduce your request rate.",
+            ),
+            FileDeletionResult(s3_path=f"{deleted_bucket_name}/deleted"),
+        ]
+        assert await file_read_cache.get(f"{deleted_bucket_name}/deleted") is None
+
+    async def test_fails_on_invalid_path(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = mock.Mock(delete_objects=mock.AsyncMock(return_value={}))
+
+        with pytest.raises(InvalidS3PathError):
+            await S3Service(s3_client=s3_client_mock).delete_files(s3_paths=[f"{faker.pystr()}/{faker.pystr()}", "/"])
+        s3_client_mock.delete_objects.assert_not_called()
+
+
 class TestS3ServiceHead:
     async def test_ok_head(self, faker: faker.Faker) -> None:
         bucket_name, s3_key = faker.pystr(), faker.pystr()
@@ -100,6 +937,36 @@ class TestS3ServiceHead:
         s3_client_mock.head_object.assert_called_once_with(Bucket=bucket_name, Key=s3_key)
 
 
+class TestS3ServiceHeadMany:
+    async def test_collects_heads_in_order(self, faker: faker.Faker) -> None:
+        bucket_name: typing.Final = faker.pystr()
+        missing_object_error: typing.Final = ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        running_requests = 0
+        max_running_requests = 0
+
+        async def head_object(*, Bucket: str, Key: str) -> dict[str, typing.Any]:  # noqa: N803
+            nonlocal running_requests, max_running_requests
+            running_requests += 1
+            max_running_requests = max(max_running_requests, running_requests)
+            await asyncio.sleep(0)
+            running_requests -= 1
+            if Key == "missing":
+                raise missing_object_error
+            return {"ContentLength": len(Key), "Bucket": Bucket}
+
+        s3_paths: typing.Final = [f"{bucket_name}/{faker.pystr()}" for _ in range(9)] + [f"{bucket_name}/missing"]
+        head_results: typing.Final = await S3Service(s3_client=mock.Mock(head_object=head_object)).collect_file_heads(
+            s3_paths=s3_paths, max_concurrent_requests=3
+        )
+
+        assert [one_result.s3_path for one_result in head_results] == s3_paths
+        assert [one_result.file_head for one_result in head_results[:-1]] == [
+            {"ContentLength": len(one_s3_path.split("/", 1)[1]), "Bucket": bucket_name} for one_s3_path in s3_paths[:-1]
+        ]
+        assert head_results[-1] == FileHeadResult(s3_path=s3_paths[-1], error=missing_object_error)
+        assert max_running_requests == 3  # noqa: PLR2004
+
+
 class TestS3ServiceCreateFileUrl:
     async def test_call(self, faker: faker.Faker) -> None:
         bucket_name, s3_key, display_file_name = faker.pystr(), faker.pystr(), faker.pystr()
@@ -172,3 +1039,179 @@ class TestS3ServiceCreateFileUrl:
                 expires_in=faker.time_delta(),
                 proxy_base_url=faker.url(),
             )
+
+
+class TestS3ServiceCreateFileUrls:
+    @pytest.mark.parametrize("endpoint_url", ["http://s3:9000/", "https://s3.me.com", "https://s3.me.com:443/storage"])
+    @pytest.mark.parametrize("session_token", [None, "session-token"])
+    async def test_signs_urls_like_botocore(
+        self, faker: faker.Faker, endpoint_url: str, session_token: str | None
+    ) -> None:
+        s3_paths_and_display_file_names: typing.Final = [
+            (f"my-bucket/dir/{faker.pystr()} +ü~.txt", f"{faker.pystr()} {faker.pystr()}.txt"),
+            (f"other.bucket/{faker.pystr()}", faker.pystr()),
+        ]
+        expires_in: typing.Final = datetime.timedelta(seconds=faker.pyint(min_value=1, max_value=7 * 24 * 3600))
+        session: typing.Final = aioboto3.Session(
+            aws_access_key_id=faker.pystr(),
+            aws_secret_access_key=faker.pystr(),
+            aws_session_token=session_token,
+            region_name="eu-west-1",
+        )
+        async with session.client(
+            "s3", endpoint_url=endpoint_url, config=AioConfig(signature_version="s3v4")
+        ) as s3_client:
+            file_urls: typing.Final = await S3Service(s3_client=s3_client).create_file_urls(
+                s3_paths_and_display_file_names=s3_paths_and_display_file_names, expires_in=expires_in
+            )
+            signed_at: typing.Final = datetime.datetime.strptime(  # noqa: DTZ007
+                urllib.parse.parse_qs(urllib.parse.urlsplit(file_urls[0]).query)["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ"
+            )
+            with mock.patch.object(botocore.auth, "get_current_datetime", return_value=signed_at):
+                expected_file_urls: typing.Final = [
+                    await s3_client.generate_presigned_url(
+                        "get_object",
+                        Params={
+                            "Bucket": s3_path.split("/", 1)[0],
+                            "Key": s3_path.split("/", 1)[1],
+                            "ResponseContentDisposition": f'inline; filename="{display_file_name}"',
+                            "ResponseCacheControl": f"max-age={round(expires_in.total_seconds())}, public",
+                        },
+                        ExpiresIn=round(expires_in.total_seconds()),
+                    )
+                    for s3_path, display_file_name in s3_paths_and_display_file_names
+                ]
+
+        assert file_urls == expected_file_urls
+
+    async def test_keeps_botocore_sigv2_urls_of_default_clients(self, faker: faker.Faker) -> None:
+        session: typing.Final = aioboto3.Session(
+            aws_access_key_id=faker.pystr(), aws_secret_access_key=faker.pystr(), region_name="us-east-1"
+        )
+        async with session.client("s3", endpoint_url="http://s3:9000") as s3_client:
+            file_urls: typing.Final = await S3Service(s3_client=s3_client).create_file_urls(
+                s3_paths_and_display_file_names=[("my-bucket/my-key", faker.pystr())],
+                expires_in=datetime.timedelta(days=30),
+            )
+
+        file_url_params: typing.Final = urllib.parse.parse_qs(urllib.parse.urlsplit(file_urls[0]).query)
+        assert {"AWSAccessKeyId", "Signature", "Expires"} <= file_url_params.keys()
+        assert "X-Amz-Expires" not in file_url_params
+
+    async def test_falls_back_to_botocore_for_long_expiry(self, faker: faker.Faker) -> None:
+        session: typing.Final = aioboto3.Session(
+            aws_access_key_id=faker.pystr(), aws_secret_access_key=faker.pystr(), region_name="eu-west-1"
+        )
+        async with session.client(
+            "s3", endpoint_url="http://s3:9000", config=AioConfig(signature_version="s3v4")
+        ) as s3_client:
+            s3_service: typing.Final = S3Service(s3_client=s3_client)
+            with mock.patch.object(
+                s3_client, "generate_presigned_url", mock.AsyncMock(return_value="http://s3:9000/my-bucket/my-key")
+            ) as generate_presigned_url_mock:
+                await s3_service.create_file_urls(
+                    s3_paths_and_display_file_names=[("my-bucket/my-key", faker.pystr())],
+                    expires_in=datetime.timedelta(days=8),
+                )
+
+        generate_presigned_url_mock.assert_awaited_once()
+
+    async def test_falls_back_to_botocore_for_virtual_hosted_style(self, faker: faker.Faker) -> None:
+        session: typing.Final = aioboto3.Session(
+            aws_access_key_id=faker.pystr(), aws_secret_access_key=faker.pystr(), region_name="eu-west-1"
+        )
+        async with session.client(
+            "s3",
+            endpoint_url="http://s3:9000",
+            config=AioConfig(signature_version="s3v4", s3={"addressing_style": "virtual"}),
+        ) as s3_client:
+            file_urls: typing.Final = await S3Service(s3_client=s3_client).create_file_urls(
+                s3_paths_and_display_file_names=[("my-bucket/my-key", faker.pystr())],
+                expires_in=datetime.timedelta(minutes=1),
+            )
+
+        assert file_urls[0].startswith("http://my-bucket.s3:9000/my-key?")
+
+    async def test_rewrites_urls_to_proxy(self, faker: faker.Faker) -> None:
+        session: typing.Final = aioboto3.Session(
+            aws_access_key_id=faker.pystr(), aws_secret_access_key=faker.pystr(), region_name="eu-west-1"
+        )
+        async with session.client(
+            "s3", endpoint_url="http://s3:9000/", config=AioConfig(signature_version="s3v4")
+        ) as s3_client:
+            file_urls: typing.Final = await S3Service(s3_client=s3_client).create_file_urls(
+                s3_paths_and_display_file_names=[("my-bucket/first", "first"), ("my-bucket/second", "second")],
+                expires_in=datetime.timedelta(minutes=1),
+                proxy_base_url="https://s3-proxy.me.com/",
+            )
+
+        assert [one_url.split("?")[0] for one_url in file_urls] == [
+            "https://s3-proxy.me.com/my-bucket/first",
+            "https://s3-proxy.me.com/my-bucket/second",
+        ]
+
+    async def test_caches_urls(self, faker: faker.Faker) -> None:
+        first_url, second_url = faker.url(), faker.url()
+        s3_client_mock: typing.Final = mock.Mock(
+            generate_presigned_url=mock.AsyncMock(side_effect=[first_url, second_url])
+        )
+        clock: typing.Final = FakeClock()
+        s3_service: typing.Final = S3Service(
+            s3_client=s3_client_mock,
+            presigned_url_cache=PresignedUrlCache(refresh_before_expiry_seconds=10, clock=clock),
+        )
+        s3_paths_and_display_file_names: typing.Final = [(f"{faker.pystr()}/{faker.pystr()}", faker.pystr())]
+        expires_in: typing.Final = datetime.timedelta(seconds=60)
+
+        assert await s3_service.create_file_urls(
+            s3_paths_and_display_file_names=s3_paths_and_display_file_names, expires_in=expires_in
+        ) == [first_url]
+        assert await s3_service.create_file_urls(
+            s3_paths_and_display_file_names=s3_paths_and_display_file_names, expires_in=expires_in
+        ) == [first_url]
+        clock.now = 50
+        assert await s3_service.create_file_urls(
+            s3_paths_and_display_file_names=s3_paths_and_display_file_names, expires_in=expires_in
+        ) == [second_url]
+        assert s3_client_mock.generate_presigned_url.await_count == 2  # noqa: PLR2004
+
+
+class TestS3ServiceListObjectKeys:
+    async def test_lists_pages(self, faker: faker.Faker) -> None:
+        bucket_name, prefix = faker.pystr(), faker.pystr()
+        object_keys: typing.Final = sorted(f"{prefix}{faker.pystr()}" for _ in range(5))
+        s3_client_mock: typing.Final = mock.Mock(
+            list_objects_v2=mock.AsyncMock(
+                side_effect=[
+                    {"Contents": [{"Key": one_key} for one_key in object_keys[:3]], "IsTruncated": True},
+                    {"Contents": [{"Key": one_key} for one_key in object_keys[3:]], "IsTruncated": False},
+                ]
+            )
+        )
+
+        listed_keys: typing.Final = [
+            one_key
+            async for one_key in S3Service(s3_client=s3_client_mock).list_object_keys(
+                bucket_name=bucket_name, prefix=prefix
+            )
+        ]
+
+        assert listed_keys == object_keys
+        assert s3_client_mock.list_objects_v2.call_args_list == [
+            mock.call(Bucket=bucket_name, Prefix=prefix, StartAfter=""),
+            mock.call(Bucket=bucket_name, Prefix=prefix, StartAfter=object_keys[2]),
+        ]
+
+    async def test_starts_after_key(self, faker: faker.Faker) -> None:
+        bucket_name, start_after = faker.pystr(), faker.pystr()
+        s3_client_mock: typing.Final = mock.Mock(list_objects_v2=mock.AsyncMock(return_value={"IsTruncated": False}))
+
+        listed_keys: typing.Final = [
+            one_key
+            async for one_key in S3Service(s3_client=s3_client_mock).list_object_keys(
+                bucket_name=bucket_name, start_after=start_after
+            )
+        ]
+
+        assert listed_keys == []
+        s3_client_mock.list_objects_v2.assert_called_once_with(Bucket=bucket_name, Prefix="", StartAfter=start_after)
@@ -0,0 +1,127 @@
+import asyncio
+import typing
+
+import pytest
+
+from safe_s3_storage.exceptions import ScanQueueWaitTimeoutError, TooManyQueuedScansError
+from safe_s3_storage.scan_admission import ScanAdmissionController
+from tests.conftest import FakeClock
+
+
+class TestScanAdmissionController:
+    async def test_queues_scans_over_global_limit(self) -> None:
+        admission_controller: typing.Final = ScanAdmissionController(max_in_flight_scans=1)
+        await admission_controller.acquire(admission_key=None, size_bytes=1)
+
+        queued_acquire: typing.Final = asyncio.create_task(
+            admission_controller.acquire(admission_key=None, size_bytes=1)
+        )
+        await asyncio.sleep(0)
+        assert admission_controller.queued_scans == 1
+        assert not queued_acquire.done()
+
+        admission_controller.release(admission_key=None)
+        await queued_acquire
+        assert admission_controller.queued_scans == 0
+        assert admission_controller.in_flight_scans == 1
+
+    async def test_limits_scans_per_key(self) -> None:
+        admission_controller: typing.Final = ScanAdmissionController(max_in_flight_scans_per_key=1)
+        await admission_controller.acquire(admission_key="first-tenant", size_bytes=1)
+
+        queued_acquire: typing.Final = asyncio.create_task(
+            admission_controller.acquire(admission_key="first-tenant", size_bytes=1)
+        )
+        await asyncio.sleep(0)
+        assert await admission_controller.acquire(admission_key="second-tenant", size_bytes=1) == 0
+        assert not queued_acquire.done()
+
+        admission_controller.release(admission_key="first-tenant")
+        await queued_acquire
+        assert admission_controller.count_in_flight_scans("first-tenant") == 1
+        assert admission_controller.count_in_flight_scans("second-tenant") == 1
+
+    async def test_admits_small_scans_before_large_ones(self) -> None:
+        admission_controller: typing.Final = ScanAdmissionController(max_in_flight_scans=1, clock=FakeClock())
+        admitted_sizes: typing.Final[list[int]] = []
+
+        async def acquire(size_bytes: int) -> None:
+            await admission_controller.acquire(admission_key=None, size_bytes=size_bytes)
+            admitted_sizes.append(size_bytes)
+
+        await admission_controller.acquire(admission_key=None, size_bytes=1)
+        queued_acquires: typing.Final = [
+            asyncio.create_task(acquire(one_size)) for one_size in (50 * 1024 * 1024, 1024, 2048)
+        ]
+        await asyncio.sleep(0)
+        for _ in queued_acquires:
+            admission_controller.release(admission_key=None)
+            await asyncio.sleep(0)
+        await asyncio.gather(*queued_acquires)
+
+        assert admitted_sizes == [1024, 2048, 50 * 1024 * 1024]
+
+    async def test_rejects_scans_over_queue_limit(self) -> None:
+        admission_controller: typing.Final = ScanAdmissionController(max_in_flight_scans=1, max_queued_scans=1)
+        await admission_controller.acquire(admission_key=None, size_bytes=1)
+        queued_acquire: typing.Final = asyncio.create_task(
+            admission_controller.acquire(admission_key=None, size_bytes=1)
+        )
+        await asyncio.sleep(0)
+
+        with pytest.raises(TooManyQueuedScansError):
+            await admission_controller.acquire(admission_key=None, size_bytes=1)
+
+        queued_acquire.cancel()
+        await asyncio.gather(queued_acquire, return_exceptions=True)
+        assert admission_controller.queued_scans == 0
+
+    async def test_fails_scans_waiting_too_long(self) -> None:
+        admission_controller: typing.Final = ScanAdmissionController(max_in_flight_scans=1, max_queue_wait_seconds=0.01)
+        await admission_controller.acquire(admission_key=None, size_bytes=1)
+
+        with pytest.raises(ScanQueueWaitTimeoutError):
+            await admission_controller.acquire(admission_key=None, size_bytes=1)
+
+        assert admission_controller.queued_scans == 0
+        assert admission_controller.queue_wait_ewma_seconds > 0
+
+    async def test_rejects_right_away_when_recent_waits_are_too_long(self) -> None:
+        max_queue_wait_seconds: typing.Final = 0.01
+        admission_controller: typing.Final = ScanAdmissionController(
+            max_in_flight_scans=1, max_queue_wait_seconds=max_queue_wait_seconds, queue_wait_ewma_weight=0.5
+        )
+        await admission_controller.acquire(admission_key=None, size_bytes=1)
+        for _ in range(3):
+            with pytest.raises(ScanQueueWaitTimeoutError):
+                await admission_controller.acquire(admission_key=None, size_bytes=1)
+
+        loop: typing.Final = asyncio.get_running_loop()
+        started_at: typing.Final = loop.time()
+        with pytest.raises(ScanQueueWaitTimeoutError):
+            await admission_controller.acquire(admission_key=None, size_bytes=1)
+        assert loop.time() - started_at < max_queue_wait_seconds
+        assert admission_controller.queued_scans == 0
+
+    async def test_accepts_new_scans_once_slots_free_up(self) -> None:
+        admission_controller: typing.Final = ScanAdmissionController(
+            max_in_flight_scans=1, max_queue_wait_seconds=0.01, queue_wait_ewma_weight=1
+        )
+        await admission_controller.acquire(admission_key=None, size_bytes=1)
+        with pytest.raises(ScanQueueWaitTimeoutError):
+            await admission_controller.acquire(admission_key=None, size_bytes=1)
+
+        admission_controller.release(admission_key=None)
+
+        assert await admission_controller.acquire(admission_key=None, size_bytes=1) == 0
+        assert admission_controller.queue_wait_ewma_seconds == 0
+
+    async def test_releases_slot_on_exit(self) -> None:
+        admission_controller: typing.Final = ScanAdmissionController()
+
+        async with admission_controller.admit(admission_key="tenant", size_bytes=1) as queue_wait_seconds:
+            assert queue_wait_seconds == 0
+            assert admission_controller.in_flight_scans == 1
+
+        assert admission_controller.in_flight_scans == 0
+        assert admission_controller.count_in_flight_scans("tenant") == 0
@@ -0,0 +1,187 @@
+import asyncio
+import collections
+import typing
+
+import faker
+import httpx
+import pytest
+from httpx import codes as status_codes
+
+from safe_s3_storage import exceptions
+from safe_s3_storage.circuit_breaker import CircuitBreaker
+from safe_s3_storage.kaspersky_scan_engine import (
+    KasperskyScanEngineClient,
+    KasperskyScanEngineResponse,
+    KasperskyScanEngineScanResult,
+)
+from safe_s3_storage.scan_engine_pool import LoadBalancingStrategy, ScanEngineEndpointPool
+from tests.conftest import generate_binary_content
+
+
+CLEAN_RESPONSE_JSON: typing.Final = KasperskyScanEngineResponse(
+    scanResult=KasperskyScanEngineScanResult.CLEAN
+).model_dump(mode="json")
+
+
+class TestScanEngineEndpointPool:
+    async def test_prefers_least_outstanding_requests(self) -> None:
+        endpoint_pool: typing.Final = ScanEngineEndpointPool(service_urls=["http://first", "http://second"])
+
+        first_endpoint: typing.Final = await endpoint_pool.acquire_endpoint()
+        second_endpoint: typing.Final = await endpoint_pool.acquire_endpoint()
+
+        assert first_endpoint is not None
+        assert second_endpoint is not None
+        assert {first_endpoint.service_url, second_endpoint.service_url} == {"http://first", "http://second"}
+
+    async def test_prefers_lowest_latency(self) -> None:
+        endpoint_pool: typing.Final = ScanEngineEndpointPool(
+            service_urls=["http://slow", "http://fast"], load_balancing_strategy=LoadBalancingStrategy.lowest_latency
+        )
+        slow_endpoint, fast_endpoint = endpoint_pool.endpoints
+        slow_endpoint.outstanding_requests = fast_endpoint.outstanding_requests = 1
+        await endpoint_pool.release_endpoint(slow_endpoint, succeeded=True, latency_seconds=1)
+        await endpoint_pool.release_endpoint(fast_endpoint, succeeded=True, latency_seconds=0.1)
+
+        acquired_endpoints: typing.Final = [await endpoint_pool.acquire_endpoint() for _ in range(5)]
+
+        assert [one_endpoint.service_url for one_endpoint in acquired_endpoints if one_endpoint] == [
+            "http://fast",
+            "http://fast",
+            "http://fast",
+            "http://fast",
+            "http://fast",
+        ]
+
+    async def test_updates_latency_ewma(self) -> None:
+        endpoint_pool: typing.Final = ScanEngineEndpointPool(service_urls=["http://one"], latency_ewma_weight=0.5)
+        endpoint: typing.Final = endpoint_pool.endpoints[0]
+        endpoint.outstanding_requests = 2
+
+        await endpoint_pool.release_endpoint(endpoint, succeeded=True, latency_seconds=1)
+        await endpoint_pool.release_endpoint(endpoint, succeeded=True, latency_seconds=3)
+
+        assert endpoint.latency_ewma_seconds == 2  # noqa: PLR2004
+        assert endpoint.outstanding_requests == 0
+
+    async def test_ejects_failing_endpoints(self) -> None:
+        endpoint_pool: typing.Final = ScanEngineEndpointPool(
+            service_urls=["http://broken", "http://healthy"],
+            circuit_breaker_factory=lambda: CircuitBreaker(failure_threshold=1),
+        )
+        broken_endpoint: typing.Final = endpoint_pool.endpoints[0]
+        broken_endpoint.outstanding_requests += 1
+        await endpoint_pool.release_endpoint(broken_endpoint, succeeded=False, latency_seconds=1)
+
+        acquired_endpoints: typing.Final = [await endpoint_pool.acquire_endpoint() for _ in range(3)]
+
+        assert {one_endpoint.service_url for one_endpoint in acquired_endpoints if one_endpoint} == {"http://healthy"}
+
+    async def test_returns_none_when_all_endpoints_ejected(self) -> None:
+        endpoint_pool: typing.Final = ScanEngineEndpointPool(
+            service_urls=["http://broken"], circuit_breaker_factory=lambda: CircuitBreaker(failure_threshold=1)
+        )
+        broken_endpoint: typing.Final = endpoint_pool.endpoints[0]
+        broken_endpoint.outstanding_requests += 1
+        await endpoint_pool.release_endpoint(broken_endpoint, succeeded=False, latency_seconds=1)
+
+        assert await endpoint_pool.acquire_endpoint() is None
+
+    async def test_waits_for_free_slot(self) -> None:
+        endpoint_pool: typing.Final = ScanEngineEndpointPool(
+            service_urls=["http://one"], max_concurrent_requests_per_endpoint=1
+        )
+        acquired_endpoint: typing.Final = await endpoint_pool.acquire_endpoint()
+        assert acquired_endpoint is not None
+
+        waiting_acquire: typing.Final = asyncio.create_task(endpoint_pool.acquire_endpoint())
+        await asyncio.sleep(0.01)
+        assert not waiting_acquire.done()
+
+        await endpoint_pool.release_endpoint(acquired_endpoint, succeeded=True, latency_seconds=0.1)
+        assert await asyncio.wait_for(waiting_acquire, timeout=1) is acquired_endpoint
+
+
+class TestKasperskyScanEngineClientWithPool:
+    async def test_balances_scans_across_endpoints(self, faker: faker.Faker) -> None:
+        requests_per_host: typing.Final[collections.Counter[str]] = collections.Counter()
+
+        async def handle_request(request: httpx.Request) -> httpx.Response:
+            requests_per_host[request.url.host] += 1
+            await asyncio.sleep(0.01)
+            return httpx.Response(status_codes.OK, json=CLEAN_RESPONSE_JSON)
+
+        kaspersky_scan_engine: typing.Final = KasperskyScanEngineClient(
+            client_name=faker.pystr(),
+            httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+            endpoint_pool=ScanEngineEndpointPool(
+                service_urls=["http://first", "http://second", "http://third"], max_concurrent_requests_per_endpoint=2
+            ),
+        )
+
+        await asyncio.gather(
+            *(
+                kaspersky_scan_engine.scan_memory(
+                    file_name=faker.file_name(), file_content=generate_binary_content(faker)
+                )
+                for _ in range(12)
+            )
+        )
+
+        assert requests_per_host == {"first": 4, "second": 4, "third": 4}
+
+    async def test_retries_on_another_endpoint(self, faker: faker.Faker) -> None:
+        requested_hosts: typing.Final[list[str]] = []
+
+        def handle_request(request: httpx.Request) -> httpx.Response:
+            requested_hosts.append(request.url.host)
+            if request.url.host == "broken":
+                raise httpx.ConnectError("connection refused")
+            return httpx.Response(status_codes.OK, json=CLEAN_RESPONSE_JSON)
+
+        kaspersky_scan_engine: typing.Final = KasperskyScanEngineClient(
+            client_name=faker.pystr(),
+            httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+            endpoint_pool=ScanEngineEndpointPool(
+                service_urls=["http://broken", "http://healthy"],
+                circuit_breaker_factory=lambda: CircuitBreaker(failure_threshold=1),
+            ),
+            retry_backoff_base_seconds=0,
+        )
+
+        for _ in range(3):
+            await kaspersky_scan_engine.scan_memory(
+                file_name=faker.file_name(), file_content=generate_binary_content(faker)
+            )
+
+        assert requested_hosts == ["broken", "healthy", "healthy", "healthy"]
+
+    async def test_fails_when_all_endpoints_ejected(self, faker: faker.Faker) -> None:
+        kaspersky_scan_engine: typing.Final = KasperskyScanEngineClient(
+            client_name=faker.pystr(),
+            httpx_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(lambda _: httpx.Response(status_codes.SERVICE_UNAVAILABLE))
+            ),
+            endpoint_pool=ScanEngineEndpointPool(
+                service_urls=["http://first", "http://second"],
+                circuit_breaker_factory=lambda: CircuitBreaker(failure_threshold=1),
+            ),
+            retry_backoff_base_seconds=0,
+        )
+
+        with pytest.raises(exceptions.KasperskyScanEngineUnavailableError) as exc_info:
+            await kaspersky_scan_engine.scan_memory(
+                file_name=faker.file_name(), file_content=generate_binary_content(faker)
+            )
+
+        assert exc_info.value.service_urls == ["http://first", "http://second"]
+
+    @pytest.mark.parametrize("with_service_url", [True, False])
+    def test_requires_either_service_url_or_endpoint_pool(self, faker: faker.Faker, with_service_url: bool) -> None:
+        with pytest.raises(ValueError, match="service_url or endpoint_pool"):
+            KasperskyScanEngineClient(
+                client_name=faker.pystr(),
+                httpx_client=httpx.AsyncClient(),
+                service_url=faker.url() if with_service_url else None,
+                endpoint_pool=ScanEngineEndpointPool(service_urls=[faker.url()]) if with_service_url else None,
+            )
@@ -0,0 +1,114 @@
+import asyncio
+import typing
+
+import faker
+import httpx
+from httpx import codes as status_codes
+
+from safe_s3_storage.kaspersky_scan_engine import (
+    KasperskyScanEngineClient,
+    KasperskyScanEngineResponse,
+    KasperskyScanEngineScanResult,
+)
+from safe_s3_storage.scan_engine_pool import ScanEngineEndpointPool
+from safe_s3_storage.scan_hedging import ScanHedgingPolicy
+from tests.conftest import generate_binary_content
+
+
+CLEAN_RESPONSE_JSON: typing.Final = KasperskyScanEngineResponse(
+    scanResult=KasperskyScanEngineScanResult.CLEAN
+).model_dump(mode="json")
+
+
+def build_warmed_up_hedging_policy(
+    *,
+    latency_seconds: float,
+    **policy_kwargs: typing.Any,  # noqa: ANN401
+) -> ScanHedgingPolicy:
+    hedging_policy: typing.Final = ScanHedgingPolicy(min_hedge_delay_seconds=0, **policy_kwargs)
+    for _ in range(hedging_policy.min_latency_samples):
+        hedging_policy.record_latency(latency_seconds)
+    return hedging_policy
+
+
+class TestScanHedgingPolicy:
+    def test_waits_for_enough_latencies(self) -> None:
+        hedging_policy: typing.Final = ScanHedgingPolicy(min_latency_samples=3)
+        hedging_policy.record_latency(1)
+        hedging_policy.record_latency(1)
+
+        assert hedging_policy.start_scan() is None
+
+    def test_uses_latency_percentile(self) -> None:
+        hedging_policy: typing.Final = ScanHedgingPolicy(
+            latency_percentile=0.9, min_latency_samples=10, min_hedge_delay_seconds=0
+        )
+        for one_latency in range(1, 11):
+            hedging_policy.record_latency(one_latency / 10)
+
+        assert hedging_policy.start_scan() == 0.9  # noqa: PLR2004
+
+    def test_limits_extra_requests(self) -> None:
+        hedging_policy: typing.Final = build_warmed_up_hedging_policy(
+            latency_seconds=0.1, max_extra_requests_ratio=0.25
+        )
+
+        allowed_hedges = 0
+        for _ in range(100):
+            hedging_policy.start_scan()
+            allowed_hedges += hedging_policy.allows_hedge()
+
+        assert allowed_hedges == 25  # noqa: PLR2004
+
+
+class TestKasperskyScanEngineHedging:
+    async def test_hedge_to_another_endpoint_wins(self, faker: faker.Faker) -> None:
+        requested_hosts: typing.Final[list[str]] = []
+        cancelled_hosts: typing.Final[list[str]] = []
+
+        async def handle_request(request: httpx.Request) -> httpx.Response:
+            requested_hosts.append(request.url.host)
+            try:
+                await asyncio.sleep(10 if request.url.host == "slow" else 0)
+            except asyncio.CancelledError:
+                cancelled_hosts.append(request.url.host)
+                raise
+            return httpx.Response(status_codes.OK, json=CLEAN_RESPONSE_JSON)
+
+        endpoint_pool: typing.Final = ScanEngineEndpointPool(service_urls=["http://slow", "http://fast"])
+        kaspersky_scan_engine: typing.Final = KasperskyScanEngineClient(
+            client_name=faker.pystr(),
+            httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+            endpoint_pool=endpoint_pool,
+            hedging_policy=build_warmed_up_hedging_policy(latency_seconds=0.01, max_extra_requests_ratio=1),
+        )
+
+        await asyncio.wait_for(
+            kaspersky_scan_engine.scan_memory(file_name=faker.file_name(), file_content=generate_binary_content(faker)),
+            timeout=1,
+        )
+
+        assert requested_hosts == ["slow", "fast"]
+        assert cancelled_hosts == ["slow"]
+        assert [one_endpoint.outstanding_requests for one_endpoint in endpoint_pool.endpoints] == [0, 0]
+
+    async def test_does_not_hedge_without_budget(self, faker: faker.Faker) -> None:
+        sent_requests: typing.Final[list[httpx.Request]] = []
+
+        async def handle_request(request: httpx.Request) -> httpx.Response:
+            sent_requests.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(status_codes.OK, json=CLEAN_RESPONSE_JSON)
+
+        kaspersky_scan_engine: typing.Final = KasperskyScanEngineClient(
+            service_url=faker.url(schemes=["http"]),
+            client_name=faker.pystr(),
+            httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_request)),
+            hedging_policy=build_warmed_up_hedging_policy(latency_seconds=0.001, max_extra_requests_ratio=0),
+        )
+
+        await kaspersky_scan_engine.scan_memory(
+            file_name=faker.file_name(), file_content=generate_binary_content(faker)
+        )
+
+        assert len(sent_requests) == 1
@@ -0,0 +1,41 @@
+import typing
+
+import faker
+
+from safe_s3_storage.scan_verdict_cache import InMemoryScanVerdictCache
+from tests.conftest import FakeClock, generate_binary_content
+
+
+class TestInMemoryScanVerdictCache:
+    async def test_returns_stored_response(self, faker: faker.Faker) -> None:
+        content_digest, scan_response = faker.sha256(), generate_binary_content(faker)
+        verdict_cache: typing.Final = InMemoryScanVerdictCache()
+
+        await verdict_cache.set(content_digest, scan_response)
+
+        assert await verdict_cache.get(content_digest) == scan_response
+        assert await verdict_cache.get(faker.sha256()) is None
+
+    async def test_expires_entries(self, faker: faker.Faker) -> None:
+        content_digest: typing.Final = faker.sha256()
+        clock: typing.Final = FakeClock()
+        verdict_cache: typing.Final = InMemoryScanVerdictCache(ttl_seconds=10, clock=clock)
+        await verdict_cache.set(content_digest, generate_binary_content(faker))
+
+        clock.now = 10
+
+        assert await verdict_cache.get(content_digest) is None
+        assert len(verdict_cache) == 0
+
+    async def test_evicts_least_recently_used(self, faker: faker.Faker) -> None:
+        first_digest, second_digest, third_digest = faker.sha256(), faker.sha256(), faker.sha256()
+        verdict_cache: typing.Final = InMemoryScanVerdictCache(max_entries=2)
+        await verdict_cache.set(first_digest, b"first")
+        await verdict_cache.set(second_digest, b"second")
+        await verdict_cache.get(first_digest)
+
+        await verdict_cache.set(third_digest, b"third")
+
+        assert await verdict_cache.get(first_digest) == b"first"
+        assert await verdict_cache.get(second_digest) is None
+        assert await verdict_cache.get(third_digest) == b"third"
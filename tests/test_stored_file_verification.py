@@ -0,0 +1,151 @@
+import hashlib
+import pathlib
+import typing
+from unittest import mock
+
+import faker
+import pytest
+from botocore.exceptions import ClientError
+
+from safe_s3_storage.exceptions import FileSizeMismatchError
+from safe_s3_storage.file_validator import FileValidator
+from safe_s3_storage.s3_service import S3Service
+from safe_s3_storage.stored_file_verification import FileRescanProgressStore, StoredFileVerifier
+from tests.conftest import MIME_OCTET_STREAM, OCTET_STREAM_CONTENT
+
+
+def build_s3_client_mock(
+    stored_files: dict[str, bytes], *, page_size: int = 2, content_length_difference: int = 0
+) -> mock.Mock:
+    async def list_objects_v2(
+        *,
+        Bucket: str,  # noqa: ARG001, N803
+        Prefix: str,  # noqa: N803
+        StartAfter: str,  # noqa: N803
+    ) -> dict[str, typing.Any]:
+        listed_keys: typing.Final = [
+            one_key for one_key in sorted(stored_files) if one_key.startswith(Prefix) and one_key > StartAfter
+        ]
+        return {
+            "Contents": [{"Key": one_key} for one_key in listed_keys[:page_size]],
+            "IsTruncated": len(listed_keys) > page_size,
+        }
+
+    async def get_object(*, Bucket: str, Key: str) -> dict[str, typing.Any]:  # noqa: ARG001, N803
+        if Key not in stored_files:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        file_content: typing.Final = stored_files[Key]
+        return {
+            "Body": mock.Mock(read=mock.AsyncMock(side_effect=[file_content, b""])),
+            "ContentLength": len(file_content) + content_length_difference,
+        }
+
+    return mock.Mock(
+        list_objects_v2=mock.AsyncMock(side_effect=list_objects_v2), get_object=mock.AsyncMock(side_effect=get_object)
+    )
+
+
+def build_stored_file_verifier(s3_client_mock: mock.Mock) -> StoredFileVerifier:
+    return StoredFileVerifier(
+        s3_service=S3Service(s3_client=s3_client_mock),
+        file_validator=FileValidator(allowed_mime_types=[MIME_OCTET_STREAM]),
+    )
+
+
+class TestStoredFileVerifier:
+    async def test_verifies_file(self, faker: faker.Faker) -> None:
+        bucket_name, object_key = faker.pystr(), faker.pystr()
+        file_content: typing.Final = OCTET_STREAM_CONTENT
+
+        verified_file: typing.Final = await build_stored_file_verifier(
+            build_s3_client_mock({object_key: file_content})
+        ).verify_file(s3_path=f"{bucket_name}/{object_key}")
+
+        assert verified_file.file_size == len(file_content)
+        assert verified_file.mime_type == MIME_OCTET_STREAM
+        assert verified_file.content_sha256 == hashlib.sha256(file_content).hexdigest()
+
+    async def test_closes_body_of_failed_verification(self, faker: faker.Faker) -> None:
+        object_body: typing.Final = mock.Mock(read=mock.AsyncMock(side_effect=[OCTET_STREAM_CONTENT, b""]))
+        s3_client_mock: typing.Final = mock.Mock(
+            get_object=mock.AsyncMock(
+                return_value={"Body": object_body, "ContentLength": len(OCTET_STREAM_CONTENT) + 1}
+            )
+        )
+
+        with pytest.raises(FileSizeMismatchError):
+            await build_stored_file_verifier(s3_client_mock).verify_file(s3_path=f"{faker.pystr()}/{faker.pystr()}")
+
+        object_body.close.assert_called_once()
+
+    async def test_rescans_prefix(self, faker: faker.Faker) -> None:
+        bucket_name: typing.Final = faker.pystr()
+        stored_files: typing.Final = {f"uploads/{one_index}": OCTET_STREAM_CONTENT for one_index in range(5)}
+        s3_client_mock: typing.Final = build_s3_client_mock({**stored_files, "other/file": b"skipped"})
+
+        rescan_results: typing.Final = [
+            one_result
+            async for one_result in build_stored_file_verifier(s3_client_mock).rescan_prefix(
+                bucket_name=bucket_name, prefix="uploads/", max_concurrent_files=2
+            )
+        ]
+
+        assert sorted(one_result.s3_path for one_result in rescan_results) == [
+            f"{bucket_name}/{one_key}" for one_key in sorted(stored_files)
+        ]
+        for one_result in rescan_results:
+            assert one_result.error is None
+            assert one_result.verified_file is not None
+            assert (
+                one_result.verified_file.content_sha256
+                == hashlib.sha256(stored_files[one_result.s3_path.removeprefix(f"{bucket_name}/")]).hexdigest()
+            )
+
+    async def test_returns_failures_as_results(self, faker: faker.Faker) -> None:
+        rescan_results: typing.Final = [
+            one_result
+            async for one_result in build_stored_file_verifier(
+                build_s3_client_mock({faker.pystr(): OCTET_STREAM_CONTENT}, content_length_difference=1)
+            ).rescan_prefix(bucket_name=faker.pystr())
+        ]
+
+        assert len(rescan_results) == 1
+        assert rescan_results[0].verified_file is None
+        assert isinstance(rescan_results[0].error, FileSizeMismatchError)
+
+    async def test_resumes_from_progress_store(self, faker: faker.Faker, tmp_path: pathlib.Path) -> None:
+        bucket_name: typing.Final = faker.pystr()
+        object_keys: typing.Final = [f"uploads/{one_index}" for one_index in range(6)]
+        s3_client_mock: typing.Final = build_s3_client_mock(dict.fromkeys(object_keys, OCTET_STREAM_CONTENT))
+        progress_store: typing.Final = FileRescanProgressStore(progress_path=tmp_path / "progress")
+        verifier: typing.Final = build_stored_file_verifier(s3_client_mock)
+
+        first_rescan_paths: typing.Final[list[str]] = []
+        async for one_result in verifier.rescan_prefix(
+            bucket_name=bucket_name, max_concurrent_files=1, progress_store=progress_store, checkpoint_interval=1
+        ):
+            first_rescan_paths.append(one_result.s3_path)
+            if len(first_rescan_paths) == 2:  # noqa: PLR2004
+                break
+        second_rescan_paths: typing.Final = [
+            one_result.s3_path
+            async for one_result in verifier.rescan_prefix(bucket_name=bucket_name, progress_store=progress_store)
+        ]
+
+        assert first_rescan_paths == [f"{bucket_name}/{one_key}" for one_key in object_keys[:2]]
+        # a result counts as done once the caller asks for the next one, the one it broke on is rescanned
+        assert sorted(second_rescan_paths) == [f"{bucket_name}/{one_key}" for one_key in object_keys[1:]]
+        assert await progress_store.load_last_key() == object_keys[-1]
+
+    async def test_fails_on_missing_object_as_result(self, faker: faker.Faker) -> None:
+        s3_client_mock: typing.Final = build_s3_client_mock({})
+        s3_client_mock.list_objects_v2 = mock.AsyncMock(
+            return_value={"Contents": [{"Key": faker.pystr()}], "IsTruncated": False}
+        )
+
+        rescan_results: typing.Final = [
+            one_result
+            async for one_result in build_stored_file_verifier(s3_client_mock).rescan_prefix(bucket_name=faker.pystr())
+        ]
+
+        assert isinstance(rescan_results[0].error, ClientError)